@@ -0,0 +1,47 @@
+# Copyright 2023 Fabrica Software, LLC
+
+import iograft
+import iobasictypes
+
+from iogmaya_approvals import get_approvals
+
+
+class AwaitUserApprovals(iograft.Node):
+    """
+    Wait for the user to answer the dialogs shown by "wait_for_user" nodes
+    in deferred mode. Raises if any of the dialogs were cancelled. Empty
+    approval tokens (i.e. from non-interactive sessions) are ignored.
+    """
+    approvals = iograft.InputDefinition("approvals",
+                                        iobasictypes.StringList())
+    timeout = iograft.InputDefinition("timeout", iobasictypes.Double(),
+                                      default_value=0.0)
+
+    @classmethod
+    def GetDefinition(cls):
+        node = iograft.NodeDefinition("await_user_approvals")
+        node.SetMenuPath("Maya")
+        node.AddInput(cls.approvals)
+        node.AddInput(cls.timeout)
+        return node
+
+    @staticmethod
+    def Create():
+        return AwaitUserApprovals()
+
+    def Process(self, data):
+        approvals = iograft.GetInput(self.approvals, data)
+        timeout = iograft.GetInput(self.timeout, data)
+
+        # Like "wait_for_user", this node must not run in the main thread,
+        # which has to stay free to process the dialogs. A single thread
+        # waits on every approval at once.
+        cancelled = get_approvals().wait(approvals,
+                                         timeout=timeout or None)
+        if cancelled:
+            raise Exception("User cancelled the execution.")
+
+
+def LoadPlugin(plugin):
+    node = AwaitUserApprovals.GetDefinition()
+    plugin.RegisterNode(node, AwaitUserApprovals.Create)
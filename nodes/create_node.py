@@ -9,7 +9,7 @@ from iogmaya_threading import maya_main_thread
 class CreateNode(iograft.Node):
     """
     Create a new DAG node in Maya with the specified type. Outputs the name
-    of the created node.
+    and UUID of the created node. The parent may be given by name or UUID.
     """
     node_type = iograft.InputDefinition("node_type", iobasictypes.String())
     name = iograft.InputDefinition("name", iobasictypes.String(),
@@ -20,6 +20,7 @@ class CreateNode(iograft.Node):
                                           default_value=False)
 
     out_node = iograft.OutputDefinition("node", iobasictypes.String())
+    out_uuid = iograft.OutputDefinition("uuid", iobasictypes.String())
 
     @classmethod
     def GetDefinition(cls):
@@ -31,6 +32,7 @@ class CreateNode(iograft.Node):
         node.AddInput(cls.parent)
         node.AddInput(cls.select_node)
         node.AddOutput(cls.out_node)
+        node.AddOutput(cls.out_uuid)
         return node
 
     @staticmethod
@@ -40,6 +42,9 @@ class CreateNode(iograft.Node):
     @maya_main_thread
     def Process(self, data):
         import maya.cmds
+        from iogmaya_resolve import get_node_uuid, get_resolver
+        resolver = get_resolver()
+
         node_type = iograft.GetInput(self.node_type, data)
         name = iograft.GetInput(self.name, data)
         parent = iograft.GetInput(self.parent, data)
@@ -53,20 +58,22 @@ class CreateNode(iograft.Node):
             create_args["name"] = name
 
         if parent:
-            # Check that the parent node actually exists and is a transform.
-            if not maya.cmds.objExists(parent):
+            # Check that the parent node actually exists, and pass the
+            # createNode command its long name from the same lookup.
+            try:
+                create_args["parent"] = resolver.long_name(parent)
+            except KeyError:
                 raise KeyError(
                         "Parent node: '{}' does not exist.".format(parent))
 
-            create_args["parent"] = parent
-
         # Attempt to create the node.
         node = maya.cmds.createNode(node_type, **create_args)
 
-        # Get the full path to the node.
-        path_list = maya.cmds.ls([node], long=True)
-        full_path = path_list[0]
+        # Get the full path and UUID of the node from a single lookup.
+        handle, full_path = resolver.resolve(node)
         iograft.SetOutput(self.out_node, data, full_path)
+        iograft.SetOutput(self.out_uuid, data,
+                          get_node_uuid(handle.object()))
 
 
 def LoadPlugin(plugin):
@@ -0,0 +1,125 @@
+# Copyright 2023 Fabrica Software, LLC
+
+import iograft
+import iobasictypes
+
+from iogmaya_threading import maya_main_thread
+
+
+class ExportFbxSharded(iograft.Node):
+    """
+    Export each of the given nodes to its own FBX file in the output
+    directory, named after the node. The scene is snapshot to a temporary
+    file once and the exports are split across `processes` mayapy processes
+    which each open the snapshot and export their share of the nodes in
+    parallel. Outputs the exported filenames in the same order as `nodes`.
+
+    Only the snapshot is taken in Maya's main thread; the node waits for the
+    shards in its own thread, leaving Maya responsive during the exports.
+    """
+    nodes = iograft.InputDefinition("nodes", iobasictypes.StringList())
+    directory = iograft.InputDefinition("output_directory",
+                                        iobasictypes.Path())
+    preset = iograft.InputDefinition("preset_path", iobasictypes.Path())
+    processes = iograft.InputDefinition("processes", iobasictypes.Int(),
+                                        default_value=4)
+    filenames = iograft.OutputDefinition("filenames",
+                                         iobasictypes.StringList())
+
+    @classmethod
+    def GetDefinition(cls):
+        node = iograft.NodeDefinition("export_fbx_sharded")
+        node.SetNamespace("maya")
+        node.SetMenuPath("Maya/FBX")
+        node.AddInput(cls.nodes)
+        node.AddInput(cls.directory)
+        node.AddInput(cls.preset)
+        node.AddInput(cls.processes)
+        node.AddOutput(cls.filenames)
+        return node
+
+    @staticmethod
+    def Create():
+        return ExportFbxSharded()
+
+    def Process(self, data):
+        import iogmaya_export_shards
+        job = {}
+        self._PrepareExports(data, job)
+        exports = job["exports"]
+        if exports:
+            try:
+                iogmaya_export_shards.run_export_shards(
+                        job["snapshot"], job["preset"], exports,
+                        job["processes"])
+            finally:
+                iogmaya_export_shards.remove_snapshot(job["snapshot"])
+
+            cache = job["cache"]
+            for filename, cache_key in job["cache_keys"].items():
+                cache.put(cache_key, filename)
+
+        iograft.SetOutput(self.filenames, data, job["filenames"])
+
+    @maya_main_thread
+    def _PrepareExports(self, data, job):
+        # Fill `job` with the exports still to be made, snapshotting the
+        # scene if there are any.
+        import iogmaya_export_shards
+        from iogmaya_fbx import get_fbx_state
+        from iogmaya_resolve import get_resolver
+        from iogmaya_result_cache import get_result_cache, make_scene_key
+        # Resolve the nodes (names or UUIDs) to their long names, which key
+        # the result cache the same way as "export_fbx_with_preset".
+        resolver = get_resolver()
+        nodes = [resolver.long_name(node)
+                 for node in iograft.GetInput(self.nodes, data)]
+        directory = iograft.GetInput(self.directory, data)
+        preset = iograft.GetInput(self.preset, data)
+        processes = iograft.GetInput(self.processes, data)
+
+        # Each node is exported to a file named after it, so the names must
+        # be unique.
+        exports = []
+        seen = {}
+        for node in nodes:
+            filename = iogmaya_export_shards.get_export_filename(directory,
+                                                                 node)
+            if filename in seen:
+                raise ValueError(
+                    "Nodes: '{}' and '{}' would both be exported to:"
+                    " '{}'".format(seen[filename], node, filename))
+            seen[filename] = node
+            exports.append((node, filename))
+
+        job["filenames"] = [filename for node, filename in exports]
+
+        # With the result cache enabled, only the nodes which have not been
+        # exported from this scene with this preset before are sharded.
+        # The entries are shared with the "export_fbx_with_preset" node.
+        cache = get_result_cache()
+        cache_keys = {}
+        if cache is not None and exports:
+            get_fbx_state().ensure_plugin()
+            preset_hash = cache.hash_file(preset)
+            for node, filename in exports:
+                cache_key = make_scene_key(cache, "export_fbx", preset_hash,
+                                           [node])
+                if cache_key is None:
+                    break
+                if not cache.fetch(cache_key, filename):
+                    cache_keys[filename] = cache_key
+            else:
+                exports = [(node, filename) for node, filename in exports
+                           if filename in cache_keys]
+
+        job.update({"exports": exports, "preset": preset,
+                    "processes": processes, "cache": cache,
+                    "cache_keys": cache_keys})
+        if exports:
+            job["snapshot"] = iogmaya_export_shards.snapshot_scene()
+
+
+def LoadPlugin(plugin):
+    node = ExportFbxSharded.GetDefinition()
+    plugin.RegisterNode(node, ExportFbxSharded.Create)
@@ -36,26 +36,51 @@ class ExportFbxWithPreset(iograft.Node):
 
     @maya_main_thread
     def Process(self, data):
+        import maya.api.OpenMaya as OpenMaya
         import maya.cmds
+        from iogmaya_fbx import get_fbx_state
+        from iogmaya_resolve import get_resolver
+        from iogmaya_result_cache import get_result_cache, make_scene_key
+        fbx_state = get_fbx_state()
 
         # Ensure that the fbx plugin is loaded.
-        maya.cmds.loadPlugin("fbxmaya")
+        fbx_state.ensure_plugin()
 
         # Get the filename to export to.
         filename = iograft.GetInput(self.filename, data)
         preset = iograft.GetInput(self.preset, data)
         nodes = iograft.GetInput(self.nodes, data)
 
+        # Resolve the nodes (names or UUIDs) once. The long names key the
+        # result cache and the resolved nodes are selected directly.
+        resolver = get_resolver()
+        entries = [resolver.resolve(node) for node in nodes]
+        nodes = [long_name for _, long_name in entries]
+
+        # If the result cache is enabled and the scene, preset and nodes are
+        # unchanged since a previous export, use the cached file.
+        cache = get_result_cache()
+        cache_key = None
+        if cache is not None:
+            cache_key = make_scene_key(cache, "export_fbx",
+                                       cache.hash_file(preset), nodes)
+            if cache_key is not None and cache.fetch(cache_key, filename):
+                iograft.SetOutput(self.out_filename, data, filename)
+                return
+
         # If the nodes list is not empty, export ONLY those nodes. This
         # requires changing the current selection, so first save the
         # previous selection so it can be restored later.
         if nodes:
-            saved_selection = maya.cmds.ls(sl=True)
-            maya.cmds.select(nodes, replace=True)
+            saved_selection = OpenMaya.MGlobal.getActiveSelectionList()
+            selection = OpenMaya.MSelectionList()
+            for handle, _ in entries:
+                selection.add(handle.object())
+            OpenMaya.MGlobal.setActiveSelectionList(selection)
 
-        # Build the FBX export settings.
-        maya.cmds.FBXResetExport()
-        maya.cmds.FBXLoadExportPresetFile("-f", preset)
+        # Build the FBX export settings. This is skipped if the preset is
+        # already active.
+        fbx_state.apply_export_preset(preset)
 
         export_args = []
         export_args.append("-f")
@@ -66,7 +91,10 @@ class ExportFbxWithPreset(iograft.Node):
 
         # Restore the previous selection.
         if nodes:
-            maya.cmds.select(saved_selection, replace=True)
+            OpenMaya.MGlobal.setActiveSelectionList(saved_selection)
+
+        if cache_key is not None:
+            cache.put(cache_key, filename)
 
         # Finally, output the filename of the generated FBX file.
         iograft.SetOutput(self.out_filename, data, filename)
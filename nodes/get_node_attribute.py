@@ -30,22 +30,21 @@ class GetNodeAttribute(iograft.Node):
 
     @maya_main_thread
     def Process(self, data):
-        import maya.cmds
+        import iogmaya_plugs
+        from iogmaya_resolve import get_resolver
         node = iograft.GetInput(self.node, data)
         attribute = iograft.GetInput(self.attribute, data)
 
-        # Ensure that the node exists.
-        if not maya.cmds.objExists(node):
-            raise KeyError("Node: '{}' does not exist.".format(node))
+        # Find the plug from the node's MObject. Raises a KeyError if the
+        # node or the attribute does not exist.
+        node_object = get_resolver().get_object(node)
+        plug = iogmaya_plugs.find_plug(node_object, node, attribute)
 
-        # Ensure that the attribute exists.
-        attribute_path = ".".join([node, attribute])
-        if not maya.cmds.objExists(attribute_path):
-            raise KeyError("Attribute: '{}' does not exist on node:"
-                           " '{}'".format(attribute, node))
-
-        # Get the value and return it.
-        value = maya.cmds.getAttr(attribute_path)
+        # Get the value and return it. Like getAttr, a compound attribute
+        # returns a list holding the tuple of its child values.
+        value = iogmaya_plugs.get_plug_value(plug)
+        if plug.isCompound and not plug.isArray:
+            value = [value]
         iograft.SetOutput(self.value, data, value)
 
 
@@ -0,0 +1,54 @@
+# Copyright 2023 Fabrica Software, LLC
+
+import iograft
+import iobasictypes
+
+from iogmaya_threading import maya_main_thread
+
+
+class GetNodeAttributes(iograft.Node):
+    """
+    Get the values of many attributes on many DAG nodes at once. Outputs a
+    dictionary mapping each attribute to the list of its values, in the same
+    order as the `nodes` input. Compound attributes (i.e. "translate") are
+    output as tuples of their child values.
+    """
+    nodes = iograft.InputDefinition("nodes", iobasictypes.StringList())
+    attributes = iograft.InputDefinition("attributes",
+                                         iobasictypes.StringList())
+    values = iograft.MutableOutputDefinition("values")
+
+    @classmethod
+    def GetDefinition(cls):
+        node = iograft.NodeDefinition("get_node_attributes")
+        node.SetNamespace("maya")
+        node.SetMenuPath("Maya")
+        node.AddInput(cls.nodes)
+        node.AddInput(cls.attributes)
+        node.AddOutput(cls.values)
+        return node
+
+    @staticmethod
+    def Create():
+        return GetNodeAttributes()
+
+    @maya_main_thread
+    def Process(self, data):
+        import iogmaya_plugs
+        nodes = iograft.GetInput(self.nodes, data)
+        attributes = iograft.GetInput(self.attributes, data)
+
+        # Resolve all of the plugs up front so that a missing node or
+        # attribute is reported before any values are read.
+        plugs = iogmaya_plugs.get_plugs(nodes, attributes)
+
+        values = {}
+        for attribute in attributes:
+            values[attribute] = [iogmaya_plugs.get_plug_value(plug)
+                                 for plug in plugs[attribute]]
+        iograft.SetOutput(self.values, data, values)
+
+
+def LoadPlugin(plugin):
+    node = GetNodeAttributes.GetDefinition()
+    plugin.RegisterNode(node, GetNodeAttributes.Create)
@@ -9,11 +9,14 @@ from iogmaya_threading import maya_main_thread
 class GetParentTransform(iograft.Node):
     """
     Given a DAG node, return that node's parent transform node. Returns
-    the closest ancestor node that is a transform.
+    the closest ancestor node that is a transform. The node may be given
+    by name or UUID; the parent's UUID is output too.
     """
     node = iograft.InputDefinition("node", iobasictypes.String())
     parent_transform = iograft.OutputDefinition("parent_transform",
                                                 iobasictypes.String())
+    parent_uuid = iograft.OutputDefinition("parent_uuid",
+                                           iobasictypes.String())
 
     @classmethod
     def GetDefinition(cls):
@@ -22,6 +25,7 @@ class GetParentTransform(iograft.Node):
         node.SetMenuPath("Maya")
         node.AddInput(cls.node)
         node.AddOutput(cls.parent_transform)
+        node.AddOutput(cls.parent_uuid)
         return node
 
     @staticmethod
@@ -30,26 +34,17 @@ class GetParentTransform(iograft.Node):
 
     @maya_main_thread
     def Process(self, data):
-        import maya.cmds
+        import iogmaya_hierarchy
+        from iogmaya_resolve import get_node_uuid
         node = iograft.GetInput(self.node, data)
 
-        # Ensure that the node exists.
-        if not maya.cmds.objExists(node):
-            raise KeyError("Node: '{}' does not exist.".format(node))
-
-        # Get the relatives of type parent.
-        relative_list = maya.cmds.listRelatives([node],
-                                                fullPath=True,
-                                                type="transform",
-                                                parent=True)
-
-        # Check if the list is empty (meaning there is no parent), and
-        # raise an exception if so.
-        if relative_list is None or len(relative_list) == 0:
-            raise ValueError(
-                "Node: '{}' does not have a transform parent.".format(node))
-
-        iograft.SetOutput(self.parent_transform, data, relative_list[0])
+        # Get the DAG path of the parent. Raises a KeyError if the node
+        # does not exist and a ValueError if there is no parent.
+        parent_transform = iogmaya_hierarchy.get_parent_transform(node)
+        iograft.SetOutput(self.parent_transform, data,
+                          parent_transform.fullPathName())
+        iograft.SetOutput(self.parent_uuid, data,
+                          get_node_uuid(parent_transform.node()))
 
 
 def LoadPlugin(plugin):
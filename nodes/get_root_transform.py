@@ -8,11 +8,13 @@ from iogmaya_threading import maya_main_thread
 
 class GetRootTransform(iograft.Node):
     """
-    Return the root transform of a DAG node in Maya.
+    Return the root transform of a DAG node in Maya. The node may be given
+    by name or UUID; the root's UUID is output too.
     """
     node = iograft.InputDefinition("node", iobasictypes.String())
     root_transform = iograft.OutputDefinition("root_transform",
                                               iobasictypes.String())
+    root_uuid = iograft.OutputDefinition("root_uuid", iobasictypes.String())
 
     @classmethod
     def GetDefinition(cls):
@@ -21,6 +23,7 @@ class GetRootTransform(iograft.Node):
         node.SetMenuPath("Maya")
         node.AddInput(cls.node)
         node.AddOutput(cls.root_transform)
+        node.AddOutput(cls.root_uuid)
         return node
 
     @staticmethod
@@ -29,25 +32,17 @@ class GetRootTransform(iograft.Node):
 
     @maya_main_thread
     def Process(self, data):
-        import maya.cmds
+        import iogmaya_hierarchy
+        from iogmaya_resolve import get_node_uuid
         node = iograft.GetInput(self.node, data)
 
-        # Ensure that the node exists.
-        if not maya.cmds.objExists(node):
-            raise KeyError("Node: '{}' does not exist.".format(node))
-
-        # Get the full DAG path of the node.
-        node = maya.cmds.ls([node], long=True)[0]
-
-        # Get the root of the hierarchy for all passed in nodes.
-        root_transform = node.split('|')[1] if '|' in node else ""
-        if not root_transform:
-            raise RuntimeError(
-                "Could not find root transform for node: '{}'".format(node))
-
-        # Return the full path to the root.
-        root_transform = maya.cmds.ls(root_transform, long=True)[0]
-        iograft.SetOutput(self.root_transform, data, root_transform)
+        # Get the DAG path of the root of the node's hierarchy. Raises
+        # a KeyError if the node does not exist.
+        root_transform = iogmaya_hierarchy.get_root_transform(node)
+        iograft.SetOutput(self.root_transform, data,
+                          root_transform.fullPathName())
+        iograft.SetOutput(self.root_uuid, data,
+                          get_node_uuid(root_transform.node()))
 
 
 def LoadPlugin(plugin):
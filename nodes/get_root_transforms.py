@@ -9,18 +9,36 @@ from iogmaya_threading import maya_main_thread
 class GetRootTransformsMaya(iograft.Node):
     """
     Given a list of nodes in Maya, get the root transforms of that list.
+
+    The nodes may also be given as a NodeHandleList (see
+    iogmaya_node_handles) through `node_handles`. If `output_handles` is
+    enabled, the roots are output as a NodeHandleList through
+    `root_handles` instead of the `root_transforms` list.
     """
 
-    nodes = iograft.InputDefinition("nodes", iobasictypes.StringList())
+    nodes = iograft.InputDefinition("nodes", iobasictypes.StringList(),
+                                    default_value=[])
+    node_handles = iograft.MutableInputDefinition("node_handles",
+                                                  default_value=None)
+    output_handles = iograft.InputDefinition("output_handles",
+                                             iobasictypes.Bool(),
+                                             default_value=False)
     root_transforms = iograft.OutputDefinition("root_transforms",
                                                iobasictypes.StringList())
+    root_handles = iograft.MutableOutputDefinition("root_handles")
+    root_uuids = iograft.OutputDefinition("root_uuids",
+                                          iobasictypes.StringList())
 
     @classmethod
     def GetDefinition(cls):
         node = iograft.NodeDefinition("get_root_transforms")
         node.SetMenuPath("Maya")
         node.AddInput(cls.nodes)
+        node.AddInput(cls.node_handles)
+        node.AddInput(cls.output_handles)
         node.AddOutput(cls.root_transforms)
+        node.AddOutput(cls.root_handles)
+        node.AddOutput(cls.root_uuids)
         return node
 
     @staticmethod
@@ -29,22 +47,25 @@ class GetRootTransformsMaya(iograft.Node):
 
     @maya_main_thread
     def Process(self, data):
-        import maya.cmds
-        nodes = iograft.GetInput(self.nodes, data)
-
-        # Get the full DAG paths of the nodes.
-        nodes = maya.cmds.ls(nodes, long=True)
-
-        # Get the root of the hierarchy for all passed in nodes.
-        roots = set([node.split('|')[1] for node in nodes if '|' in node])
-
-        # Limit the set to only transforms.
-        roots = [root for root in roots
-                 if maya.cmds.nodeType(root) == "transform"]
+        import iogmaya_hierarchy
+        from iogmaya_node_handles import NodeHandleList, get_node_names
+        from iogmaya_resolve import get_node_uuid
+        nodes = get_node_names(iograft.GetInput(self.nodes, data),
+                               iograft.GetInput(self.node_handles, data))
+        output_handles = iograft.GetInput(self.output_handles, data)
 
-        # Return the full pathed roots.
-        roots = maya.cmds.ls(roots, long=True)
-        iograft.SetOutput(self.root_transforms, data, roots)
+        # Get the full paths to the unique roots of all passed in nodes,
+        # limited to only transforms.
+        root_paths = iogmaya_hierarchy.get_root_transforms(nodes)
+        roots = [root.fullPathName() for root in root_paths]
+        iograft.SetOutput(self.root_uuids, data,
+                          [get_node_uuid(root.node()) for root in root_paths])
+        if output_handles:
+            iograft.SetOutput(self.root_transforms, data, [])
+            iograft.SetOutput(self.root_handles, data, NodeHandleList(roots))
+        else:
+            iograft.SetOutput(self.root_transforms, data, roots)
+            iograft.SetOutput(self.root_handles, data, NodeHandleList())
 
 
 def LoadPlugin(plugin):
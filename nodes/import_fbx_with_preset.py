@@ -1,5 +1,9 @@
 # Copyright 2023 Fabrica Software, LLC
 
+import os
+import shutil
+import tempfile
+
 import iograft
 import iobasictypes
 
@@ -36,18 +40,40 @@ class ImportFbxWithPreset(iograft.Node):
     @maya_main_thread
     def Process(self, data):
         import maya.cmds
+        from iogmaya_fbx import get_fbx_state
+        from iogmaya_result_cache import get_result_cache, get_maya_version
+        fbx_state = get_fbx_state()
 
         # Ensure that the fbx plugin is loaded.
-        maya.cmds.loadPlugin("fbxmaya")
+        fbx_state.ensure_plugin()
 
         # Get the filename to import from.
         filename = iograft.GetInput(self.filename, data)
         preset = iograft.GetInput(self.preset, data)
         take = iograft.GetInput(self.take, data)
 
-        # Build the FBX import settings.
-        maya.cmds.FBXResetImport()
-        maya.cmds.FBXLoadImportPresetFile("-f", preset)
+        # Build the FBX import settings. This is skipped if the preset is
+        # already active.
+        fbx_state.apply_import_preset(preset)
+
+        # If the result cache is enabled and this file has been imported
+        # with the same preset before, import the cached Maya binary file
+        # of the result instead, which is much faster to load. Only imports
+        # adding new nodes are cached; the merge modes update the nodes in
+        # the scene, so their result depends on the scene.
+        cache = get_result_cache()
+        cache_key = None
+        if cache is not None and fbx_state.import_mode() == "add":
+            cache_key = cache.make_key("import_fbx",
+                                       cache.hash_file(filename),
+                                       cache.hash_file(preset),
+                                       take,
+                                       get_maya_version())
+            cached_scene = cache.get(cache_key, ".mb")
+            if cached_scene is not None:
+                maya.cmds.file(cached_scene, i=True, type="mayaBinary")
+                return
+            existing_nodes = set(maya.cmds.ls(long=True))
 
         import_args = []
         import_args.append("-f")
@@ -56,6 +82,30 @@ class ImportFbxWithPreset(iograft.Node):
         import_args.append(take)
         maya.cmds.FBXImport(*import_args)
 
+        if cache_key is not None:
+            self._CacheImport(cache, cache_key, existing_nodes)
+
+    def _CacheImport(self, cache, cache_key, existing_nodes):
+        import maya.cmds
+        imported = [node for node in maya.cmds.ls(long=True)
+                    if node not in existing_nodes]
+        if not imported:
+            return
+
+        # Export the imported nodes to a Maya binary file, leaving the
+        # selection as it was.
+        saved_selection = maya.cmds.ls(sl=True)
+        work_dir = tempfile.mkdtemp(prefix="iogmaya_import_")
+        try:
+            cached_scene = os.path.join(work_dir, "import.mb")
+            maya.cmds.select(imported, replace=True, noExpand=True)
+            maya.cmds.file(cached_scene, exportSelected=True,
+                           type="mayaBinary", force=True)
+            cache.put(cache_key, cached_scene)
+        finally:
+            maya.cmds.select(saved_selection, replace=True)
+            shutil.rmtree(work_dir, ignore_errors=True)
+
 
 def LoadPlugin(plugin):
     node = ImportFbxWithPreset.GetDefinition()
@@ -9,12 +9,32 @@ from iogmaya_threading import maya_main_thread
 class ImportFileMaya(iograft.Node):
     """
     Import a file into Maya.
+
+    For very large files, set `node_list_file` to write the imported node
+    names to that file (one per line, in batches of `batch_size`) instead
+    of outputting them as a list. This avoids a very large iograft output
+    but not the cost of collecting the names during the import. The names
+    can be read back in batches with iogmaya_node_list.read_node_list().
+    Alternatively, enable `output_handles` to output the imported nodes as
+    a compact NodeHandleList (see iogmaya_node_handles) through
+    `imported_handles`.
     """
     filename = iograft.InputDefinition("filename", iobasictypes.Path())
     namespace = iograft.InputDefinition("namespace", iobasictypes.String())
+    node_list_file = iograft.InputDefinition("node_list_file",
+                                             iobasictypes.Path(),
+                                             default_value="")
+    batch_size = iograft.InputDefinition("batch_size", iobasictypes.Int(),
+                                         default_value=10000)
+    output_handles = iograft.InputDefinition("output_handles",
+                                             iobasictypes.Bool(),
+                                             default_value=False)
 
     imported_nodes = iograft.OutputDefinition("imported_nodes",
                                               iobasictypes.StringList())
+    node_list = iograft.OutputDefinition("node_list", iobasictypes.Path())
+    node_count = iograft.OutputDefinition("node_count", iobasictypes.Int())
+    imported_handles = iograft.MutableOutputDefinition("imported_handles")
 
     @classmethod
     def GetDefinition(cls):
@@ -22,7 +42,13 @@ class ImportFileMaya(iograft.Node):
         node.SetMenuPath("Maya")
         node.AddInput(cls.filename)
         node.AddInput(cls.namespace)
+        node.AddInput(cls.node_list_file)
+        node.AddInput(cls.batch_size)
+        node.AddInput(cls.output_handles)
         node.AddOutput(cls.imported_nodes)
+        node.AddOutput(cls.node_list)
+        node.AddOutput(cls.node_count)
+        node.AddOutput(cls.imported_handles)
         return node
 
     @staticmethod
@@ -32,21 +58,56 @@ class ImportFileMaya(iograft.Node):
     @maya_main_thread
     def Process(self, data):
         import maya.cmds
+        from iogmaya_node_handles import NodeHandleList
         filename = iograft.GetInput(self.filename, data)
         namespace = iograft.GetInput(self.namespace, data)
+        node_list_file = iograft.GetInput(self.node_list_file, data)
+        output_handles = iograft.GetInput(self.output_handles, data)
 
         # Build the args to the file command.
         file_args = {
-            "i": True,
-            "rnn": True
+            "i": True
         }
 
         if namespace:
             file_args["namespace"] = namespace
 
+        if node_list_file:
+            self._StreamImport(data, filename, file_args, node_list_file)
+            iograft.SetOutput(self.imported_handles, data, NodeHandleList())
+            return
+
         # Run the command.
+        file_args["rnn"] = True
         new_nodes = maya.cmds.file(filename, **file_args)
-        iograft.SetOutput(self.imported_nodes, data, new_nodes)
+        if output_handles:
+            iograft.SetOutput(self.imported_nodes, data, [])
+            iograft.SetOutput(self.imported_handles, data,
+                              NodeHandleList(new_nodes))
+        else:
+            iograft.SetOutput(self.imported_nodes, data, new_nodes)
+            iograft.SetOutput(self.imported_handles, data, NodeHandleList())
+        iograft.SetOutput(self.node_list, data, "")
+        iograft.SetOutput(self.node_count, data, len(new_nodes))
+
+    def _StreamImport(self, data, filename, file_args, node_list_file):
+        import maya.cmds
+        from iogmaya_node_list import NewNodeRecorder, NodeListWriter
+        batch_size = iograft.GetInput(self.batch_size, data)
+        if batch_size < 1:
+            raise ValueError("The batch size must be at least 1, got"
+                             " {}.".format(batch_size))
+
+        # Record the new nodes during the import and write their names to
+        # the node list file in batches rather than outputting them.
+        with NewNodeRecorder() as recorder:
+            maya.cmds.file(filename, **file_args)
+        with NodeListWriter(node_list_file) as writer:
+            recorder.write_to(writer, batch_size)
+
+        iograft.SetOutput(self.imported_nodes, data, [])
+        iograft.SetOutput(self.node_list, data, node_list_file)
+        iograft.SetOutput(self.node_count, data, writer.count)
 
 
 def LoadPlugin(plugin):
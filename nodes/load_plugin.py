@@ -27,9 +27,9 @@ class LoadMayaPlugin(iograft.Node):
 
     @maya_main_thread
     def Process(self, data):
-        import maya.cmds
+        import iogmaya_plugins
         plugin_name = iograft.GetInput(self.plugin_name, data)
-        maya.cmds.loadPlugin(plugin_name)
+        iogmaya_plugins.ensure_plugin(plugin_name)
 
 
 def LoadPlugin(plugin):
@@ -0,0 +1,54 @@
+# Copyright 2023 Fabrica Software, LLC
+
+import iograft
+import iobasictypes
+
+from iogmaya_threading import maya_main_thread
+
+
+class LoadReference(iograft.Node):
+    """
+    Load a reference which was left unloaded when the scene was opened
+    (see the "open_scene_maya" node). `reference` may be a reference node
+    or a referenced file. `load_reference_depth` controls which of its
+    nested references are loaded. Outputs the reference node and the
+    loaded file.
+    """
+    reference = iograft.InputDefinition("reference", iobasictypes.String())
+    load_reference_depth = iograft.InputDefinition("load_reference_depth",
+                                                   iobasictypes.String(),
+                                                   default_value="all")
+    out_reference = iograft.OutputDefinition("reference",
+                                             iobasictypes.String())
+    out_filename = iograft.OutputDefinition("filename", iobasictypes.Path())
+
+    @classmethod
+    def GetDefinition(cls):
+        node = iograft.NodeDefinition("load_reference")
+        node.SetNamespace("maya")
+        node.SetMenuPath("Maya")
+        node.AddInput(cls.reference)
+        node.AddInput(cls.load_reference_depth)
+        node.AddOutput(cls.out_reference)
+        node.AddOutput(cls.out_filename)
+        return node
+
+    @staticmethod
+    def Create():
+        return LoadReference()
+
+    @maya_main_thread
+    def Process(self, data):
+        import iogmaya_references
+        reference = iograft.GetInput(self.reference, data)
+        depth = iograft.GetInput(self.load_reference_depth, data)
+
+        reference_node, filename = iogmaya_references.load_reference(
+                                                    reference, depth)
+        iograft.SetOutput(self.out_reference, data, reference_node)
+        iograft.SetOutput(self.out_filename, data, filename)
+
+
+def LoadPlugin(plugin):
+    node = LoadReference.GetDefinition()
+    plugin.RegisterNode(node, LoadReference.Create)
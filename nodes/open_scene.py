@@ -9,11 +9,30 @@ from iogmaya_threading import maya_main_thread
 class OpenSceneMaya(iograft.Node):
     """
     Open an existing scene in Maya.
+
+    By default every reference is loaded. `load_reference_depth` controls
+    which references are loaded when the scene is opened ("all", "none",
+    "topOnly" or "asPrefs"), and `load_no_references` is a shortcut for
+    "none". If a list of `references` (reference nodes or referenced files)
+    is given, the scene is opened without references and only those are
+    loaded. Unloaded references can be loaded later with the
+    "load_reference" node.
     """
     filename = iograft.InputDefinition("filename", iobasictypes.Path())
     force = iograft.InputDefinition("force", iobasictypes.Bool(),
                                     default_value=True)
+    load_reference_depth = iograft.InputDefinition("load_reference_depth",
+                                                   iobasictypes.String(),
+                                                   default_value="all")
+    load_no_references = iograft.InputDefinition("load_no_references",
+                                                 iobasictypes.Bool(),
+                                                 default_value=False)
+    references = iograft.InputDefinition("references",
+                                         iobasictypes.StringList(),
+                                         default_value=[])
     out_filename = iograft.OutputDefinition("filename", iobasictypes.Path())
+    out_references = iograft.OutputDefinition("references",
+                                              iobasictypes.StringList())
 
     @classmethod
     def GetDefinition(cls):
@@ -21,7 +40,11 @@ class OpenSceneMaya(iograft.Node):
         node.SetMenuPath("Maya")
         node.AddInput(cls.filename)
         node.AddInput(cls.force)
+        node.AddInput(cls.load_reference_depth)
+        node.AddInput(cls.load_no_references)
+        node.AddInput(cls.references)
         node.AddOutput(cls.out_filename)
+        node.AddOutput(cls.out_references)
         return node
 
     @staticmethod
@@ -31,8 +54,18 @@ class OpenSceneMaya(iograft.Node):
     @maya_main_thread
     def Process(self, data):
         import maya.cmds
+        import iogmaya_references
         filename = iograft.GetInput(self.filename, data)
         force = iograft.GetInput(self.force, data)
+        depth = iograft.GetInput(self.load_reference_depth, data)
+        load_no_references = iograft.GetInput(self.load_no_references, data)
+        references = iograft.GetInput(self.references, data)
+
+        # Only the whitelisted references are loaded, after the scene is
+        # opened without any.
+        if load_no_references or references:
+            depth = "none"
+        iogmaya_references.validate_depth(depth)
 
         # Build the args to the file command.
         file_args = {
@@ -40,10 +73,18 @@ class OpenSceneMaya(iograft.Node):
         }
         if force:
             file_args["force"] = True
+        if depth != "all":
+            file_args["loadReferenceDepth"] = depth
 
         # Run the command.
         out_filename = maya.cmds.file(filename, **file_args)
+
+        for reference in references:
+            iogmaya_references.load_reference(reference)
+
         iograft.SetOutput(self.out_filename, data, out_filename)
+        iograft.SetOutput(self.out_references, data,
+                          iogmaya_references.list_references())
 
 
 def LoadPlugin(plugin):
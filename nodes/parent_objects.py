@@ -11,17 +11,37 @@ class ParentObjects(iograft.Node):
     Parent the given objects to the object provided. The default behavior
     is to do an "absolute" parenting to preserve the existing world object
     transformations. If the `parent` input is an empty string, all objects
-    will be unparented (i.e. parented to world).
+    will be unparented (i.e. parented to world). Objects and the parent may
+    be given by name or UUID; the UUIDs of the objects are output too.
+
+    The objects may also be given as a NodeHandleList (see
+    iogmaya_node_handles) through `object_handles`, and output as one by
+    enabling `output_handles`.
+
+    To parent each object to a different parent, give one parent per object
+    through `parents` (an empty string parents that object to the world);
+    the `parent` input is then ignored. The objects are all reparented with
+    a single DAG modifier, and the selection is left untouched.
     """
-    objects = iograft.InputDefinition("objects", iobasictypes.StringList())
+    objects = iograft.InputDefinition("objects", iobasictypes.StringList(),
+                                      default_value=[])
+    object_handles = iograft.MutableInputDefinition("object_handles",
+                                                    default_value=None)
     parent = iograft.InputDefinition("parent", iobasictypes.String())
+    parents = iograft.InputDefinition("parents", iobasictypes.StringList(),
+                                      default_value=[])
     preserve_position = iograft.InputDefinition("preserve_position",
                                                 iobasictypes.Bool(),
                                                 default_value=True)
+    output_handles = iograft.InputDefinition("output_handles",
+                                             iobasictypes.Bool(),
+                                             default_value=False)
 
     # Output a list of objects since the input objects might
     # be renamed by the parenting operation.
     objects_out = iograft.OutputDefinition("objects", iobasictypes.StringList())
+    object_handles_out = iograft.MutableOutputDefinition("object_handles")
+    uuids_out = iograft.OutputDefinition("uuids", iobasictypes.StringList())
 
     @classmethod
     def GetDefinition(cls):
@@ -30,8 +50,13 @@ class ParentObjects(iograft.Node):
         node.SetMenuPath("Maya")
         node.AddInput(cls.objects)
         node.AddInput(cls.parent)
+        node.AddInput(cls.parents)
+        node.AddInput(cls.object_handles)
         node.AddInput(cls.preserve_position)
+        node.AddInput(cls.output_handles)
         node.AddOutput(cls.objects_out)
+        node.AddOutput(cls.object_handles_out)
+        node.AddOutput(cls.uuids_out)
         return node
 
     @staticmethod
@@ -41,15 +66,44 @@ class ParentObjects(iograft.Node):
     @maya_main_thread
     def Process(self, data):
         import maya.cmds
-        objects = iograft.GetInput(self.objects, data)
+        from iogmaya_node_handles import get_node_names
+        from iogmaya_resolve import get_resolver
+        resolver = get_resolver()
+        objects = list(get_node_names(
+                            iograft.GetInput(self.objects, data),
+                            iograft.GetInput(self.object_handles, data)))
         parent = iograft.GetInput(self.parent, data)
+        parents = iograft.GetInput(self.parents, data)
         preserve_position = iograft.GetInput(self.preserve_position, data)
+        output_handles = iograft.GetInput(self.output_handles, data)
 
         # Don't do anything if the input list of objects is empty. The `parent`
         # command by default will use selected objects in that case, but in
         # the context of nodes, we don't want to rely on selection state.
         if not objects:
-            iograft.SetOutput(self.objects_out, data, objects)
+            self._SetOutputs(data, objects, output_handles)
+            return
+
+        # Reparent (object, parent) pairs with a single modifier. The
+        # objects and parents are resolved by the resolver (names or UUIDs),
+        # and the outputs are read from the MDagPaths of the objects.
+        if parents:
+            import iogmaya_hierarchy
+            from iogmaya_resolve import get_node_uuid
+            dag_paths = iogmaya_hierarchy.reparent_objects(
+                                    objects, parents, preserve_position)
+            self._SetOutputs(data,
+                             [dag_path.fullPathName()
+                              for dag_path in dag_paths],
+                             output_handles,
+                             [get_node_uuid(dag_path.node())
+                              for dag_path in dag_paths])
+            return
+
+        # The parent command only takes node names.
+        objects = [resolver.to_name(node) for node in objects]
+        if parent:
+            parent = resolver.to_name(parent)
 
         # Build the args to the command.
         args = [objects]
@@ -76,8 +130,23 @@ class ParentObjects(iograft.Node):
         maya.cmds.select(clear=True)
 
         # Set the output object list. Use the full paths to the objects.
-        objects_out = maya.cmds.ls(objects_out, long=True)
-        iograft.SetOutput(self.objects_out, data, objects_out)
+        objects_out = resolver.long_names(objects_out)
+        self._SetOutputs(data, objects_out, output_handles)
+
+    def _SetOutputs(self, data, objects, output_handles, uuids=None):
+        from iogmaya_node_handles import NodeHandleList
+        from iogmaya_resolve import get_resolver
+        if uuids is None:
+            uuids = get_resolver().get_uuids(objects)
+        iograft.SetOutput(self.uuids_out, data, uuids)
+        if output_handles:
+            iograft.SetOutput(self.objects_out, data, [])
+            iograft.SetOutput(self.object_handles_out, data,
+                              NodeHandleList(objects))
+        else:
+            iograft.SetOutput(self.objects_out, data, objects)
+            iograft.SetOutput(self.object_handles_out, data,
+                              NodeHandleList())
 
 
 def LoadPlugin(plugin):
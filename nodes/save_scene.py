@@ -1,5 +1,7 @@
 # Copyright 2021 Fabrica Software, LLC
 
+import os
+
 import iograft
 import iobasictypes
 
@@ -34,10 +36,26 @@ class SaveSceneMaya(iograft.Node):
     @maya_main_thread
     def Process(self, data):
         import maya.cmds
+        from iogmaya_result_cache import get_result_cache, make_scene_key
         filename = iograft.GetInput(self.filename, data)
         filetype = iograft.GetInput(self.filetype, data)
         force = iograft.GetInput(self.force, data)
 
+        # If the result cache is enabled and the open scene is unmodified,
+        # the saved file only depends on the scene file and the file type,
+        # so a previously saved copy can be used. A forced save always
+        # saves, but still stores its result.
+        cache = get_result_cache()
+        cache_key = None
+        if cache is not None:
+            cache_key = make_scene_key(cache, "save_scene", filetype,
+                                       os.path.splitext(filename)[1])
+            if (cache_key is not None and not force and
+                    cache.fetch(cache_key, filename)):
+                maya.cmds.file(rename=filename)
+                iograft.SetOutput(self.out_filename, data, filename)
+                return
+
         # Check if the current filename matches the save file name, rename
         # if not.
         if maya.cmds.file(query=True, sceneName=True) != filename:
@@ -54,6 +72,8 @@ class SaveSceneMaya(iograft.Node):
 
         # Run the command.
         saved_filename = maya.cmds.file(**file_args)
+        if cache_key is not None:
+            cache.put(cache_key, saved_filename)
         iograft.SetOutput(self.out_filename, data, saved_filename)
 
 
@@ -35,29 +35,39 @@ class SetNodeAttribute(iograft.Node):
 
     @maya_main_thread
     def Process(self, data):
+        import maya.api.OpenMaya as OpenMaya
         import maya.cmds
+        import iogmaya_plugs
+        import iogmaya_undo
+        from iogmaya_resolve import get_resolver
         node = iograft.GetInput(self.node, data)
         attribute = iograft.GetInput(self.attribute, data)
         value = iograft.GetInput(self.value, data)
         value_type = iograft.GetInput(self.value_type, data)
 
-        # Ensure that the node exists.
-        if not maya.cmds.objExists(node):
-            raise KeyError("Node: '{}' does not exist.".format(node))
+        # Find the plug from the node's MObject. Raises a KeyError if the
+        # node or the attribute does not exist.
+        node_object = get_resolver().get_object(node)
+        plug = iogmaya_plugs.find_plug(node_object, node, attribute)
 
-        # Ensure that the attribute exists.
-        attribute_path = ".".join([node, attribute])
-        if not maya.cmds.objExists(attribute_path):
-            raise KeyError("Attribute: '{}' does not exist on node:"
-                           " '{}'".format(attribute, node))
+        # Set the value through a modifier, unless the type of the data is
+        # defined or the modifier can't set the attribute's type; setAttr
+        # handles those.
+        modifier = None
+        if not value_type:
+            modifier = OpenMaya.MDGModifier()
+            try:
+                iogmaya_plugs.set_plug_value(modifier, plug, value)
+            except TypeError:
+                modifier = None
 
-        # If the type of the data is defined, set it.
-        command_args = {}
-        if value_type:
-            command_args["type"] = value_type
-
-        # Attempt to set the value.
-        maya.cmds.setAttr(attribute_path, value, **command_args)
+        if modifier is not None:
+            iogmaya_undo.execute_modifier(modifier)
+        else:
+            command_args = {}
+            if value_type:
+                command_args["type"] = value_type
+            maya.cmds.setAttr(plug.name(), value, **command_args)
         iograft.SetOutput(self.out_node, data, node)
 
 
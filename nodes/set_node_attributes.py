@@ -0,0 +1,79 @@
+# Copyright 2023 Fabrica Software, LLC
+
+import iograft
+import iobasictypes
+
+from iogmaya_threading import maya_main_thread
+
+
+class SetNodeAttributes(iograft.Node):
+    """
+    Set attribute values on many DAG nodes at once. `values` is a list (or
+    NumPy array) with one value per node. `attributes` contains either a
+    single attribute to set on every node, or one attribute per node.
+    Compound attributes (i.e. "translate") take a sequence of child values,
+    so a (N, 3) array can be used to set "translate" on N nodes.
+
+    All of the values are set in a single operation which is undone as a
+    single step when the iograft Maya plugin is loaded.
+    """
+    nodes = iograft.InputDefinition("nodes", iobasictypes.StringList())
+    attributes = iograft.InputDefinition("attributes",
+                                         iobasictypes.StringList())
+    values = iograft.MutableInputDefinition("values")
+    out_nodes = iograft.OutputDefinition("nodes", iobasictypes.StringList())
+
+    @classmethod
+    def GetDefinition(cls):
+        node = iograft.NodeDefinition("set_node_attributes")
+        node.SetNamespace("maya")
+        node.SetMenuPath("Maya")
+        node.AddInput(cls.nodes)
+        node.AddInput(cls.attributes)
+        node.AddInput(cls.values)
+        node.AddOutput(cls.out_nodes)
+        return node
+
+    @staticmethod
+    def Create():
+        return SetNodeAttributes()
+
+    @maya_main_thread
+    def Process(self, data):
+        import maya.api.OpenMaya as OpenMaya
+        import iogmaya_plugs
+        import iogmaya_undo
+        nodes = iograft.GetInput(self.nodes, data)
+        attributes = iograft.GetInput(self.attributes, data)
+        values = iograft.GetInput(self.values, data)
+
+        # Convert NumPy arrays to (nested) lists of Python values.
+        if hasattr(values, "tolist"):
+            values = values.tolist()
+
+        if len(values) != len(nodes):
+            raise ValueError("Expected {} values (one per node), got"
+                             " {}.".format(len(nodes), len(values)))
+        if len(attributes) == 1:
+            attributes = attributes * len(nodes)
+        elif len(attributes) != len(nodes):
+            raise ValueError("Expected a single attribute or one attribute"
+                             " per node, got {}.".format(len(attributes)))
+
+        # Resolve all of the plugs and queue up the changes before modifying
+        # anything, so an invalid node or value doesn't leave the scene
+        # partially updated.
+        node_objects = iogmaya_plugs.get_dependency_nodes(nodes)
+        modifier = OpenMaya.MDGModifier()
+        for node, node_object, attribute, value in zip(nodes, node_objects,
+                                                       attributes, values):
+            plug = iogmaya_plugs.find_plug(node_object, node, attribute)
+            iogmaya_plugs.set_plug_value(modifier, plug, value)
+
+        iogmaya_undo.execute_modifier(modifier)
+        iograft.SetOutput(self.out_nodes, data, nodes)
+
+
+def LoadPlugin(plugin):
+    node = SetNodeAttributes.GetDefinition()
+    plugin.RegisterNode(node, SetNodeAttributes.Create)
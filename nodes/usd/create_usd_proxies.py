@@ -0,0 +1,91 @@
+# Copyright 2023 Fabrica Software, LLC
+
+import iograft
+import iobasictypes
+
+from iogmaya_threading import maya_main_thread
+
+
+class CreateUSDProxies(iograft.Node):
+    """
+    Create a USD proxy node for each of the given USD files in a single
+    operation (and a single undo entry).
+
+    `prim_paths` may be empty, hold a single prim path used for every proxy,
+    or hold one prim path per file. `names` (the names of the proxy shapes)
+    may be empty or hold one name per file. With `share_stages` enabled,
+    the stages are opened in the shared USD StageCache so proxies pointing
+    at the same file open it only once.
+    """
+    filenames = iograft.InputDefinition("usd_files",
+                                        iobasictypes.StringList())
+    prim_paths = iograft.InputDefinition("prim_paths",
+                                         iobasictypes.StringList(),
+                                         default_value=[])
+    names = iograft.InputDefinition("names", iobasictypes.StringList(),
+                                    default_value=[])
+    load_payloads = iograft.InputDefinition("load_payloads",
+                                            iobasictypes.Bool(),
+                                            default_value=True)
+    share_stages = iograft.InputDefinition("share_stages",
+                                           iobasictypes.Bool(),
+                                           default_value=True)
+
+    shape_nodes = iograft.OutputDefinition("shape_nodes",
+                                           iobasictypes.StringList())
+
+    @classmethod
+    def GetDefinition(cls):
+        node = iograft.NodeDefinition("create_usd_proxies")
+        node.SetNamespace("maya_usd")
+        node.SetMenuPath("Maya/USD")
+        node.AddInput(cls.filenames)
+        node.AddInput(cls.prim_paths)
+        node.AddInput(cls.names)
+        node.AddInput(cls.load_payloads)
+        node.AddInput(cls.share_stages)
+        node.AddOutput(cls.shape_nodes)
+        return node
+
+    @staticmethod
+    def Create():
+        return CreateUSDProxies()
+
+    @maya_main_thread
+    def Process(self, data):
+        import maya.api.OpenMaya as OpenMaya
+        import iogmaya_undo
+        import iogmaya_usd
+        filenames = iograft.GetInput(self.filenames, data)
+        prim_paths = iograft.GetInput(self.prim_paths, data)
+        names = iograft.GetInput(self.names, data)
+        load_payloads = iograft.GetInput(self.load_payloads, data)
+        share_stages = iograft.GetInput(self.share_stages, data)
+
+        if not prim_paths:
+            prim_paths = [""] * len(filenames)
+        elif len(prim_paths) == 1:
+            prim_paths = prim_paths * len(filenames)
+        elif len(prim_paths) != len(filenames):
+            raise ValueError("Expected a single prim path or one prim path"
+                             " per file, got {}.".format(len(prim_paths)))
+        if not names:
+            names = [""] * len(filenames)
+        elif len(names) != len(filenames):
+            raise ValueError("Expected one name per file, got {}.".format(
+                                                                len(names)))
+
+        modifier = OpenMaya.MDagModifier()
+        shapes = iogmaya_usd.create_proxies(modifier, filenames, prim_paths,
+                                            names, load_payloads,
+                                            share_stages)
+        iogmaya_undo.execute_modifier(modifier)
+
+        shape_nodes = [OpenMaya.MDagPath.getAPathTo(shape).fullPathName()
+                       for shape in shapes]
+        iograft.SetOutput(self.shape_nodes, data, shape_nodes)
+
+
+def LoadPlugin(plugin):
+    node = CreateUSDProxies.GetDefinition()
+    plugin.RegisterNode(node, CreateUSDProxies.Create)
@@ -10,6 +10,12 @@ class CreateUSDProxy(iograft.Node):
     """
     Create a USD proxy node which holds a USD stage which can be interacted
     with from Maya.
+
+    The stage can be limited to the prims in `population_mask` (and their
+    ancestors and descendants). If `load_prims` is given, only the payloads
+    of those prims (and their descendants) are loaded instead of following
+    `load_payloads`, and the payloads of `unload_prims` are not loaded. The
+    mask and load rules are applied before any payload is loaded.
     """
     name = iograft.InputDefinition("name", iobasictypes.String(),
                                    default_value="stageShape1")
@@ -20,6 +26,15 @@ class CreateUSDProxy(iograft.Node):
     load_payloads = iograft.InputDefinition("load_payloads",
                                             iobasictypes.Bool(),
                                             default_value=True)
+    population_mask = iograft.InputDefinition("population_mask",
+                                              iobasictypes.StringList(),
+                                              default_value=[])
+    load_prims = iograft.InputDefinition("load_prims",
+                                         iobasictypes.StringList(),
+                                         default_value=[])
+    unload_prims = iograft.InputDefinition("unload_prims",
+                                           iobasictypes.StringList(),
+                                           default_value=[])
     select_node = iograft.InputDefinition("select", iobasictypes.Bool(),
                                           default_value=False)
 
@@ -34,6 +49,9 @@ class CreateUSDProxy(iograft.Node):
         node.AddInput(cls.filename)
         node.AddInput(cls.prim_path)
         node.AddInput(cls.load_payloads)
+        node.AddInput(cls.population_mask)
+        node.AddInput(cls.load_prims)
+        node.AddInput(cls.unload_prims)
         node.AddInput(cls.select_node)
         node.AddOutput(cls.shape_node)
         return node
@@ -45,15 +63,19 @@ class CreateUSDProxy(iograft.Node):
     @maya_main_thread
     def Process(self, data):
         import maya.cmds
+        import iogmaya_plugins
+        from iogmaya_resolve import get_resolver
         name = iograft.GetInput(self.name, data)
         select_node = iograft.GetInput(self.select_node, data)
         filename = iograft.GetInput(self.filename, data)
         prim_path = iograft.GetInput(self.prim_path, data)
         load_payloads = iograft.GetInput(self.load_payloads, data)
+        population_mask = iograft.GetInput(self.population_mask, data)
+        load_prims = iograft.GetInput(self.load_prims, data)
+        unload_prims = iograft.GetInput(self.unload_prims, data)
 
-        # Verify that the USD plugin has been loaded.
-        if not maya.cmds.pluginInfo("mayaUsdPlugin", query=True, loaded=True):
-            raise RuntimeError("The mayaUsdPlugin has not been loaded.")
+        # Load the USD plugin if it has not been loaded yet.
+        iogmaya_plugins.ensure_plugin("mayaUsdPlugin")
 
         # Build a dictionary of the arguments to createNode.
         create_args = {
@@ -68,6 +90,18 @@ class CreateUSDProxy(iograft.Node):
         # Set whether or not to load payloads.
         maya.cmds.setAttr(shape_node + ".loadPayloads", load_payloads)
 
+        # With a population mask or load rules, open the stage ourselves
+        # and hand it to the proxy through the stage cache, so the proxy
+        # never composes the full stage.
+        if filename and (population_mask or load_prims or unload_prims):
+            import iogmaya_usd
+            stage_id = iogmaya_usd.open_masked_stage(filename,
+                                                     population_mask,
+                                                     load_prims,
+                                                     unload_prims,
+                                                     load_payloads)
+            maya.cmds.setAttr(shape_node + ".stageCacheId", stage_id)
+
         # If there is a filename input, set that on the proxy shape.
         if filename:
             maya.cmds.setAttr(shape_node + ".filePath",
@@ -84,8 +118,8 @@ class CreateUSDProxy(iograft.Node):
         # mayaUsd_createStageFromFile:
         # https://github.com/Autodesk/maya-usd/blob/dev/plugin/adsk/scripts/mayaUsd_createStageFromFile.mel
         maya.cmds.connectAttr('time1.outTime', shape_node + '.time')
-        full_path = maya.cmds.ls(shape_node, long=True)
-        iograft.SetOutput(self.shape_node, data, full_path[0])
+        full_path = get_resolver().long_name(shape_node)
+        iograft.SetOutput(self.shape_node, data, full_path)
 
 
 def LoadPlugin(plugin):
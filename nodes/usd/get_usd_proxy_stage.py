@@ -31,11 +31,15 @@ class GetUsdProxyStage(iograft.Node):
 
     @maya_main_thread
     def Process(self, data):
+        import iogmaya_plugins
+        import iogmaya_usd
+        iogmaya_plugins.ensure_plugin("mayaUsdPlugin")
         proxy_shape_path = iograft.GetInput(self.proxy_shape_path, data)
 
-        # Get the USD Stage through UFE.
-        import mayaUsd.ufe
-        stage = mayaUsd.ufe.getStage(proxy_shape_path)
+        # Get the USD Stage through UFE, or from the stages already looked
+        # up for this proxy.
+        stage = iogmaya_usd.get_proxy_stage_cache().get_stage(
+                                                        proxy_shape_path)
         iograft.SetOutput(self.stage, data, stage)
 
 
@@ -7,10 +7,15 @@
 # interact with both Maya and iograft while the dialog is being shown. The
 # dialog also passes back the result of the dialog (cancelled or not) to
 # the node so execution can be cancelled if requested.
+#
+# With the "deferred" input enabled, the node does not wait for the dialog at
+# all. It outputs an approval token and returns, freeing its thread; the
+# "await_user_approvals" node later waits on any number of tokens at once.
 
 import iograft
 import iobasictypes
 import iogmaya_ui
+from iogmaya_approvals import get_approvals
 
 from PySide2 import QtCore, QtWidgets
 
@@ -84,10 +89,25 @@ def display_dialog(hook, **kwargs):
     iogmaya_ui.ensure_window_shown(dialog)
 
 
+# Hooks of deferred dialogs which have not been answered yet, by token. The
+# hooks must be kept alive until their dialog is closed.
+_deferred_hooks = {}
+
+
+def _finish_deferred(token):
+    hook = _deferred_hooks.pop(token, None)
+    if hook is not None:
+        get_approvals().finish(token, hook.cancelled)
+
+
 class WaitForUser(iograft.Node):
     """
     Pop up a Qt dialog within Maya prompting the user if they would like
     to continue. When processing non-interactively, this node has no effect.
+
+    When `deferred` is enabled, the node returns as soon as the dialog is
+    shown and outputs an approval token to be passed to an
+    "await_user_approvals" node, which raises if the user cancelled.
     """
     title = iograft.InputDefinition("title", iobasictypes.String(),
                                     default_value="Waiting for confirmation")
@@ -99,6 +119,10 @@ class WaitForUser(iograft.Node):
     cancel_button_text = iograft.InputDefinition("cancel_button_text",
                                                  iobasictypes.String(),
                                                  default_value="Cancel")
+    deferred = iograft.InputDefinition("deferred", iobasictypes.Bool(),
+                                       default_value=False)
+
+    approval = iograft.OutputDefinition("approval", iobasictypes.String())
 
     @classmethod
     def GetDefinition(cls):
@@ -108,6 +132,8 @@ class WaitForUser(iograft.Node):
         node.AddInput(cls.message)
         node.AddInput(cls.ok_button_text)
         node.AddInput(cls.cancel_button_text)
+        node.AddInput(cls.deferred)
+        node.AddOutput(cls.approval)
         return node
 
     @staticmethod
@@ -120,6 +146,7 @@ class WaitForUser(iograft.Node):
         # If we are executing Maya in batch mode, we cannot prompt the
         # user with a Qt window, so return immediately.
         if maya.cmds.about(batch=1):
+            iograft.SetOutput(self.approval, data, "")
             return
 
         # Get the input values containing the desired content of the dialog.
@@ -130,6 +157,10 @@ class WaitForUser(iograft.Node):
             "cancel_button_text": iograft.GetInput(self.cancel_button_text, data)
         }
 
+        if iograft.GetInput(self.deferred, data):
+            self._ShowDeferred(data, dialog_content)
+            return
+
         # Create an event loop so we can wait for the dialog to be closed,
         # signaling that the node should be complete. This is the main concept
         # behind how this node can leave both iograft and Maya in a
@@ -158,6 +189,22 @@ class WaitForUser(iograft.Node):
         # an exception to stop the iograft processing.
         if hook.cancelled:
             raise Exception("User cancelled the execution.")
+        iograft.SetOutput(self.approval, data, "")
+
+    def _ShowDeferred(self, data, dialog_content):
+        # Register the approval and record the dialog's answer against its
+        # token when the hook is signaled. Nothing waits here; the answer is
+        # collected by the "await_user_approvals" node.
+        token = get_approvals().register()
+        hook = DialogFinishedHook()
+        _deferred_hooks[token] = hook
+        hook.finished.connect(lambda: _finish_deferred(token))
+
+        import maya.utils
+        maya.utils.executeInMainThreadWithResult(display_dialog,
+                                                 hook,
+                                                 **dialog_content)
+        iograft.SetOutput(self.approval, data, token)
 
 
 def LoadPlugin(plugin):
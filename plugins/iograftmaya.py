@@ -14,6 +14,7 @@
 
 import os
 import platform
+import socket
 import sys
 
 import maya.api.OpenMaya as OpenMaya
@@ -137,6 +138,9 @@ class StartIograftCommand(OpenMaya.MPxCommand):
     # so it can be removed when iograft is unregistered.
     exit_callback_id = None
 
+    # The metrics HTTP endpoint, if IOGMAYA_METRICS_PORT is set.
+    metrics_server = None
+
     def __init__(self):
         OpenMaya.MPxCommand.__init__(self)
 
@@ -158,6 +162,35 @@ class StartIograftCommand(OpenMaya.MPxCommand):
         OpenMaya.MMessage.removeCallback(cls.exit_callback_id)
         cls.exit_callback_id = None
 
+    @classmethod
+    def startMetricsServer(cls):
+        import iogmaya_metrics
+        metrics = iogmaya_metrics.enable_metrics()
+
+        port = os.environ.get(iogmaya_metrics.METRICS_PORT_ENV, "")
+        if not port or cls.metrics_server is not None:
+            return
+
+        # The Core is already running at this point, so a bad port (or one
+        # that is already in use) only disables the endpoint.
+        try:
+            cls.metrics_server = iogmaya_metrics.MetricsServer(metrics,
+                                                               int(port))
+        except (ValueError, OverflowError, socket.error) as e:
+            OpenMaya.MGlobal.displayWarning(
+                    "Failed to serve the iograft metrics on port: '{}':"
+                    " {}".format(port, e))
+            return
+        OpenMaya.MGlobal.displayInfo("iograft metrics available at: {}".format(
+                                        cls.metrics_server.address))
+
+    @classmethod
+    def stopMetricsServer(cls):
+        if cls.metrics_server is None:
+            return
+        cls.metrics_server.stop()
+        cls.metrics_server = None
+
     @staticmethod
     def cmdCreator():
         return StartIograftCommand()
@@ -185,6 +218,10 @@ class StartIograftCommand(OpenMaya.MPxCommand):
                                         IOGRAFT_MAYA_CORE_NAME,
                                         core_address))
 
+        # Collect node metrics for the iograft_stats command (and the
+        # metrics endpoint, if enabled).
+        type(self).startMetricsServer()
+
 
 class StopIograftCommand(OpenMaya.MPxCommand):
     kPluginCmdName = "stop_iograft"
@@ -209,8 +246,14 @@ class StopIograftCommand(OpenMaya.MPxCommand):
         except KeyError:
             pass
 
+        # End any graph execution scope left open so the viewport isn't
+        # left suspended.
+        import iogmaya_graph_scope
+        iogmaya_graph_scope.get_graph_scope().end_all()
+
         iograft.Uninitialize()
         StartIograftCommand.removeExitCallback()
+        StartIograftCommand.stopMetricsServer()
         OpenMaya.MGlobal.displayInfo("The iograft API has been uninitialized.")
 
 
@@ -258,6 +301,110 @@ class LaunchIograftUI(OpenMaya.MPxCommand):
         OpenMaya.MGlobal.displayInfo("iograft_ui launched.")
 
 
+class IograftStatsCommand(OpenMaya.MPxCommand):
+    """
+    Return the node metrics collected since iograft was started as a JSON
+    string (see iogmaya_metrics), along with the statistics of the USD proxy
+    stage cache.
+    """
+    kPluginCmdName = "iograft_stats"
+
+    def __init__(self):
+        OpenMaya.MPxCommand.__init__(self)
+
+    @staticmethod
+    def cmdCreator():
+        return IograftStatsCommand()
+
+    def doIt(self, args):
+        import json
+        import iogmaya_metrics
+        import iogmaya_usd
+
+        metrics = iogmaya_metrics.get_metrics()
+        if metrics is None:
+            OpenMaya.MGlobal.displayWarning(
+                            "iograft metrics are not enabled; run"
+                            " start_iograft first.")
+            return
+        stats = metrics.snapshot()
+        cache_stats = iogmaya_usd.get_proxy_stage_cache().stats()
+        stats["proxy_stage_cache"] = cache_stats
+        self.setResult(json.dumps(stats, indent=2))
+
+
+class BeginGraphCommand(OpenMaya.MPxCommand):
+    """
+    Enter a graph execution scope: the nodes processed until
+    `iograft_end_graph` is called are recorded as a single undo chunk and
+    viewport refresh is suspended. See iogmaya_graph_scope.
+    """
+    kPluginCmdName = "iograft_begin_graph"
+
+    def __init__(self):
+        OpenMaya.MPxCommand.__init__(self)
+
+    @staticmethod
+    def cmdCreator():
+        return BeginGraphCommand()
+
+    def doIt(self, args):
+        import iogmaya_graph_scope
+        iogmaya_graph_scope.get_graph_scope().begin()
+
+
+class EndGraphCommand(OpenMaya.MPxCommand):
+    """
+    Exit the graph execution scope entered by `iograft_begin_graph`.
+    """
+    kPluginCmdName = "iograft_end_graph"
+
+    def __init__(self):
+        OpenMaya.MPxCommand.__init__(self)
+
+    @staticmethod
+    def cmdCreator():
+        return EndGraphCommand()
+
+    def doIt(self, args):
+        import iogmaya_graph_scope
+        iogmaya_graph_scope.get_graph_scope().end()
+
+
+class ModifierUndoCommand(OpenMaya.MPxCommand):
+    """
+    Internal command used by iogmaya_undo to execute an OpenMaya modifier
+    so that it is recorded as a single entry on the undo queue.
+    """
+    kPluginCmdName = "iograft_modifier_undo"
+
+    def __init__(self):
+        OpenMaya.MPxCommand.__init__(self)
+        self.modifier = None
+
+    @staticmethod
+    def cmdCreator():
+        return ModifierUndoCommand()
+
+    def isUndoable(self):
+        return True
+
+    def doIt(self, args):
+        import iogmaya_undo
+        self.modifier = iogmaya_undo.pop_pending_modifier()
+        self.redoIt()
+
+    def redoIt(self):
+        try:
+            self.modifier.doIt()
+        except RuntimeError:
+            self.modifier.undoIt()
+            raise
+
+    def undoIt(self):
+        self.modifier.undoIt()
+
+
 def initializePlugin(plugin):
     pluginFn = OpenMaya.MFnPlugin(plugin,
                                   "Fabrica Software, LLC",
@@ -272,6 +419,14 @@ def initializePlugin(plugin):
                                  StopIograftCommand.cmdCreator)
         pluginFn.registerCommand(LaunchIograftUI.kPluginCmdName,
                                  LaunchIograftUI.cmdCreator)
+        pluginFn.registerCommand(ModifierUndoCommand.kPluginCmdName,
+                                 ModifierUndoCommand.cmdCreator)
+        pluginFn.registerCommand(IograftStatsCommand.kPluginCmdName,
+                                 IograftStatsCommand.cmdCreator)
+        pluginFn.registerCommand(BeginGraphCommand.kPluginCmdName,
+                                 BeginGraphCommand.cmdCreator)
+        pluginFn.registerCommand(EndGraphCommand.kPluginCmdName,
+                                 EndGraphCommand.cmdCreator)
 
     except:
         sys.stderr.write("Failed to register iograft commands.\n")
@@ -297,10 +452,21 @@ def uninitializePlugin(plugin):
         pluginFn.deregisterCommand(StartIograftCommand.kPluginCmdName)
         pluginFn.deregisterCommand(StopIograftCommand.kPluginCmdName)
         pluginFn.deregisterCommand(LaunchIograftUI.kPluginCmdName)
+        pluginFn.deregisterCommand(ModifierUndoCommand.kPluginCmdName)
+        pluginFn.deregisterCommand(IograftStatsCommand.kPluginCmdName)
+        pluginFn.deregisterCommand(BeginGraphCommand.kPluginCmdName)
+        pluginFn.deregisterCommand(EndGraphCommand.kPluginCmdName)
     except:
         sys.stderr.write("Failed to unregister iograft commands.\n")
         raise
 
+    # Remove the scene callbacks installed by the node name resolver and
+    # the USD helpers.
+    import iogmaya_resolve
+    import iogmaya_usd
+    iogmaya_resolve.uninstall_resolver()
+    iogmaya_usd.uninstall_callbacks()
+
     # Deregister the iograft shelf.
     try:
         _clearShelf(delete_if_empty=True)
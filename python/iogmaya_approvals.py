@@ -0,0 +1,117 @@
+# Copyright 2023 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Registry of pending user approvals.
+
+A node requesting approval registers it and receives a token, then returns
+without waiting. Whatever collects the answer (i.e. a dialog's finished
+signal) calls finish() with the token, and a later node waits on all of the
+tokens at once with wait(). Any number of pending approvals therefore only
+holds a single node thread, and only while the answers are outstanding.
+"""
+
+import itertools
+import threading
+
+
+class PendingApprovals(object):
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._pending = set()
+        self._results = {}
+        self._counter = itertools.count(1)
+
+    def register(self):
+        """
+        Register a new pending approval and return its token.
+        """
+        with self._condition:
+            token = "approval{}".format(next(self._counter))
+            self._pending.add(token)
+        return token
+
+    def finish(self, token, cancelled=False):
+        """
+        Record the answer to a pending approval. May be called from any
+        thread.
+        """
+        with self._condition:
+            if token not in self._pending:
+                return
+            self._pending.discard(token)
+            self._results[token] = cancelled
+            self._condition.notify_all()
+
+    def wait(self, tokens, timeout=None):
+        """
+        Wait for every token to be answered. Returns the list of tokens that
+        were cancelled. Raises a KeyError for unknown tokens and a
+        RuntimeError if the timeout (in seconds) expires first. The results
+        of the tokens are consumed; a token given more than once is only
+        reported once.
+        """
+        # Drop empty and repeated tokens, keeping the order of the rest.
+        unique_tokens = []
+        seen = set()
+        for token in tokens:
+            if token and token not in seen:
+                seen.add(token)
+                unique_tokens.append(token)
+        tokens = unique_tokens
+        with self._condition:
+            for token in tokens:
+                if token not in self._pending and token not in self._results:
+                    raise KeyError(
+                        "Approval: '{}' does not exist.".format(token))
+
+            predicate = lambda: not any(token in self._pending
+                                        for token in tokens)
+            if not _wait_for(self._condition, predicate, timeout):
+                raise RuntimeError(
+                    "Timed out waiting for {} approval(s).".format(
+                        sum(1 for token in tokens if token in self._pending)))
+
+            return [token for token in tokens if self._results.pop(token)]
+
+    def pending_count(self):
+        with self._condition:
+            return len(self._pending)
+
+
+def _wait_for(condition, predicate, timeout):
+    # threading.Condition.wait_for is not available in Python 2.
+    if timeout is None:
+        while not predicate():
+            condition.wait()
+        return True
+
+    import time
+    end_time = time.time() + timeout
+    while not predicate():
+        remaining = end_time - time.time()
+        if remaining <= 0:
+            return False
+        condition.wait(remaining)
+    return True
+
+
+_approvals = PendingApprovals()
+
+
+def get_approvals():
+    """
+    Return the registry of pending approvals shared by this process.
+    """
+    return _approvals
@@ -0,0 +1,154 @@
+# Copyright 2023 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Sharded FBX exports. The scene is snapshot to a file once, and the exports
+are split into chunks which are processed in parallel by separate mayapy
+processes (bin/iogmaya_export_shard), each opening the snapshot and
+exporting its chunk.
+
+Only the snapshot needs Maya's main thread; the shards are run (and waited
+on) from the calling thread, so Maya stays responsive during the exports.
+"""
+
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+
+
+# Environment variable overriding the mayapy executable used for the shards.
+MAYAPY_ENV = "IOGMAYA_MAYAPY"
+
+SHARD_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(
+                                os.path.abspath(__file__))),
+                            "bin", "iogmaya_export_shard")
+
+
+def get_mayapy():
+    """
+    Return the mayapy executable used to run the shards. Inside an
+    interactive session sys.executable is Maya itself, so mayapy is looked
+    up next to it.
+    """
+    mayapy = os.environ.get(MAYAPY_ENV)
+    if mayapy:
+        return mayapy
+
+    executable = sys.executable
+    name = os.path.basename(executable).lower()
+    if name.startswith("mayapy") or name.startswith("python"):
+        return executable
+    extension = ".exe" if sys.platform == "win32" else ""
+    return os.path.join(os.path.dirname(executable), "mayapy" + extension)
+
+
+def split_chunks(items, count):
+    """
+    Split a list into at most `count` contiguous chunks of (nearly) equal
+    size, preserving the order of the items.
+    """
+    count = max(1, min(count, len(items)))
+    size, remainder = divmod(len(items), count)
+    chunks = []
+    start = 0
+    for i in range(count):
+        end = start + size + (1 if i < remainder else 0)
+        chunks.append(items[start:end])
+        start = end
+    return [chunk for chunk in chunks if chunk]
+
+
+def get_export_filename(directory, node, extension=".fbx"):
+    """
+    Return the filename a node is exported to within `directory`, based on
+    the node's short name (namespace separators are replaced).
+    """
+    short_name = node.rsplit("|", 1)[-1]
+    return os.path.join(directory,
+                        re.sub(r"[^\w.-]", "_", short_name) + extension)
+
+
+def snapshot_scene(directory=None):
+    """
+    Export the entire scene to a Maya binary file in `directory` (a new
+    temporary directory if not given, which the caller must remove) and
+    return its path. Must be called from Maya's main thread.
+    """
+    import maya.cmds
+    if directory is None:
+        directory = tempfile.mkdtemp(prefix="iogmaya_export_")
+    snapshot = os.path.join(directory, "snapshot.mb")
+    maya.cmds.file(snapshot, exportAll=True, type="mayaBinary",
+                   preserveReferences=True, force=True)
+    return snapshot
+
+
+def run_export_shards(snapshot, preset, exports, processes,
+                      executable=None, work_dir=None):
+    """
+    Export each (node, filename) pair in `exports` from the `snapshot`
+    scene using the FBX `preset`, split across at most `processes` mayapy
+    processes. Returns the exported filenames in the same order as
+    `exports`. Raises a RuntimeError if any shard fails. Does not use Maya,
+    so it may be called from any thread.
+    """
+    executable = executable or get_mayapy()
+    work_dir = work_dir or os.path.dirname(snapshot)
+
+    # Write a job file for each chunk and launch the shards.
+    shards = []
+    for index, chunk in enumerate(split_chunks(exports, processes)):
+        job_path = os.path.join(work_dir, "shard{}.json".format(index))
+        with open(job_path, "w") as job_file:
+            json.dump({
+                "scene": snapshot,
+                "preset": preset,
+                "exports": [{"node": node, "filename": filename}
+                            for node, filename in chunk]
+            }, job_file)
+
+        log_path = os.path.join(work_dir, "shard{}.log".format(index))
+        log_file = open(log_path, "w")
+        process = subprocess.Popen([executable, SHARD_SCRIPT, job_path],
+                                   stdout=log_file,
+                                   stderr=subprocess.STDOUT)
+        shards.append((process, log_file, log_path))
+
+    # Wait for every shard so no process is left running, then report any
+    # failures.
+    failures = []
+    for index, (process, log_file, log_path) in enumerate(shards):
+        process.wait()
+        log_file.close()
+        if process.returncode != 0:
+            with open(log_path) as log:
+                failures.append("Shard {} exited with code {}:\n{}".format(
+                                    index, process.returncode, log.read()))
+    if failures:
+        raise RuntimeError("FBX export shards failed.\n" +
+                           "\n".join(failures))
+
+    return [filename for node, filename in exports]
+
+
+def remove_snapshot(snapshot):
+    """
+    Remove a snapshot taken by snapshot_scene() in a temporary directory,
+    along with the shards' job and log files.
+    """
+    shutil.rmtree(os.path.dirname(snapshot), ignore_errors=True)
@@ -0,0 +1,122 @@
+# Copyright 2023 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Per-process state of the FBX plugin, shared by the FBX nodes.
+
+The FBX export and import settings are global to the Maya session, so once
+a preset has been loaded, loading the same (unmodified) preset again is
+redundant. The FbxPresetState tracks the active export and import preset
+by path and modification time, and only resets and reloads the settings
+when a different preset is requested.
+
+The cache assumes the FBX settings are only changed through this module.
+Code that changes them directly (i.e. FBXExportSmoothingGroups) should call
+invalidate() afterwards.
+"""
+
+import os
+
+import maya.cmds
+
+import iogmaya_plugins
+
+
+FBX_PLUGIN = "fbxmaya"
+
+
+class FbxPresetState(object):
+    def __init__(self):
+        # The (path, mtime) of the active preset for each direction.
+        self._active = {"export": None, "import": None}
+
+        self.preset_loads = 0
+        self.preset_hits = 0
+
+    def ensure_plugin(self):
+        """
+        Load the FBX plugin if it is not already loaded.
+        """
+        iogmaya_plugins.ensure_plugin(FBX_PLUGIN)
+
+    def apply_export_preset(self, preset):
+        """
+        Make `preset` the active FBX export preset.
+        """
+        self._apply("export", preset, "FBXResetExport",
+                    "FBXLoadExportPresetFile")
+
+    def apply_import_preset(self, preset):
+        """
+        Make `preset` the active FBX import preset.
+        """
+        self._apply("import", preset, "FBXResetImport",
+                    "FBXLoadImportPresetFile")
+
+    def import_mode(self):
+        """
+        Return the mode of the active FBX import settings: "add", "merge"
+        (add and update) or "exmerge" (update only).
+        """
+        self.ensure_plugin()
+        return maya.cmds.FBXImportMode("-q")
+
+    def invalidate(self):
+        """
+        Forget the active presets.
+        """
+        self._active = {"export": None, "import": None}
+
+    def plugin_unloaded(self, plugin):
+        if plugin == FBX_PLUGIN:
+            self.invalidate()
+
+    def _apply(self, direction, preset, reset_command, load_command):
+        # The FBX commands only exist once the plugin is loaded, so they are
+        # looked up by name afterwards.
+        self.ensure_plugin()
+        reset = getattr(maya.cmds, reset_command)
+        load = getattr(maya.cmds, load_command)
+
+        key = _preset_key(preset)
+        if key is not None and self._active[direction] == key:
+            self.preset_hits += 1
+            return
+
+        # Forget the active preset first so a failed load is retried.
+        self._active[direction] = None
+        reset()
+        load("-f", preset)
+        self._active[direction] = key
+        self.preset_loads += 1
+
+
+def _preset_key(preset):
+    # Presets that can't be found are not cached; the load reports the
+    # error.
+    try:
+        mtime = os.path.getmtime(preset)
+    except OSError:
+        return None
+    return (os.path.normcase(os.path.abspath(preset)), mtime)
+
+
+_fbx_state = FbxPresetState()
+
+
+def get_fbx_state():
+    """
+    Return the FbxPresetState shared by this process.
+    """
+    return _fbx_state
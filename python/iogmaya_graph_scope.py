@@ -0,0 +1,154 @@
+# Copyright 2023 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Graph execution scope for graphs processed in an interactive Maya session.
+
+Without a scope, every command run by a node is recorded as its own entry on
+the undo queue and triggers a viewport redraw. While a scope is active:
+- The whole graph is recorded as a single undo chunk,
+- Viewport refresh is suspended, and
+- Outliner refreshes requested by the nodes are coalesced into a single
+  pass when the scope ends.
+
+    with graph_execution_scope():
+        core.ProcessGraph(graph, execute_in_main_thread=True)
+
+Graphs started with the non-blocking StartGraphProcessing() can use the
+`iograft_begin_graph` and `iograft_end_graph` commands registered by the
+iograftmaya plugin instead. Scopes may be nested; only the outermost scope
+opens and closes the chunk.
+
+The scope is opt-in and is not applied to graphs run through start_iograft:
+the Core has no hook for the start and end of a graph and the plugin does
+not submit graphs itself, so graphs processed through the Core's request
+handler (i.e. from a connected iograft_ui) always run without a scope.
+"""
+
+import contextlib
+import threading
+
+import maya.cmds
+import maya.utils
+
+
+UNDO_CHUNK_NAME = "iograft"
+
+
+class GraphExecutionScope(object):
+    def __init__(self):
+        self._depth = 0
+        self._refresh_suspended = False
+        self._outliner_refresh_pending = False
+
+    @property
+    def active(self):
+        return self._depth > 0
+
+    def begin(self):
+        """
+        Enter the scope. Must be called from the main thread.
+        """
+        self._depth += 1
+        if self._depth > 1:
+            return
+
+        maya.cmds.undoInfo(openChunk=True, chunkName=UNDO_CHUNK_NAME)
+
+        # There is no viewport to refresh in batch mode.
+        if not maya.cmds.about(batch=True):
+            maya.cmds.refresh(suspend=True)
+            self._refresh_suspended = True
+
+    def end(self):
+        """
+        Exit the scope. Must be called from the main thread. The outermost
+        scope closes the undo chunk, resumes viewport refresh and runs any
+        outliner refresh requested while it was active.
+        """
+        if self._depth == 0:
+            return
+        self._depth -= 1
+        if self._depth > 0:
+            return
+
+        try:
+            if self._refresh_suspended:
+                self._refresh_suspended = False
+                maya.cmds.refresh(suspend=False)
+                maya.cmds.refresh()
+        finally:
+            maya.cmds.undoInfo(closeChunk=True)
+
+        if self._outliner_refresh_pending:
+            self._outliner_refresh_pending = False
+            import iogmaya_ui
+            iogmaya_ui.refresh_outliners()
+
+    def end_all(self):
+        """
+        Exit every open scope (i.e. when iograft is stopped while a graph is
+        still running).
+        """
+        if self._depth > 0:
+            self._depth = 1
+            self.end()
+
+    def defer_outliner_refresh(self):
+        """
+        Record an outliner refresh request. Returns True if the refresh is
+        deferred to the end of the active scope, or False if there is no
+        active scope and the caller should refresh now.
+        """
+        if not self.active:
+            return False
+        self._outliner_refresh_pending = True
+        return True
+
+
+_scope = GraphExecutionScope()
+
+
+def get_graph_scope():
+    """
+    Return the GraphExecutionScope shared by this process.
+    """
+    return _scope
+
+
+def _in_main_thread(func):
+    if isinstance(threading.current_thread(), threading._MainThread):
+        return func()
+    return maya.utils.executeInMainThreadWithResult(func)
+
+
+def begin_graph_execution():
+    _in_main_thread(_scope.begin)
+
+
+def end_graph_execution():
+    _in_main_thread(_scope.end)
+
+
+@contextlib.contextmanager
+def graph_execution_scope():
+    """
+    Context manager running the enclosed graph processing in a graph
+    execution scope. May be used from any thread.
+    """
+    begin_graph_execution()
+    try:
+        yield _scope
+    finally:
+        end_graph_execution()
@@ -0,0 +1,264 @@
+# Copyright 2023 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+DAG hierarchy queries (roots, parents) shared by the hierarchy nodes. All
+queries are answered from OpenMaya MDagPaths, so a list of any length is
+resolved without issuing a maya.cmds call per node. The results are returned
+as MDagPaths, so the nodes can output both the full paths and the UUIDs of
+the results without resolving them again.
+"""
+
+import maya.api.OpenMaya as OpenMaya
+
+from iogmaya_resolve import get_resolver
+
+
+class DagHierarchy(object):
+    """
+    Resolves nodes to MDagPaths and answers root and parent queries. Roots
+    are cached by the full path of each ancestor visited, so nodes sharing
+    ancestors are only walked once per DagHierarchy.
+    """
+    def __init__(self):
+        self._resolver = get_resolver()
+        self._roots = {}
+
+    def get_dag_path(self, node):
+        """
+        Return the MDagPath for a node, or None if the node does not exist
+        or is not a DAG node.
+        """
+        try:
+            return self._resolver.get_dag_path(node)
+        except (KeyError, ValueError):
+            return None
+
+    def get_root(self, dag_path):
+        """
+        Return the MDagPath of the root of the hierarchy containing
+        `dag_path`.
+        """
+        visited = []
+        path = OpenMaya.MDagPath(dag_path)
+        root = None
+        while path.length() > 1:
+            full_path = path.fullPathName()
+            root = self._roots.get(full_path)
+            if root is not None:
+                break
+            visited.append(full_path)
+            path.pop()
+
+        if root is None:
+            root = path
+
+        # Every ancestor visited shares the same root.
+        for full_path in visited:
+            self._roots[full_path] = root
+        return root
+
+    def get_parent(self, dag_path):
+        """
+        Return the MDagPath of the parent of `dag_path`, or None if the
+        path is parented to the world.
+        """
+        if dag_path.length() <= 1:
+            return None
+        parent = OpenMaya.MDagPath(dag_path)
+        parent.pop()
+        return parent
+
+
+def _is_transform(dag_path):
+    # Only plain transforms count as root transforms (i.e. not joints).
+    return OpenMaya.MFnDependencyNode(dag_path.node()).typeName == "transform"
+
+
+def get_root_transforms(nodes):
+    """
+    Return the MDagPaths of the unique root transforms of the given nodes,
+    in the order they are first found. Nodes which do not exist or are not
+    DAG nodes are ignored.
+    """
+    hierarchy = DagHierarchy()
+    roots = []
+    seen = set()
+    for node in nodes:
+        dag_path = hierarchy.get_dag_path(node)
+        if dag_path is None:
+            continue
+
+        root = hierarchy.get_root(dag_path)
+        full_path = root.fullPathName()
+        if full_path in seen:
+            continue
+        seen.add(full_path)
+        if _is_transform(root):
+            roots.append(root)
+    return roots
+
+
+def get_root_transform(node):
+    """
+    Return the MDagPath of the root transform of a node. Raises a KeyError
+    if the node does not exist and a RuntimeError if it has no root.
+    """
+    hierarchy = DagHierarchy()
+    dag_path = hierarchy.get_dag_path(node)
+    if dag_path is None:
+        if not _exists(node):
+            raise KeyError("Node: '{}' does not exist.".format(node))
+        raise RuntimeError(
+            "Could not find root transform for node: '{}'".format(node))
+    return hierarchy.get_root(dag_path)
+
+
+def get_parent_transform(node):
+    """
+    Return the MDagPath of a node's parent transform. Raises a KeyError
+    if the node does not exist and a ValueError if it has no parent.
+    """
+    hierarchy = DagHierarchy()
+    dag_path = hierarchy.get_dag_path(node)
+    parent = hierarchy.get_parent(dag_path) if dag_path is not None else None
+    if parent is None:
+        if not _exists(node):
+            raise KeyError("Node: '{}' does not exist.".format(node))
+        raise ValueError(
+            "Node: '{}' does not have a transform parent.".format(node))
+    return parent
+
+
+def _exists(node):
+    return get_resolver().exists(node)
+
+
+def reparent_objects(objects, parents, preserve_position=True):
+    """
+    Parent each object to the parent at the same index (an empty parent
+    parents the object to the world) with a single MDagModifier, recorded
+    as a single undo entry. The selection is not changed.
+
+    With `preserve_position`, the transforms of the objects are updated in
+    the same modifier so that they keep their world space positions (as the
+    "absolute" mode of the parent command does). Returns the MDagPaths of
+    the objects after the operation. Raises a KeyError if an object or
+    parent does not exist and a ValueError if one is not a DAG node.
+    """
+    import iogmaya_undo
+    if len(objects) != len(parents):
+        raise ValueError("Expected one parent per object, got {} parents for"
+                         " {} objects.".format(len(parents), len(objects)))
+
+    resolver = get_resolver()
+    hierarchy = DagHierarchy()
+    # Parent to (MDagPath, inverse world matrix), computed once per parent.
+    parent_paths = {}
+    modifier = OpenMaya.MDagModifier()
+    nodes = []
+    for obj, parent in zip(objects, parents):
+        dag_path = _require_dag_path(resolver, obj)
+        if parent not in parent_paths:
+            parent_path = None
+            parent_inverse = None
+            if parent:
+                parent_path = _require_dag_path(resolver, parent)
+                if preserve_position:
+                    parent_inverse = parent_path.inclusiveMatrixInverse()
+            parent_paths[parent] = (parent_path, parent_inverse)
+        parent_path, parent_inverse = parent_paths[parent]
+        node = dag_path.node()
+        nodes.append(node)
+
+        # Leave objects which are already under the parent alone.
+        current_parent = hierarchy.get_parent(dag_path)
+        if current_parent is None and parent_path is None:
+            continue
+        if (current_parent is not None and parent_path is not None and
+                current_parent == parent_path):
+            continue
+
+        if parent_path is None:
+            modifier.reparentNode(node)
+        else:
+            modifier.reparentNode(node, parent_path.node())
+
+        if preserve_position:
+            _queue_world_position(modifier, dag_path, parent_inverse)
+
+    # Drop the resolver entries of the reparented objects once, rather than
+    # on each of the parent callbacks run by the modifier.
+    with resolver.suspend_invalidation():
+        iogmaya_undo.execute_modifier(modifier)
+    return [OpenMaya.MDagPath.getAPathTo(node) for node in nodes]
+
+
+def _require_dag_path(resolver, node):
+    dag_path = resolver.get_dag_path(node)
+    if dag_path is None:
+        raise ValueError("Node: '{}' is not a DAG node.".format(node))
+    return dag_path
+
+
+def _queue_world_position(modifier, dag_path, parent_inverse):
+    # Shapes have no transform of their own, and transforms which don't
+    # inherit their parent's transform keep their position anyway.
+    if not dag_path.hasFn(OpenMaya.MFn.kTransform):
+        return
+    transform_fn = OpenMaya.MFnTransform(dag_path)
+    if not transform_fn.inheritsTransform:
+        return
+
+    # The world matrices of the new parents are unchanged by the operation:
+    # every object reparented with preserve_position keeps its world matrix.
+    local_matrix = dag_path.inclusiveMatrix()
+    if parent_inverse is not None:
+        local_matrix = local_matrix * parent_inverse
+
+    # Solve for the transform's channels, keeping its pivots, rotate axis
+    # (and joint orient) unchanged.
+    target = OpenMaya.MTransformationMatrix(local_matrix)
+    transformation = transform_fn.transformation()
+    space = OpenMaya.MSpace.kTransform
+
+    rotation = (transformation.rotationOrientation().inverse() *
+                target.rotation(asQuaternion=True))
+    if dag_path.hasFn(OpenMaya.MFn.kJoint):
+        joint_orient = OpenMaya.MEulerRotation(
+                [transform_fn.findPlug("jointOrient" + axis, False).asDouble()
+                 for axis in "XYZ"]).asQuaternion()
+        rotation = rotation * joint_orient.inverse()
+
+    transformation.setScale(target.scale(space), space)
+    transformation.setShear(target.shear(space), space)
+    transformation.setRotation(rotation)
+
+    # The pivots only offset the translation, so correct the translation by
+    # the difference between the result and the target.
+    current = transformation.asMatrix()
+    offset = OpenMaya.MVector(
+                [local_matrix.getElement(3, axis) -
+                 current.getElement(3, axis) for axis in range(3)])
+    transformation.setTranslation(
+                transformation.translation(space) + offset, space)
+
+    euler = transformation.rotation()
+    for attribute, values in (("translate", transformation.translation(space)),
+                              ("rotate", (euler.x, euler.y, euler.z)),
+                              ("scale", transformation.scale(space)),
+                              ("shear", transformation.shear(space))):
+        plug = transform_fn.findPlug(attribute, False)
+        for index in range(3):
+            modifier.newPlugValueDouble(plug.child(index), values[index])
@@ -0,0 +1,136 @@
+# Copyright 2023 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Memory tracking of a subcore across work items.
+
+After each work item the MemoryGuard samples the resident memory of the
+process (along with the size of the scene the work item left behind) and
+optionally appends it to a metrics file for charting. A ".csv" metrics file
+is written as CSV; anything else is written as JSON lines.
+
+When a high-water mark is configured and the sample is above it, the guard
+reports that the subcore should retire: a pooled subcore exits cleanly
+instead of taking another work item, and the pool supervisor starts a fresh
+replacement.
+"""
+
+import csv
+import json
+import os
+import re
+import sys
+import time
+
+import iogmaya_metrics
+
+
+# Environment variables providing the default high-water mark (i.e. "8G")
+# and metrics file.
+MEMORY_HIGH_WATER_ENV = "IOGMAYA_MEMORY_HIGH_WATER"
+MEMORY_METRICS_ENV = "IOGMAYA_MEMORY_METRICS"
+
+METRICS_FIELDS = ("time", "pid", "work_item", "rss_bytes", "peak_rss_bytes",
+                  "high_water_bytes", "scene_nodes", "scene", "retire")
+
+_SIZE_UNITS = {"": 1, "k": 1024, "m": 1024 ** 2, "g": 1024 ** 3,
+               "t": 1024 ** 4}
+
+
+def parse_memory_size(size):
+    """
+    Parse a memory size in bytes, optionally suffixed with K, M, G or T
+    (i.e. "512M", "8G"). Returns None for an empty size.
+    """
+    if size is None or str(size).strip() == "":
+        return None
+
+    match = re.match(r"^\s*([0-9.]+)\s*([kmgt]?)i?b?\s*$", str(size),
+                     re.IGNORECASE)
+    if not match:
+        raise ValueError("Invalid memory size: '{}'.".format(size))
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).lower()])
+
+
+class MemoryGuard(object):
+    """
+    Samples the memory of the process after each work item.
+
+    `scene_stats` is an optional function returning a dictionary with the
+    "scene_nodes" and "scene" of the current scene, recorded with each
+    sample.
+    """
+    def __init__(self, high_water_mark=None, metrics_path=None,
+                 scene_stats=None):
+        self.high_water_mark = high_water_mark
+        self.metrics_path = metrics_path
+        self.scene_stats = scene_stats
+        self.work_items = 0
+
+    def check(self):
+        """
+        Sample the memory after a work item, record it and return True if
+        the process is above the high-water mark.
+        """
+        self.work_items += 1
+        sample = {
+            "time": time.time(),
+            "pid": os.getpid(),
+            "work_item": self.work_items,
+            "rss_bytes": iogmaya_metrics.get_resident_memory(),
+            "peak_rss_bytes": iogmaya_metrics.get_peak_memory(),
+            "high_water_bytes": self.high_water_mark,
+            "scene_nodes": None,
+            "scene": None
+        }
+        if self.scene_stats is not None:
+            try:
+                sample.update(self.scene_stats())
+            except Exception as e:
+                sys.stderr.write("Failed to query the scene size:"
+                                 " {}\n".format(e))
+
+        retire = (self.high_water_mark is not None and
+                  sample["rss_bytes"] is not None and
+                  sample["rss_bytes"] > self.high_water_mark)
+        sample["retire"] = retire
+
+        print("iogmaya_memory_guard: work item {} rss {:.1f}MB"
+              " (peak {:.1f}MB){}".format(
+                    sample["work_item"], _megabytes(sample["rss_bytes"]),
+                    _megabytes(sample["peak_rss_bytes"]),
+                    ", above the high-water mark of {:.1f}MB".format(
+                        _megabytes(self.high_water_mark)) if retire else ""))
+        sys.stdout.flush()
+
+        if self.metrics_path:
+            self._write(sample)
+        return retire
+
+    def _write(self, sample):
+        if self.metrics_path.lower().endswith(".csv"):
+            write_header = not os.path.exists(self.metrics_path)
+            with open(self.metrics_path, "a") as metrics_file:
+                writer = csv.DictWriter(metrics_file, METRICS_FIELDS,
+                                        lineterminator="\n")
+                if write_header:
+                    writer.writeheader()
+                writer.writerow(sample)
+        else:
+            with open(self.metrics_path, "a") as metrics_file:
+                metrics_file.write(json.dumps(sample, sort_keys=True) + "\n")
+
+
+def _megabytes(size):
+    return (size or 0) / (1024.0 * 1024.0)
@@ -0,0 +1,350 @@
+# Copyright 2023 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Live metrics of the nodes processed in this process.
+
+Once enabled (the iograftmaya plugin enables them when iograft is started),
+every node decorated with @maya_main_thread records the time it waited for
+the main thread and the time spent in Process(). The metrics hold rolling
+latency histograms per node type, the number of nodes currently waiting for
+the main thread, the number of nodes processed and the peak memory of the
+process. They can be read with the `iograft_stats` command, or served as
+JSON over HTTP on localhost by a MetricsServer.
+"""
+
+import bisect
+import collections
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+
+
+# Environment variable holding the port of the metrics HTTP endpoint ("0"
+# picks a free port).
+METRICS_PORT_ENV = "IOGMAYA_METRICS_PORT"
+
+# Upper bounds (in milliseconds) of the latency histogram buckets. The last
+# bucket holds everything slower.
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000,
+                      10000)
+
+# Length of the rolling window of the histograms, in seconds.
+ROLLING_WINDOW = 300.0
+
+# Length of the time slices the histograms count durations in, in seconds.
+# Durations expire from the rolling window a slice at a time.
+HISTOGRAM_SLICE = 10.0
+
+
+class _HistogramSlice(object):
+    def __init__(self, index, num_buckets):
+        self.index = index
+        self.counts = [0] * num_buckets
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+
+class RollingHistogram(object):
+    """
+    Histogram of the durations recorded within the last `window` seconds.
+
+    Only the bucket counts (and the total and maximum duration) of each
+    `slice_length` seconds time slice are kept, so recording a duration is
+    constant time and the memory used does not grow with the number of
+    durations. The window moves a slice at a time, and the percentiles are
+    estimated from the bucket counts.
+    """
+    def __init__(self, window=ROLLING_WINDOW, buckets=LATENCY_BUCKETS_MS,
+                 slice_length=HISTOGRAM_SLICE):
+        self.window = window
+        self.buckets = buckets
+        self.slice_length = slice_length
+        self._slices = collections.deque()
+
+    def record(self, duration, now=None):
+        now = time.time() if now is None else now
+        index = int(now // self.slice_length)
+        if not self._slices or self._slices[-1].index < index:
+            self._slices.append(_HistogramSlice(index,
+                                                len(self.buckets) + 1))
+            self._expire(now)
+
+        duration_ms = duration * 1e3
+        current = self._slices[-1]
+        current.counts[bisect.bisect_left(self.buckets, duration_ms)] += 1
+        current.total_ms += duration_ms
+        current.max_ms = max(current.max_ms, duration_ms)
+
+    def _expire(self, now):
+        # Drop the slices which ended before the start of the window.
+        cutoff = int((now - self.window) // self.slice_length)
+        while self._slices and self._slices[0].index < cutoff:
+            self._slices.popleft()
+
+    def snapshot(self, now=None):
+        """
+        Return the bucket counts and summary statistics of the durations in
+        the window. Durations are reported in milliseconds; the percentiles
+        are the upper bounds of the buckets they fall in (or the maximum,
+        if lower).
+        """
+        self._expire(time.time() if now is None else now)
+        counts = [0] * (len(self.buckets) + 1)
+        total_ms = 0.0
+        max_ms = 0.0
+        for histogram_slice in self._slices:
+            for bucket, count in enumerate(histogram_slice.counts):
+                counts[bucket] += count
+            total_ms += histogram_slice.total_ms
+            max_ms = max(max_ms, histogram_slice.max_ms)
+        count = sum(counts)
+
+        labels = ["<={}".format(bound) for bound in self.buckets]
+        labels.append(">{}".format(self.buckets[-1]))
+        snapshot = {
+            "count": count,
+            "buckets": collections.OrderedDict(zip(labels, counts))
+        }
+        if count:
+            snapshot.update({
+                "mean_ms": total_ms / count,
+                "p50_ms": self._percentile(counts, 0.5, max_ms),
+                "p95_ms": self._percentile(counts, 0.95, max_ms),
+                "max_ms": max_ms
+            })
+        return snapshot
+
+    def _percentile(self, counts, fraction, max_ms):
+        rank = int(round(fraction * (sum(counts) - 1)))
+        seen = 0
+        for bucket, count in enumerate(counts):
+            seen += count
+            if seen > rank:
+                break
+        if bucket < len(self.buckets):
+            return min(float(self.buckets[bucket]), max_ms)
+        return max_ms
+
+
+class NodeMetrics(object):
+    def __init__(self, window=ROLLING_WINDOW):
+        self.window = window
+        self.start_time = time.time()
+        self._lock = threading.Lock()
+        self._process = {}
+        self._queue_wait = {}
+        self._processed = collections.Counter()
+        self._failed = collections.Counter()
+        self._queue_depth = 0
+        self._peak_queue_depth = 0
+
+    def wrap_node_process(self, func):
+        """
+        Wrap a node's Process function, counting the node as waiting for
+        the main thread from now until Process starts.
+        """
+        request_time = time.time()
+        with self._lock:
+            self._queue_depth += 1
+            self._peak_queue_depth = max(self._peak_queue_depth,
+                                         self._queue_depth)
+
+        @functools.wraps(func)
+        def measured_process(node, *args):
+            start_time = time.time()
+            with self._lock:
+                self._queue_depth -= 1
+            succeeded = False
+            try:
+                result = func(node, *args)
+                succeeded = True
+                return result
+            finally:
+                self.record(type(node).__name__, start_time - request_time,
+                            time.time() - start_time, succeeded)
+
+        return measured_process
+
+    def record(self, node_type, queue_wait, duration, succeeded=True):
+        now = time.time()
+        with self._lock:
+            if node_type not in self._process:
+                self._process[node_type] = RollingHistogram(self.window)
+                self._queue_wait[node_type] = RollingHistogram(self.window)
+            self._process[node_type].record(duration, now)
+            self._queue_wait[node_type].record(queue_wait, now)
+            self._processed[node_type] += 1
+            if not succeeded:
+                self._failed[node_type] += 1
+
+    def snapshot(self):
+        """
+        Return the current metrics as a JSON serializable dictionary.
+        """
+        now = time.time()
+        with self._lock:
+            node_types = {}
+            for node_type in sorted(self._process):
+                node_types[node_type] = {
+                    "processed": self._processed[node_type],
+                    "failed": self._failed[node_type],
+                    "process": self._process[node_type].snapshot(now),
+                    "queue_wait": self._queue_wait[node_type].snapshot(now)
+                }
+            return {
+                "uptime_seconds": now - self.start_time,
+                "window_seconds": self.window,
+                "nodes_processed": sum(self._processed.values()),
+                "nodes_failed": sum(self._failed.values()),
+                "main_thread_queue_depth": self._queue_depth,
+                "peak_main_thread_queue_depth": self._peak_queue_depth,
+                "peak_memory_bytes": get_peak_memory(),
+                "node_types": node_types
+            }
+
+
+def get_peak_memory():
+    """
+    Return the peak resident memory of this process in bytes, or None if it
+    can't be determined.
+    """
+    if sys.platform == "win32":
+        return _get_windows_memory().PeakWorkingSetSize
+
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere.
+    if sys.platform == "darwin":
+        return peak
+    return peak * 1024
+
+
+def get_resident_memory():
+    """
+    Return the current resident memory of this process in bytes, or None if
+    it can't be determined.
+    """
+    if sys.platform == "win32":
+        return _get_windows_memory().WorkingSetSize
+
+    if sys.platform.startswith("linux"):
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+
+    import subprocess
+    try:
+        output = subprocess.check_output(["ps", "-o", "rss=", "-p",
+                                          str(os.getpid())])
+        return int(output.strip()) * 1024
+    except (OSError, ValueError, subprocess.CalledProcessError):
+        return None
+
+
+def _get_windows_memory():
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD),
+                    ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t),
+                    ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t),
+                    ("PeakPagefileUsage", ctypes.c_size_t)]
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    ctypes.windll.psapi.GetProcessMemoryInfo(
+            ctypes.windll.kernel32.GetCurrentProcess(),
+            ctypes.byref(counters), counters.cb)
+    return counters
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") not in ("", "/metrics"):
+            self.send_error(404)
+            return
+
+        body = json.dumps(self.server.metrics.snapshot(), indent=2)
+        body = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Don't write a line to the Script Editor for every request.
+        pass
+
+
+class MetricsServer(object):
+    """
+    Serves the metrics snapshot as JSON at http://127.0.0.1:<port>/metrics
+    from a background thread. Only connections from localhost are accepted.
+    """
+    def __init__(self, metrics, port=0):
+        self._server = HTTPServer(("127.0.0.1", port), _MetricsRequestHandler)
+        self._server.metrics = metrics
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name="iogmaya_metrics")
+        self._thread.daemon = True
+        self._thread.start()
+
+    @property
+    def address(self):
+        host, port = self._server.server_address[:2]
+        return "http://{}:{}/metrics".format(host, port)
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+
+# The metrics of this process, or None if they are not enabled.
+_metrics = None
+
+
+def enable_metrics():
+    """
+    Start collecting metrics (if not already enabled). Returns the
+    NodeMetrics.
+    """
+    global _metrics
+    if _metrics is None:
+        _metrics = NodeMetrics()
+    return _metrics
+
+
+def get_metrics():
+    """
+    Return the active NodeMetrics, or None if metrics are not enabled.
+    """
+    return _metrics
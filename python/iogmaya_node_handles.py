@@ -0,0 +1,136 @@
+# Copyright 2023 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Compact lists of Maya node names, passed between nodes through mutable
+ports instead of StringLists of full DAG paths.
+"""
+
+import array
+
+
+class NodeHandleList(object):
+    """
+    An ordered list of node names stored as a prefix trie. Each name is
+    split into its DAG path components; components are interned and every
+    unique path prefix is stored once, so large lists of nodes in the same
+    hierarchies share most of their storage. Names are only rebuilt as
+    strings when the list is iterated or indexed.
+    """
+    def __init__(self, names=()):
+        # Interned path components.
+        self._components = []
+
+        # The trie: for each trie node, the index of its parent (-1 for the
+        # root) and of its component.
+        self._parents = array.array("i")
+        self._component_indices = array.array("i")
+
+        # The trie node of each entry in the list.
+        self._entries = array.array("i")
+
+        # Lookups used while adding names. They are larger than the list
+        # itself, so they are dropped once the names are added and rebuilt
+        # if more names are added later.
+        self._component_ids = None
+        self._children = None
+
+        self.extend(names)
+
+    def append(self, name):
+        # Adding names rebuilds the lookups, so add many names at once with
+        # extend() rather than appending them one at a time.
+        self.extend([name])
+
+    def extend(self, names):
+        self._buildLookups()
+        for name in names:
+            self._append(name)
+        self._dropLookups()
+
+    def _append(self, name):
+        trie_node = -1
+        for component in name.split("|"):
+            component_id = self._component_ids.get(component)
+            if component_id is None:
+                component_id = len(self._components)
+                self._components.append(component)
+                self._component_ids[component] = component_id
+
+            key = (trie_node, component_id)
+            child = self._children.get(key)
+            if child is None:
+                child = len(self._parents)
+                self._parents.append(trie_node)
+                self._component_indices.append(component_id)
+                self._children[key] = child
+            trie_node = child
+        self._entries.append(trie_node)
+
+    def _buildLookups(self):
+        self._component_ids = dict((component, index) for index, component
+                                   in enumerate(self._components))
+        self._children = dict(
+            ((parent, component_id), trie_node) for trie_node, (
+                parent, component_id) in enumerate(
+                    zip(self._parents, self._component_indices)))
+
+    def _dropLookups(self):
+        self._component_ids = None
+        self._children = None
+
+    def names(self):
+        """
+        Return the names as a list of strings.
+        """
+        return list(self)
+
+    def _name(self, trie_node):
+        components = []
+        while trie_node != -1:
+            components.append(
+                self._components[self._component_indices[trie_node]])
+            trie_node = self._parents[trie_node]
+        return "|".join(reversed(components))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        for trie_node in self._entries:
+            yield self._name(trie_node)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._name(trie_node)
+                    for trie_node in self._entries[index]]
+        return self._name(self._entries[index])
+
+    def __repr__(self):
+        return "NodeHandleList({} nodes)".format(len(self))
+
+
+def get_node_names(names, handles=None):
+    """
+    Return the node names given to a node either as a list of names or as
+    a NodeHandleList (or both, in which case the handles follow the
+    names). The handles are converted to strings lazily.
+    """
+    if not handles:
+        return names
+    if not names:
+        return handles
+
+    import itertools
+    return itertools.chain(names, handles)
@@ -0,0 +1,136 @@
+# Copyright 2023 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Node list files: plain text files holding one node name per line, used to
+pass very large lists of nodes between nodes without a single, very large
+iograft output. Readers can process the list in batches.
+"""
+
+import collections
+import io
+
+
+DEFAULT_BATCH_SIZE = 10000
+
+
+class NodeListWriter(object):
+    """
+    Writes node names to a node list file in batches.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._file = io.open(path, "w", encoding="utf-8")
+
+    def write_batch(self, names):
+        if not names:
+            return
+        self._file.write(u"\n".join(names) + u"\n")
+        self.count += len(names)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def read_node_list(path, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Yield the names in a node list file in lists of at most `batch_size`
+    names.
+    """
+    batch = []
+    with io.open(path, encoding="utf-8") as node_list:
+        for line in node_list:
+            name = line.rstrip("\n")
+            if not name:
+                continue
+            batch.append(name)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+class NewNodeRecorder(object):
+    """
+    Records the nodes added to the scene while it is active (i.e. during a
+    file import). Node names are only final once the operation is complete,
+    so an MObjectHandle is kept per node and the names are resolved
+    afterwards by write_to().
+
+    Recording runs a Python callback per new node and holds a handle per
+    node, so it is no cheaper than the "returnNewNodes" list of the file
+    command (with the fake maya package, an import of 20k nodes peaks at
+    about the same memory and takes 15-30% longer). It exists so the names
+    can be written to a node list file instead of an iograft output.
+
+        with NewNodeRecorder() as recorder:
+            maya.cmds.file(filename, i=True)
+        recorder.write_to(writer)
+    """
+    def __init__(self):
+        self._handles = collections.deque()
+        self._callback_id = None
+
+    def __enter__(self):
+        import maya.api.OpenMaya as OpenMaya
+        self._callback_id = OpenMaya.MDGMessage.addNodeAddedCallback(
+                                                        self._nodeAdded)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        import maya.api.OpenMaya as OpenMaya
+        OpenMaya.MMessage.removeCallback(self._callback_id)
+        self._callback_id = None
+
+    def _nodeAdded(self, node, client_data):
+        import maya.api.OpenMaya as OpenMaya
+        self._handles.append(OpenMaya.MObjectHandle(node))
+
+    def write_to(self, writer, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Write the long names of the recorded nodes which still exist to a
+        NodeListWriter in batches (of at least one name), releasing the
+        handles as they are written. Returns the number of nodes written.
+        """
+        import maya.api.OpenMaya as OpenMaya
+        batch_size = max(1, batch_size)
+        written = 0
+        handles = self._handles
+        self._handles = collections.deque()
+        while handles:
+            names = []
+            while handles and len(names) < batch_size:
+                handle = handles.popleft()
+
+                # Nodes created and deleted during the operation (i.e.
+                # temporary import nodes) are skipped.
+                if not handle.isValid():
+                    continue
+                node = handle.object()
+                if node.hasFn(OpenMaya.MFn.kDagNode):
+                    names.append(
+                        OpenMaya.MDagPath.getAPathTo(node).fullPathName())
+                else:
+                    names.append(OpenMaya.MFnDependencyNode(node).name())
+            writer.write_batch(names)
+            written += len(names)
+        return written
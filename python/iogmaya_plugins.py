@@ -0,0 +1,101 @@
+# Copyright 2023 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Lazy loading of the Maya plugins required by the nodes.
+
+Nodes call ensure_plugin() before using a plugin rather than relying on it
+being loaded at startup, so a subcore only pays for the plugins its graph
+actually uses. NODE_PLUGINS is the manifest of the plugins required by each
+node type, used to work out the plugins a graph needs up front (i.e. to
+preload them in a warm pooled subcore).
+"""
+
+import json
+import time
+
+import maya.cmds
+
+
+# The plugins required by each node type.
+NODE_PLUGINS = {
+    "export_fbx_with_preset": ["fbxmaya"],
+    "export_fbx_sharded": ["fbxmaya"],
+    "import_fbx_with_preset": ["fbxmaya"],
+    "create_usd_proxy": ["mayaUsdPlugin"],
+    "create_usd_proxies": ["mayaUsdPlugin"],
+    "get_usd_proxy_stage": ["mayaUsdPlugin"],
+}
+
+# Plugins this process has loaded (or found loaded), and the time spent
+# loading each.
+_loaded_plugins = set()
+_load_times = {}
+
+
+def ensure_plugin(plugin):
+    """
+    Load a plugin if it is not already loaded. Only the first call for each
+    plugin queries Maya.
+    """
+    if plugin in _loaded_plugins:
+        return
+
+    if not maya.cmds.pluginInfo(plugin, query=True, loaded=True):
+        start = time.time()
+        maya.cmds.loadPlugin(plugin)
+        _load_times[plugin] = time.time() - start
+    _loaded_plugins.add(plugin)
+
+
+def plugin_unloaded(plugin):
+    """
+    Record that a plugin was unloaded so that it is loaded again the next
+    time it is required.
+    """
+    _loaded_plugins.discard(plugin)
+
+
+def get_load_times():
+    """
+    Return the time spent loading each plugin loaded by ensure_plugin().
+    """
+    return dict(_load_times)
+
+
+def get_required_plugins(node_types):
+    """
+    Return the sorted list of plugins required by the given node types.
+    """
+    plugins = set()
+    for node_type in node_types:
+        plugins.update(NODE_PLUGINS.get(node_type, []))
+    return sorted(plugins)
+
+
+def read_manifest(path):
+    """
+    Read a plugin manifest file. The manifest is a JSON document containing
+    either a list of the graph's node types, or an object with a
+    "node_types" and/or a "plugins" list. Returns the list of plugins.
+    """
+    with open(path) as manifest_file:
+        manifest = json.load(manifest_file)
+
+    if isinstance(manifest, list):
+        return get_required_plugins(manifest)
+
+    plugins = set(manifest.get("plugins", []))
+    plugins.update(get_required_plugins(manifest.get("node_types", [])))
+    return sorted(plugins)
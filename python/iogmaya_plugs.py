@@ -0,0 +1,224 @@
+# Copyright 2023 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Helpers for working with many attributes at once through OpenMaya plugs
+rather than one maya.cmds call per attribute.
+"""
+
+import re
+
+import maya.api.OpenMaya as OpenMaya
+import maya.cmds
+
+from iogmaya_resolve import get_resolver
+
+
+# An element of a plug path: an attribute name with an optional index.
+_PLUG_PATH_ELEMENT = re.compile(r"^(\w+)(?:\[(\d+)\])?$")
+
+
+def get_dependency_nodes(nodes):
+    """
+    Resolve a list of node names to MObjects. Each unique name is only
+    resolved once. Raises a KeyError if a node does not exist and a
+    ValueError if a name matches more than one node.
+    """
+    resolver = get_resolver()
+    resolved = {}
+    objects = []
+    for node in nodes:
+        node_object = resolved.get(node)
+        if node_object is None:
+            node_object = resolver.get_object(node)
+            resolved[node] = node_object
+        objects.append(node_object)
+    return objects
+
+
+def find_plug(node_object, node, attribute):
+    """
+    Find the plug for an attribute on a node given by its MObject (`node` is
+    only used in error messages). `attribute` may be an attribute name or a
+    plug path relative to the node (i.e. "pnts[0].pntx"). Raises a KeyError
+    if the attribute does not exist.
+    """
+    node_fn = OpenMaya.MFnDependencyNode(node_object)
+    try:
+        if "." not in attribute and "[" not in attribute:
+            return node_fn.findPlug(attribute, False)
+
+        plug = None
+        for element in attribute.split("."):
+            match = _PLUG_PATH_ELEMENT.match(element)
+            if match is None or not node_fn.hasAttribute(match.group(1)):
+                raise RuntimeError(element)
+            name, index = match.groups()
+            if plug is None:
+                plug = node_fn.findPlug(name, False)
+            else:
+                plug = plug.child(node_fn.attribute(name))
+            if index is not None:
+                plug = plug.elementByLogicalIndex(int(index))
+        return plug
+    except RuntimeError:
+        raise KeyError("Attribute: '{}' does not exist on node:"
+                       " '{}'".format(attribute, node))
+
+
+def get_plugs(nodes, attributes):
+    """
+    Resolve every attribute on every node to its plug. Returns a dictionary
+    of attribute to a list of plugs in the same order as `nodes`.
+    """
+    node_objects = get_dependency_nodes(nodes)
+    plugs = {}
+    for attribute in attributes:
+        plugs[attribute] = [find_plug(node_object, node, attribute)
+                            for node, node_object in zip(nodes, node_objects)]
+    return plugs
+
+
+_LINEAR_ATTRIBUTE_TYPES = (OpenMaya.MFn.kDoubleLinearAttribute,
+                           OpenMaya.MFn.kFloatLinearAttribute)
+_ANGLE_ATTRIBUTE_TYPES = (OpenMaya.MFn.kDoubleAngleAttribute,
+                          OpenMaya.MFn.kFloatAngleAttribute)
+_MATRIX_ATTRIBUTE_TYPES = (OpenMaya.MFn.kMatrixAttribute,
+                           OpenMaya.MFn.kFloatMatrixAttribute)
+_FLOAT_NUMERIC_TYPES = (OpenMaya.MFnNumericData.kFloat,
+                        OpenMaya.MFnNumericData.kDouble)
+
+
+def get_plug_value(plug):
+    """
+    Return the value of a plug. Values match what maya.cmds.getAttr returns
+    (including UI units for distances, angles and times), except that
+    compound attributes return a tuple of their child values and array
+    attributes return a list of their element values.
+    """
+    if plug.isArray:
+        return [get_plug_value(plug.elementByPhysicalIndex(i))
+                for i in range(plug.numElements())]
+    if plug.isCompound:
+        return tuple(get_plug_value(plug.child(i))
+                     for i in range(plug.numChildren()))
+
+    attribute = plug.attribute()
+    api_type = attribute.apiType()
+    if api_type == OpenMaya.MFn.kNumericAttribute:
+        numeric_type = OpenMaya.MFnNumericAttribute(attribute).numericType()
+        if numeric_type == OpenMaya.MFnNumericData.kBoolean:
+            return plug.asBool()
+        if numeric_type in _FLOAT_NUMERIC_TYPES:
+            return plug.asDouble()
+        if numeric_type != OpenMaya.MFnNumericData.kAddr:
+            return plug.asInt()
+    if api_type in _LINEAR_ATTRIBUTE_TYPES:
+        return plug.asMDistance().asUnits(OpenMaya.MDistance.uiUnit())
+    if api_type in _ANGLE_ATTRIBUTE_TYPES:
+        return plug.asMAngle().asUnits(OpenMaya.MAngle.uiUnit())
+    if api_type == OpenMaya.MFn.kTimeAttribute:
+        return plug.asMTime().asUnits(OpenMaya.MTime.uiUnit())
+    if api_type == OpenMaya.MFn.kEnumAttribute:
+        return plug.asShort()
+    if api_type == OpenMaya.MFn.kMessageAttribute:
+        return None
+    if api_type == OpenMaya.MFn.kTypedAttribute:
+        data_type = OpenMaya.MFnTypedAttribute(attribute).attrType()
+        if data_type == OpenMaya.MFnData.kString:
+            return plug.asString()
+        if data_type == OpenMaya.MFnData.kMatrix:
+            return _get_matrix_value(plug)
+    if api_type in _MATRIX_ATTRIBUTE_TYPES:
+        return _get_matrix_value(plug)
+
+    # Fall back to getAttr for any other attribute types (i.e. geometry,
+    # array data or addresses).
+    return maya.cmds.getAttr(plug.name())
+
+
+def set_plug_value(modifier, plug, value):
+    """
+    Add an operation to set the value of a plug to the given modifier.
+    Values are interpreted the same way get_plug_value returns them:
+    distances, angles and times are in UI units and compound attributes
+    take a sequence of child values. Raises a RuntimeError if the plug is
+    locked or connected, and a TypeError if the attribute type cannot be
+    set through a modifier.
+    """
+    if plug.isLocked or plug.isDestination:
+        raise RuntimeError("The attribute '{}' is locked or connected and"
+                           " cannot be modified.".format(plug.name()))
+
+    if plug.isCompound:
+        values = list(value)
+        if len(values) != plug.numChildren():
+            raise ValueError("Attribute: '{}' expects {} values, got"
+                             " {}.".format(plug.name(), plug.numChildren(),
+                                           len(values)))
+        for i, child_value in enumerate(values):
+            set_plug_value(modifier, plug.child(i), child_value)
+        return
+
+    attribute = plug.attribute()
+    api_type = attribute.apiType()
+    if api_type == OpenMaya.MFn.kNumericAttribute:
+        numeric_type = OpenMaya.MFnNumericAttribute(attribute).numericType()
+        if numeric_type == OpenMaya.MFnNumericData.kBoolean:
+            modifier.newPlugValueBool(plug, bool(value))
+        elif numeric_type in _FLOAT_NUMERIC_TYPES:
+            modifier.newPlugValueDouble(plug, float(value))
+        elif numeric_type == OpenMaya.MFnNumericData.kAddr:
+            raise _unsupported_type_error(plug)
+        else:
+            modifier.newPlugValueInt(plug, int(value))
+    elif api_type in _LINEAR_ATTRIBUTE_TYPES:
+        modifier.newPlugValueMDistance(
+                plug, OpenMaya.MDistance(float(value),
+                                         OpenMaya.MDistance.uiUnit()))
+    elif api_type in _ANGLE_ATTRIBUTE_TYPES:
+        modifier.newPlugValueMAngle(
+                plug, OpenMaya.MAngle(float(value), OpenMaya.MAngle.uiUnit()))
+    elif api_type == OpenMaya.MFn.kTimeAttribute:
+        modifier.newPlugValueMTime(
+                plug, OpenMaya.MTime(float(value), OpenMaya.MTime.uiUnit()))
+    elif api_type == OpenMaya.MFn.kEnumAttribute:
+        modifier.newPlugValueShort(plug, int(value))
+    elif (api_type == OpenMaya.MFn.kTypedAttribute and
+            OpenMaya.MFnTypedAttribute(attribute).attrType() ==
+            OpenMaya.MFnData.kString):
+        modifier.newPlugValueString(plug, str(value))
+    elif (api_type in _MATRIX_ATTRIBUTE_TYPES or
+            (api_type == OpenMaya.MFn.kTypedAttribute and
+             OpenMaya.MFnTypedAttribute(attribute).attrType() ==
+             OpenMaya.MFnData.kMatrix)):
+        matrix_data = OpenMaya.MFnMatrixData().create(
+                                        OpenMaya.MMatrix(list(value)))
+        modifier.newPlugValue(plug, matrix_data)
+    else:
+        raise _unsupported_type_error(plug)
+
+
+def _unsupported_type_error(plug):
+    return TypeError("Setting attribute: '{}' is not supported in"
+                     " bulk.".format(plug.name()))
+
+
+def _get_matrix_value(plug):
+    try:
+        matrix = OpenMaya.MFnMatrixData(plug.asMObject()).matrix()
+    except RuntimeError:
+        # The plug has no data yet; let getAttr report the default.
+        return maya.cmds.getAttr(plug.name())
+    return list(matrix)
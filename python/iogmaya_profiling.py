@@ -0,0 +1,256 @@
+# Copyright 2022 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Opt-in profiling of Maya node execution.
+
+Set the IOGMAYA_PROFILE environment variable to the path of a trace file to
+enable profiling. For every node decorated with @maya_main_thread the time
+spent waiting for the main thread and the time spent in Process() are
+recorded, along with the time spent in every maya.cmds call. When the
+process exits the events are written to the trace file in the Chrome
+trace-event format (viewable in chrome://tracing or Perfetto) and a summary
+table is written next to it with a ".summary.txt" extension.
+"""
+
+import atexit
+import contextlib
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+import maya.cmds
+
+
+PROFILE_ENV = "IOGMAYA_PROFILE"
+
+CATEGORY_QUEUE = "queue_wait"
+CATEGORY_PROCESS = "process"
+CATEGORY_CMDS = "cmds"
+
+
+class Profiler(object):
+    """
+    Collects timed events and writes them as a Chrome trace.
+    """
+    def __init__(self, trace_path):
+        self.trace_path = trace_path
+        self._lock = threading.Lock()
+        self._events = []
+        self._totals = {}
+        self._written = False
+        self._current = threading.local()
+        self._pid = os.getpid()
+        self._instrumented = False
+
+    def record(self, category, name, start, end, args=None):
+        """
+        Record an event that ran from `start` to `end` (in seconds, as
+        returned by time.time()) on the current thread.
+        """
+        duration = end - start
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": start * 1e6,
+            "dur": duration * 1e6,
+            "pid": self._pid,
+            "tid": threading.current_thread().ident
+        }
+        if args:
+            event["args"] = args
+
+        with self._lock:
+            self._events.append(event)
+            totals = self._totals.setdefault((category, name), [0, 0.0, 0.0])
+            totals[0] += 1
+            totals[1] += duration
+            totals[2] = max(totals[2], duration)
+
+    def wrap_node_process(self, func):
+        """
+        Wrap a node's Process function, recording the time between now (when
+        the node asked for the main thread) and the start of Process as the
+        queue wait, followed by the time spent in Process itself.
+        """
+        request_time = time.time()
+        if not self._instrumented:
+            self.instrument_cmds()
+
+        @functools.wraps(func)
+        def profiled_process(node, *args):
+            name = type(node).__name__
+            event_args = {"instance": "{}@{:x}".format(name, id(node))}
+            start_time = time.time()
+            self.record(CATEGORY_QUEUE, name, request_time, start_time,
+                        event_args)
+
+            self._current.node = event_args["instance"]
+            try:
+                return func(node, *args)
+            finally:
+                self._current.node = None
+                self.record(CATEGORY_PROCESS, name, start_time, time.time(),
+                            event_args)
+
+        return profiled_process
+
+    def instrument_cmds(self):
+        """
+        Wrap every function in maya.cmds so that each call is recorded.
+        Commands registered by plugins are wrapped once the plugin has been
+        loaded. maya.cmds is only populated once Maya is initialized, so
+        this is called after initialization (or when the first node is
+        processed), not when the profiler is created.
+        """
+        self._instrumented = True
+        for name in dir(maya.cmds):
+            if name.startswith("_"):
+                continue
+            command = getattr(maya.cmds, name)
+            if not callable(command) or hasattr(command, "_iogmaya_profiled"):
+                continue
+            setattr(maya.cmds, name, self._wrapCommand(name, command))
+
+    def _wrapCommand(self, name, command):
+        @functools.wraps(command)
+        def profiled_command(*args, **kwargs):
+            start_time = time.time()
+            try:
+                return command(*args, **kwargs)
+            finally:
+                node = getattr(self._current, "node", None)
+                self.record(CATEGORY_CMDS, name, start_time, time.time(),
+                            {"node": node} if node else None)
+                if name == "loadPlugin":
+                    self.instrument_cmds()
+
+        profiled_command._iogmaya_profiled = True
+        return profiled_command
+
+    def summary(self):
+        """
+        Return a table of the count, total, mean and max time for each event
+        name, sorted by total time.
+        """
+        with self._lock:
+            totals = sorted(self._totals.items(),
+                            key=lambda item: item[1][1], reverse=True)
+
+        lines = ["{:<12} {:<40} {:>8} {:>12} {:>10} {:>10}".format(
+                    "category", "name", "count", "total (ms)", "mean (ms)",
+                    "max (ms)")]
+        for (category, name), (count, total, maximum) in totals:
+            lines.append("{:<12} {:<40} {:>8} {:>12.3f} {:>10.3f} "
+                         "{:>10.3f}".format(category, name, count,
+                                            total * 1e3,
+                                            total * 1e3 / count,
+                                            maximum * 1e3))
+        return "\n".join(lines)
+
+    def write(self):
+        """
+        Write the trace file and summary table. Only the first call writes
+        the files.
+        """
+        with self._lock:
+            if self._written:
+                return
+            self._written = True
+            events = list(self._events)
+
+        with open(self.trace_path, "w") as trace_file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"},
+                      trace_file)
+
+        summary = self.summary()
+        summary_path = os.path.splitext(self.trace_path)[0] + ".summary.txt"
+        with open(summary_path, "w") as summary_file:
+            summary_file.write(summary + "\n")
+        sys.stdout.write("iogmaya profile written to: {}\n{}\n".format(
+                                                self.trace_path, summary))
+
+
+class StartupTimer(object):
+    """
+    Records the duration of each step of a process's startup and prints a
+    breakdown:
+        timer = StartupTimer()
+        with timer.step("maya.standalone"):
+            maya.standalone.initialize()
+        timer.report("iogmaya_subcore: startup")
+    """
+    def __init__(self):
+        self.steps = []
+
+    @contextlib.contextmanager
+    def step(self, name):
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.steps.append((name, time.time() - start))
+
+    def total(self):
+        return sum(duration for _, duration in self.steps)
+
+    def report(self, title):
+        lines = ["{} {:.3f}s".format(title, self.total())]
+        for name, duration in self.steps:
+            lines.append("    {:<32} {:8.3f}s".format(name, duration))
+        print("\n".join(lines))
+        sys.stdout.flush()
+
+
+def _create_profiler():
+    trace_path = os.environ.get(PROFILE_ENV, "")
+    if not trace_path:
+        return None
+
+    profiler = Profiler(trace_path)
+    atexit.register(profiler.write)
+    return profiler
+
+
+# The profiler for this process, or None if profiling is disabled.
+_profiler = _create_profiler()
+
+
+def get_profiler():
+    """
+    Return the active Profiler, or None if profiling is not enabled.
+    """
+    return _profiler
+
+
+def instrument_cmds():
+    """
+    Instrument maya.cmds if profiling is enabled. Must be called once Maya
+    is initialized.
+    """
+    if _profiler is not None:
+        _profiler.instrument_cmds()
+
+
+def write_profile():
+    """
+    Write the profile now if profiling is enabled (i.e. before Maya is
+    uninitialized, in case the interpreter does not run atexit handlers).
+    """
+    if _profiler is not None:
+        _profiler.write()
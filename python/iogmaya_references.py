@@ -0,0 +1,73 @@
+# Copyright 2023 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Helpers for opening scenes with only some of their references loaded, and
+loading the remaining references on demand.
+"""
+
+import maya.cmds
+
+
+# Values accepted by the loadReferenceDepth flag of the file command.
+LOAD_REFERENCE_DEPTHS = ("all", "none", "topOnly", "asPrefs")
+
+
+def validate_depth(depth):
+    if depth not in LOAD_REFERENCE_DEPTHS:
+        raise ValueError(
+            "Invalid reference load depth: '{}'. Must be one of: {}".format(
+                depth, ", ".join(LOAD_REFERENCE_DEPTHS)))
+
+
+def get_reference_node(reference):
+    """
+    Return the reference node for `reference`, which may be the name of a
+    reference node or the path to a referenced file. Raises a KeyError if
+    it is neither.
+    """
+    if maya.cmds.objExists(reference) and \
+            maya.cmds.nodeType(reference) == "reference":
+        return reference
+
+    try:
+        return maya.cmds.referenceQuery(reference, referenceNode=True)
+    except RuntimeError:
+        raise KeyError("Reference: '{}' does not exist.".format(reference))
+
+
+def list_references():
+    """
+    Return the reference nodes of the top-level references in the scene.
+    """
+    references = maya.cmds.file(query=True, reference=True) or []
+    return [maya.cmds.referenceQuery(filename, referenceNode=True)
+            for filename in references]
+
+
+def load_reference(reference, depth="all"):
+    """
+    Load a reference (and its nested references, according to `depth`).
+    References which are already loaded are left as they are. Returns the
+    reference node and the loaded filename.
+    """
+    validate_depth(depth)
+    reference_node = get_reference_node(reference)
+    if maya.cmds.referenceQuery(reference_node, isLoaded=True):
+        return reference_node, maya.cmds.referenceQuery(reference_node,
+                                                        filename=True)
+
+    filename = maya.cmds.file(loadReference=reference_node,
+                              loadReferenceDepth=depth)
+    return reference_node, filename
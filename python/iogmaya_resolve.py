@@ -0,0 +1,454 @@
+# Copyright 2023 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Scene-scoped cache of node name resolution.
+
+Nodes frequently normalize the same names with objExists() and
+ls(long=True). The NodeResolver caches the MObjectHandle and long name for
+each name it resolves, and keeps the cache correct with Maya message
+callbacks:
+
+- Deleting a node drops the entries for that node.
+- Renaming or reparenting a DAG node drops the entries for that node and
+  all of its descendants (their long names changed). The cached DAG paths
+  are indexed by their parent path, so only the entries below the node are
+  visited.
+- Adding or renaming a node drops all cached short names, since the new
+  name may make a short name ambiguous. Full path entries are kept.
+- Opening or creating a new scene clears the cache.
+
+Operations changing many nodes at once (i.e. an MDagModifier reparenting
+thousands of objects) can suspend the invalidation with
+suspend_invalidation(): the callbacks only record the reparented paths,
+which are dropped once when the operation is done.
+
+Nodes may also be addressed by their UUID (see ls(uuid=True)), which
+unlike their names is unaffected by renames and reparenting. UUIDs are
+resolved and cached like names.
+
+The resolver must only be used from Maya's main thread (i.e. from nodes
+decorated with @maya_main_thread), which is also where the callbacks run.
+"""
+
+import contextlib
+import re
+
+import maya.api.OpenMaya as OpenMaya
+
+
+_UUID_PATTERN = re.compile(r"^[0-9A-F]{8}-[0-9A-F]{4}-[0-9A-F]{4}-"
+                           r"[0-9A-F]{4}-[0-9A-F]{12}$", re.IGNORECASE)
+
+
+def is_uuid(name):
+    """
+    Return True if `name` is a node UUID rather than a node name.
+    """
+    return _UUID_PATTERN.match(name) is not None
+
+
+def get_node_uuid(node):
+    """
+    Return the UUID of the node for an MObject.
+    """
+    return OpenMaya.MFnDependencyNode(node).uuid().asString()
+
+
+class NodeResolver(object):
+    def __init__(self):
+        # Entries are (MObjectHandle, long name) keyed by the name that was
+        # resolved. Full DAG paths, short/partial names and UUIDs are
+        # stored separately since they are invalidated differently.
+        self._paths = {}
+        self._names = {}
+        self._uuids = {}
+
+        # MObjectHandle hash code to the set of names cached for it.
+        self._handle_names = {}
+
+        # Index of the cached DAG paths, so that the entries under a path
+        # can be dropped without scanning every entry: the names cached for
+        # each long name, and the indexed child paths of each path.
+        self._path_names = {}
+        self._child_paths = {}
+
+        # Invalidation deferred by suspend_invalidation(): the paths and
+        # MObjectHandle hash codes of the reparented nodes, and whether any
+        # other change requires clearing the cache.
+        self._suspended = 0
+        self._deferred_paths = set()
+        self._deferred_handles = set()
+        self._deferred_clear = False
+
+        self._callback_ids = []
+        self._selection = OpenMaya.MSelectionList()
+
+        self.hits = 0
+        self.misses = 0
+
+    #
+    # Lookups.
+    #
+    def resolve(self, name):
+        """
+        Return the (MObjectHandle, long name) for a node. Raises a KeyError
+        if the node does not exist and a ValueError if the name matches
+        more than one node.
+        """
+        entry = self._cacheFor(name).get(name)
+        if entry is not None and entry[0].isValid():
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        self._installCallbacks()
+
+        self._selection.clear()
+        try:
+            if is_uuid(name):
+                # ls() returns the names of the nodes with the UUID.
+                import maya.cmds
+                for node_name in maya.cmds.ls(name, long=True):
+                    self._selection.add(node_name)
+            else:
+                self._selection.add(name)
+        except RuntimeError:
+            pass
+        if self._selection.length() == 0:
+            raise KeyError("Node: '{}' does not exist.".format(name))
+        if self._selection.length() > 1:
+            raise ValueError(
+                "More than one node matches name: '{}'".format(name))
+
+        node = self._selection.getDependNode(0)
+        if node.hasFn(OpenMaya.MFn.kDagNode):
+            long_name = self._selection.getDagPath(0).fullPathName()
+        else:
+            long_name = OpenMaya.MFnDependencyNode(node).name()
+
+        handle = OpenMaya.MObjectHandle(node)
+        entry = (handle, long_name)
+        self._store(name, entry)
+        if long_name != name:
+            self._store(long_name, entry)
+        return entry
+
+    def get_object(self, name):
+        """
+        Return the MObject for a node. Raises a KeyError if it does not
+        exist.
+        """
+        return self.resolve(name)[0].object()
+
+    def get_dag_path(self, name):
+        """
+        Return an MDagPath for a DAG node, or None if the node is not a DAG
+        node. Raises a KeyError if the node does not exist.
+        """
+        handle, long_name = self.resolve(name)
+        if not long_name.startswith("|"):
+            return None
+        self._selection.clear()
+        self._selection.add(long_name)
+        return self._selection.getDagPath(0)
+
+    def to_name(self, name):
+        """
+        Return the long name of the node if `name` is a UUID. Other names
+        are returned as they are.
+        """
+        if is_uuid(name):
+            return self.long_name(name)
+        return name
+
+    def get_uuid(self, name):
+        """
+        Return the UUID of a node. Raises a KeyError if the node does not
+        exist.
+        """
+        return get_node_uuid(self.get_object(name))
+
+    def get_uuids(self, names):
+        """
+        Return the UUIDs of a list of nodes.
+        """
+        return [self.get_uuid(name) for name in names]
+
+    def long_name(self, name):
+        """
+        Return the long name of a node (the full DAG path for DAG nodes).
+        Raises a KeyError if the node does not exist.
+        """
+        return self.resolve(name)[1]
+
+    def long_names(self, names):
+        """
+        Return the long names for a list of nodes. Like ls(long=True),
+        names that don't exist are skipped and ambiguous names return every
+        matching node.
+        """
+        long_names = []
+        for name in names:
+            try:
+                long_names.append(self.resolve(name)[1])
+            except KeyError:
+                continue
+            except ValueError:
+                import maya.cmds
+                long_names.extend(maya.cmds.ls(name, long=True))
+        return long_names
+
+    def exists(self, name):
+        """
+        Return True if the name matches at least one node.
+        """
+        try:
+            self.resolve(name)
+        except KeyError:
+            return False
+        except ValueError:
+            pass
+        return True
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._paths) + len(self._names) +
+                       len(self._uuids)
+        }
+
+    #
+    # Invalidation.
+    #
+    def clear(self):
+        self._paths.clear()
+        self._names.clear()
+        self._uuids.clear()
+        self._handle_names.clear()
+        self._path_names.clear()
+        self._child_paths.clear()
+
+    def uninstall(self):
+        """
+        Remove the Maya callbacks and clear the cache.
+        """
+        if self._callback_ids:
+            OpenMaya.MMessage.removeCallbacks(self._callback_ids)
+            self._callback_ids = []
+        self.clear()
+
+    @contextlib.contextmanager
+    def suspend_invalidation(self):
+        """
+        Context manager deferring the invalidation of the cache until the
+        enclosed operation is done, so an operation reparenting many nodes
+        drops each affected path once instead of once per callback. The
+        cache must not be used within the context.
+        """
+        self._suspended += 1
+        try:
+            yield
+        finally:
+            self._suspended -= 1
+            if not self._suspended:
+                self._flushDeferred()
+
+    def _flushDeferred(self):
+        paths = self._deferred_paths
+        handles = self._deferred_handles
+        self._deferred_paths = set()
+        self._deferred_handles = set()
+        if self._deferred_clear:
+            self._deferred_clear = False
+            self.clear()
+            return
+
+        for path in paths:
+            self._dropPath(path)
+        for hash_code in handles:
+            for name in list(self._handle_names.get(hash_code, ())):
+                self._drop(name)
+
+    def _cacheFor(self, name):
+        if name.startswith("|"):
+            return self._paths
+        if is_uuid(name):
+            return self._uuids
+        return self._names
+
+    def _store(self, name, entry):
+        if name in self._cacheFor(name):
+            self._drop(name)
+        self._cacheFor(name)[name] = entry
+        self._handle_names.setdefault(entry[0].hashCode(), set()).add(name)
+        self._indexPath(entry[1], name)
+
+    def _drop(self, name):
+        entry = self._cacheFor(name).pop(name, None)
+        if entry is not None:
+            names = self._handle_names.get(entry[0].hashCode())
+            if names is not None:
+                names.discard(name)
+            self._unindexPath(entry[1], name)
+
+    def _dropNode(self, node):
+        names = self._handle_names.get(
+                    OpenMaya.MObjectHandle(node).hashCode())
+        for name in list(names or ()):
+            self._drop(name)
+
+    def _dropPath(self, path):
+        # Drop every entry for the node at `path` and its descendants by
+        # walking the path index below `path`.
+        if path not in self._path_names:
+            return
+        stack = [path]
+        while stack:
+            current = stack.pop()
+            stack.extend(self._child_paths.get(current, ()))
+            for name in list(self._path_names.get(current, ())):
+                self._drop(name)
+
+    def _indexPath(self, long_name, name):
+        if not long_name.startswith("|"):
+            return
+        self._path_names.setdefault(long_name, set()).add(name)
+
+        # Link the path to its ancestors, up to the first ancestor which is
+        # already indexed.
+        path = long_name
+        while True:
+            parent = path.rsplit("|", 1)[0]
+            if not parent:
+                break
+            children = self._child_paths.get(parent)
+            if children is None:
+                self._child_paths[parent] = children = set()
+                self._path_names.setdefault(parent, set())
+                children.add(path)
+                path = parent
+                continue
+            children.add(path)
+            break
+
+    def _unindexPath(self, long_name, name):
+        names = self._path_names.get(long_name)
+        if names is None:
+            return
+        names.discard(name)
+
+        # Remove paths which no longer hold entries or indexed children.
+        path = long_name
+        while (path and not self._path_names.get(path) and
+               not self._child_paths.get(path)):
+            self._path_names.pop(path, None)
+            self._child_paths.pop(path, None)
+            parent = path.rsplit("|", 1)[0]
+            siblings = self._child_paths.get(parent)
+            if siblings is not None:
+                siblings.discard(path)
+            path = parent
+
+    def _dropShortNames(self):
+        for name in list(self._names):
+            self._drop(name)
+
+    #
+    # Callbacks.
+    #
+    def _installCallbacks(self):
+        if self._callback_ids:
+            return
+
+        self._callback_ids = [
+            OpenMaya.MDGMessage.addNodeAddedCallback(self._nodeAdded),
+            OpenMaya.MDGMessage.addNodeRemovedCallback(self._nodeRemoved),
+            OpenMaya.MNodeMessage.addNameChangedCallback(
+                                            OpenMaya.MObject.kNullObj,
+                                            self._nameChanged),
+            OpenMaya.MDagMessage.addParentAddedCallback(self._parentChanged),
+            OpenMaya.MDagMessage.addParentRemovedCallback(
+                                            self._parentChanged),
+            OpenMaya.MSceneMessage.addCallback(
+                                            OpenMaya.MSceneMessage.kBeforeNew,
+                                            self._sceneChanged),
+            OpenMaya.MSceneMessage.addCallback(
+                                            OpenMaya.MSceneMessage.kBeforeOpen,
+                                            self._sceneChanged),
+        ]
+
+    def _nodeAdded(self, node, client_data):
+        if self._suspended:
+            self._deferred_clear = True
+            return
+        if self._names:
+            self._dropShortNames()
+
+    def _nodeRemoved(self, node, client_data):
+        if self._suspended:
+            self._deferred_clear = True
+            return
+        self._dropNode(node)
+
+    def _nameChanged(self, node, previous_name, client_data):
+        if self._suspended:
+            self._deferred_clear = True
+            return
+        if self._names:
+            self._dropShortNames()
+
+        if node.hasFn(OpenMaya.MFn.kDagNode) and previous_name:
+            # Rebuild the path the node had before the rename.
+            path = OpenMaya.MDagPath.getAPathTo(node).fullPathName()
+            parent_path = path.rsplit("|", 1)[0]
+            self._dropPath(parent_path + "|" + previous_name)
+        self._dropNode(node)
+
+    def _parentChanged(self, child, parent, client_data):
+        # Called both before the old parent is removed and after the new
+        # parent is added, so the path is dropped under both parents.
+        if self._suspended:
+            self._deferred_paths.add(child.fullPathName())
+            self._deferred_handles.add(
+                        OpenMaya.MObjectHandle(child.node()).hashCode())
+            return
+        self._dropPath(child.fullPathName())
+        self._dropNode(child.node())
+
+    def _sceneChanged(self, client_data):
+        self.clear()
+
+
+_resolver = None
+
+
+def get_resolver():
+    """
+    Return the NodeResolver shared by all nodes in this process.
+    """
+    global _resolver
+    if _resolver is None:
+        _resolver = NodeResolver()
+    return _resolver
+
+
+def uninstall_resolver():
+    """
+    Remove the callbacks of the shared NodeResolver (i.e. when the plugin
+    is unloaded).
+    """
+    if _resolver is not None:
+        _resolver.uninstall()
@@ -0,0 +1,237 @@
+# Copyright 2023 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Opt-in, content-addressed cache of the files produced by the scene nodes
+(i.e. FBX exports and saved scenes).
+
+Set the IOGMAYA_RESULT_CACHE environment variable to a directory to enable
+the cache. Results are keyed by a hash of everything that determines them:
+the hashes of the input files, the node list, the settings and the Maya
+version. The cache is limited to IOGMAYA_RESULT_CACHE_MAX_BYTES (10 GB by
+default); the least recently used results are evicted first.
+
+Results are only cached when their inputs are fully described by files on
+disk. A node exporting from a scene with unsaved modifications can't be
+keyed and always runs.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+
+CACHE_DIR_ENV = "IOGMAYA_RESULT_CACHE"
+CACHE_MAX_BYTES_ENV = "IOGMAYA_RESULT_CACHE_MAX_BYTES"
+DEFAULT_MAX_BYTES = 10 * 1024 ** 3
+
+
+class ResultCache(object):
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        # Hashes of input files by (path, mtime, size), so unchanged files
+        # are only read once per process.
+        self._file_hashes = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def make_key(self, *parts):
+        """
+        Return the cache key for a list of JSON serializable parts.
+        """
+        encoded = json.dumps(parts, sort_keys=True).encode("utf-8")
+        return hashlib.sha1(encoded).hexdigest()
+
+    def hash_file(self, path):
+        """
+        Return the hash of a file's contents.
+        """
+        stat = os.stat(path)
+        file_key = (os.path.abspath(path), stat.st_mtime, stat.st_size)
+        file_hash = self._file_hashes.get(file_key)
+        if file_hash is None:
+            digest = hashlib.sha1()
+            with open(path, "rb") as input_file:
+                for block in iter(lambda: input_file.read(1024 * 1024), b""):
+                    digest.update(block)
+            file_hash = digest.hexdigest()
+            self._file_hashes[file_key] = file_hash
+        return file_hash
+
+    def get(self, key, extension):
+        """
+        Return the path of the cached result for `key`, or None if it is not
+        cached.
+        """
+        path = self._entryPath(key, extension)
+        with self._lock:
+            if not os.path.isfile(path):
+                self.misses += 1
+                return None
+
+            # The modification time orders the entries for eviction.
+            os.utime(path, None)
+            self.hits += 1
+        return path
+
+    def fetch(self, key, destination):
+        """
+        Copy the cached result for `key` to `destination`. Returns True on a
+        hit and False on a miss.
+        """
+        extension = os.path.splitext(destination)[1]
+        path = self.get(key, extension)
+        if path is None:
+            return False
+
+        if os.path.abspath(path) != os.path.abspath(destination):
+            shutil.copyfile(path, destination)
+        return True
+
+    def put(self, key, source):
+        """
+        Store a copy of the file `source` as the result for `key` and
+        return the path of the cached copy.
+        """
+        extension = os.path.splitext(source)[1]
+        path = self._entryPath(key, extension)
+
+        # Copy to a temporary file first so a partially written entry is
+        # never visible to another process sharing the cache.
+        handle, temp_path = tempfile.mkstemp(dir=self.directory,
+                                             suffix=".tmp")
+        os.close(handle)
+        shutil.copyfile(source, temp_path)
+        if os.path.exists(path):
+            os.remove(path)
+        os.rename(temp_path, path)
+
+        with self._lock:
+            self.stores += 1
+            self._evict()
+        return path
+
+    def stats(self):
+        with self._lock:
+            entries = self._entries()
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "entries": len(entries),
+                "bytes": sum(size for _, _, size in entries)
+            }
+
+    def _entryPath(self, key, extension):
+        return os.path.join(self.directory, key + extension)
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".tmp"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # Evicted by another process.
+                continue
+            entries.append((stat.st_mtime, path, stat.st_size))
+        return entries
+
+    def _evict(self):
+        entries = sorted(self._entries())
+        total = sum(size for _, _, size in entries)
+        for _, path, size in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+
+
+def get_maya_version():
+    """
+    Return the Maya and FBX plugin versions, which are part of every key.
+    """
+    import maya.cmds
+    version = maya.cmds.about(version=True)
+    if maya.cmds.pluginInfo("fbxmaya", query=True, loaded=True):
+        version += "/fbx-" + maya.cmds.pluginInfo("fbxmaya", query=True,
+                                                  version=True)
+    return version
+
+
+def make_scene_key(cache, *parts):
+    """
+    Return the key for a result computed from the open scene and `parts`,
+    or None if the scene can't be keyed (it is unsaved, has unsaved
+    modifications or loads a file which can't be found).
+
+    Along with the scene itself, the key covers every file the scene loads
+    (i.e. its references, recursively), so a result is not reused once a
+    referenced file changes.
+    """
+    import maya.cmds
+    scene = maya.cmds.file(query=True, sceneName=True)
+    if not scene or maya.cmds.file(query=True, modified=True):
+        return None
+
+    loaded_files = set(maya.cmds.file(query=True, list=True,
+                                      withoutCopyNumber=True) or [])
+    loaded_files.discard(scene)
+    file_hashes = [cache.hash_file(scene)]
+    for path in sorted(loaded_files):
+        if not os.path.isfile(path):
+            return None
+        file_hashes.append(cache.hash_file(path))
+    return cache.make_key(file_hashes, get_maya_version(), *parts)
+
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache():
+    """
+    Return the ResultCache configured by the environment, or None if the
+    cache is not enabled.
+    """
+    global _result_cache
+    directory = os.environ.get(CACHE_DIR_ENV)
+    if not directory:
+        return None
+
+    with _result_cache_lock:
+        if _result_cache is None or _result_cache.directory != directory:
+            max_bytes = int(os.environ.get(CACHE_MAX_BYTES_ENV,
+                                           DEFAULT_MAX_BYTES))
+            _result_cache = ResultCache(directory, max_bytes)
+    return _result_cache
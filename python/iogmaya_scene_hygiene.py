@@ -0,0 +1,114 @@
+# Copyright 2022 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+
+import maya.cmds
+
+import iogmaya_fbx
+import iogmaya_plugins
+import iogmaya_usd
+
+
+class SceneBaseline(object):
+    """
+    Snapshot of the Maya session state taken when a subcore starts: the
+    loaded plugins, the namespaces and the open scene. restore() brings the
+    session back to that state between work items so that a warm subcore
+    can be reused for another graph without re-initializing Maya.
+
+    Only state that differs from the baseline is touched, so restoring an
+    untouched session is close to free.
+    """
+    def __init__(self, keep_plugins=()):
+        # Plugins which are left loaded even if they were not loaded at
+        # startup (i.e. plugins which are expensive to reload).
+        self.keep_plugins = set(keep_plugins)
+
+        self.plugins = set()
+        self.namespaces = set()
+        self.scene = ""
+
+    def capture(self):
+        """
+        Record the current session state as the baseline.
+        """
+        self.plugins = _loaded_plugins()
+        self.namespaces = _namespaces()
+        self.scene = maya.cmds.file(query=True, sceneName=True)
+
+    def restore(self):
+        """
+        Restore the session to the baseline state. Returns the time taken
+        in seconds.
+        """
+        start_time = time.time()
+        self._restoreScene()
+        self._restoreNamespaces()
+        self._restorePlugins()
+
+        # Drop anything left over from the previous work item that isn't
+        # part of the scene itself.
+        maya.cmds.select(clear=True)
+        maya.cmds.flushUndo()
+        iogmaya_usd.release_stages()
+        return time.time() - start_time
+
+    def _restoreScene(self):
+        # Nothing to do if the baseline scene is still open and unmodified.
+        scene = maya.cmds.file(query=True, sceneName=True)
+        if scene == self.scene and not maya.cmds.file(query=True,
+                                                      modified=True):
+            return
+
+        if self.scene:
+            maya.cmds.file(self.scene, open=True, force=True)
+        else:
+            maya.cmds.file(new=True, force=True)
+
+    def _restoreNamespaces(self):
+        maya.cmds.namespace(setNamespace=":")
+
+        # Remove the deepest namespaces first so parents are empty by the
+        # time they are removed.
+        added = sorted(_namespaces() - self.namespaces,
+                       key=lambda namespace: namespace.count(":"),
+                       reverse=True)
+        for namespace in added:
+            if maya.cmds.namespace(exists=namespace):
+                maya.cmds.namespace(removeNamespace=namespace,
+                                    deleteNamespaceContent=True)
+
+    def _restorePlugins(self):
+        added = _loaded_plugins() - self.plugins - self.keep_plugins
+        for plugin in added:
+            try:
+                maya.cmds.unloadPlugin(plugin)
+                iogmaya_plugins.plugin_unloaded(plugin)
+                iogmaya_fbx.get_fbx_state().plugin_unloaded(plugin)
+            except RuntimeError:
+                # The plugin is still in use (or refuses to unload); leave it
+                # loaded rather than forcing it out from under Maya.
+                pass
+
+
+def _loaded_plugins():
+    return set(maya.cmds.pluginInfo(query=True, listPlugins=True) or [])
+
+
+def _namespaces():
+    namespaces = maya.cmds.namespaceInfo(":", listOnlyNamespaces=True,
+                                         recurse=True,
+                                         absoluteName=True) or []
+    return set(namespaces)
@@ -0,0 +1,471 @@
+# Copyright 2022 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Pool of pre-warmed Maya subcores.
+
+Initializing standalone Maya is by far the most expensive part of starting a
+Maya subcore. The pool moves that cost out of the critical path:
+
+- A supervisor process (SubcorePool) keeps N worker processes running. Each
+  worker initializes Maya up front, connects back to the supervisor and waits
+  idle until it is handed a Core address.
+- When the Core launches `iogmaya_subcore --core-address ...` with a pool
+  configured, the launched process is only a thin client
+  (RunPooledSubcore). It asks the supervisor for an idle worker, forwards
+  the Core address and waits for the worker to finish.
+- Workers that finish their work item either exit, or reset their session
+  (see iogmaya_scene_hygiene) and report back as idle to handle another
+  work item. When workers exit after one work item, the supervisor starts a
+  replacement as soon as a worker is handed out so that N warm workers stay
+  available. When they are reused, busy workers count towards the N and a
+  replacement is only started once a worker exits or is retired.
+
+This module does not import maya or iograft. The worker side receives the
+functions that initialize and process work as arguments so the pool can be
+driven with a fake maya.standalone (see tools/fakemaya).
+"""
+
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from multiprocessing.connection import Client, Listener
+
+
+# Environment variables used to configure the pool.
+POOL_ADDRESS_ENV = "IOGMAYA_SUBCORE_POOL"
+POOL_AUTHKEY_ENV = "IOGMAYA_SUBCORE_POOL_AUTHKEY"
+
+# Set by the supervisor on each worker it launches so the worker can identify
+# itself when it connects back (the process id is not reliable when the
+# worker is launched through a wrapper script).
+POOL_WORKER_ID_ENV = "IOGMAYA_SUBCORE_POOL_WORKER_ID"
+
+DEFAULT_POOL_SIZE = 2
+DEFAULT_ACQUIRE_TIMEOUT = 60.0
+
+
+def parse_pool_address(address):
+    """
+    Convert a pool address string into a multiprocessing.connection address.
+    "host:port" strings are converted to a (host, port) tuple, anything else
+    is treated as a Unix socket path or Windows named pipe.
+    """
+    host, sep, port = address.rpartition(":")
+    if sep and host and port.isdigit():
+        return (host, int(port))
+    return address
+
+
+def get_pool_address():
+    """
+    Return the pool address from the environment, or None if no pool is
+    configured.
+    """
+    address = os.environ.get(POOL_ADDRESS_ENV, "")
+    return address or None
+
+
+def get_pool_authkey():
+    """
+    Return the key authenticating the pool connections from the environment,
+    or None if no key is set. There is deliberately no default key: the
+    connections unpickle the messages they receive, so anyone knowing the
+    key can run code in the supervisor, its workers and the clients.
+    """
+    authkey = os.environ.get(POOL_AUTHKEY_ENV, "")
+    if not authkey:
+        return None
+    if not isinstance(authkey, bytes):
+        authkey = authkey.encode("utf-8")
+    return authkey
+
+
+def _get_authkey():
+    authkey = get_pool_authkey()
+    if authkey is None:
+        raise ValueError("The {} environment variable must be set to use the"
+                         " subcore pool.".format(POOL_AUTHKEY_ENV))
+    return authkey
+
+
+class SubcorePool(object):
+    """
+    Supervisor which keeps `size` initialized subcores idle and hands them
+    out to pooled subcore clients.
+
+    `worker_command` is the command line used to launch a worker process.
+    The workers must connect back to the supervisor's address (see
+    RunPoolWorker). `reuse_workers` must be set when the workers handle
+    more than one work item, so that busy workers (which come back as idle)
+    count towards the size of the pool.
+    """
+    def __init__(self, address, worker_command, size=DEFAULT_POOL_SIZE,
+                 acquire_timeout=DEFAULT_ACQUIRE_TIMEOUT,
+                 reuse_workers=False):
+        self.address = parse_pool_address(address)
+        self.worker_command = list(worker_command)
+        self.size = size
+        self.acquire_timeout = acquire_timeout
+        self.reuse_workers = reuse_workers
+
+        self._listener = None
+        self._condition = threading.Condition()
+        self._stopped = threading.Event()
+
+        # Worker processes by worker id, split by state.
+        self._next_worker_id = 0
+        self._starting = {}
+        self._idle = []
+        self._busy = {}
+
+        # Counters reported by stats().
+        self._handed_out = 0
+        self._completed = 0
+        self._reused = 0
+        self._unavailable = 0
+
+    def start(self):
+        """
+        Start listening for connections and launch the initial workers.
+        Raises a ValueError if no key is set (see get_pool_authkey).
+        """
+        self._listener = Listener(self.address, authkey=_get_authkey())
+        accept_thread = threading.Thread(target=self._acceptConnections)
+        accept_thread.daemon = True
+        accept_thread.start()
+
+        self._replenish()
+
+    def serve_forever(self, poll_interval=1.0):
+        """
+        Start the pool and block until stop() is called, replacing any
+        workers that died before they were handed out.
+        """
+        self.start()
+        try:
+            while not self._stopped.wait(poll_interval):
+                self._reapWorkers()
+                self._replenish()
+        finally:
+            self.stop()
+
+    def stop(self):
+        """
+        Stop the pool and terminate all of the workers.
+        """
+        self._stopped.set()
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+
+        with self._condition:
+            processes = list(self._starting.values())
+            processes.extend(worker[1] for worker in self._idle)
+            processes.extend(self._busy.values())
+            self._starting = {}
+            self._idle = []
+            self._busy = {}
+            self._condition.notify_all()
+
+        for process in processes:
+            if process.poll() is None:
+                process.terminate()
+
+    def stats(self):
+        """
+        Return a dictionary describing the current state of the pool.
+        """
+        with self._condition:
+            return {
+                "idle": len(self._idle),
+                "starting": len(self._starting),
+                "busy": len(self._busy),
+                "handed_out": self._handed_out,
+                "completed": self._completed,
+                "reused": self._reused,
+                "unavailable": self._unavailable
+            }
+
+    def _replenish(self):
+        # Keep `size` workers either idle or warming up (or busy, if they
+        # come back once they are done).
+        with self._condition:
+            num_missing = self.size - self._numWorkers()
+        for _ in range(max(num_missing, 0)):
+            self._spawnWorker()
+
+    def _numWorkers(self):
+        # The number of workers counting towards the size of the pool. Must
+        # be called with the condition held.
+        num_workers = len(self._idle) + len(self._starting)
+        if self.reuse_workers:
+            num_workers += len(self._busy)
+        return num_workers
+
+    def _spawnWorker(self):
+        if self._stopped.is_set():
+            return
+
+        with self._condition:
+            self._next_worker_id += 1
+            worker_id = str(self._next_worker_id)
+
+        env = os.environ.copy()
+        env[POOL_WORKER_ID_ENV] = worker_id
+        process = subprocess.Popen(self.worker_command, env=env)
+        with self._condition:
+            self._starting[worker_id] = process
+
+    def _reapWorkers(self):
+        with self._condition:
+            for workers in (self._starting, self._busy):
+                for worker_id, process in list(workers.items()):
+                    if process.poll() is not None:
+                        del workers[worker_id]
+
+            alive = []
+            for worker in self._idle:
+                if worker[1].poll() is None:
+                    alive.append(worker)
+                else:
+                    worker[2].close()
+            self._idle = alive
+
+    def _acceptConnections(self):
+        while not self._stopped.is_set():
+            try:
+                connection = self._listener.accept()
+            except Exception:
+                # The listener was closed, or a client failed to
+                # authenticate.
+                if self._stopped.is_set():
+                    return
+                continue
+
+            handler = threading.Thread(target=self._handleConnection,
+                                       args=(connection,))
+            handler.daemon = True
+            handler.start()
+
+    def _handleConnection(self, connection):
+        try:
+            message = connection.recv()
+        except (EOFError, IOError, OSError):
+            connection.close()
+            return
+
+        if message[0] == "ready":
+            # A worker has finished initializing Maya and is idle. Ownership
+            # of the connection moves to the idle list.
+            with self._condition:
+                process = self._starting.pop(message[1], None)
+                if process is None:
+                    # A worker coming back after completing a work item.
+                    process = self._busy.pop(message[1], None)
+                    if process is None:
+                        # Not a worker launched by this pool.
+                        connection.close()
+                        return
+
+                    # Retire the worker if the pool is already full,
+                    # counting the replacements still warming up.
+                    if self._numWorkers() >= self.size:
+                        connection.send(("exit",))
+                        connection.close()
+                        return
+                    self._reused += 1
+
+                self._idle.append((message[1], process, connection))
+                self._condition.notify()
+        elif message[0] == "acquire":
+            self._handleAcquire(connection, message[1])
+            connection.close()
+        elif message[0] == "stats":
+            connection.send(("stats", self.stats()))
+            connection.close()
+        else:
+            connection.close()
+
+    def _takeIdleWorker(self, timeout):
+        deadline = time.time() + timeout
+        with self._condition:
+            while not self._idle:
+                remaining = deadline - time.time()
+                if remaining <= 0 or self._stopped.is_set():
+                    return None
+                self._condition.wait(remaining)
+            return self._idle.pop(0)
+
+    def _handleAcquire(self, client, core_address):
+        deadline = time.time() + self.acquire_timeout
+        while True:
+            worker = self._takeIdleWorker(deadline - time.time())
+            if worker is None:
+                with self._condition:
+                    self._unavailable += 1
+                client.send(("unavailable",))
+                return
+
+            # The worker acknowledges the work item; if it died while idle
+            # the acknowledgement never arrives and the next worker is tried.
+            worker_id, process, connection = worker
+            try:
+                connection.send(("work", core_address))
+                if connection.recv()[0] == "accepted":
+                    break
+            except (EOFError, IOError, OSError):
+                pass
+            connection.close()
+
+        with self._condition:
+            self._handed_out += 1
+            self._busy[worker_id] = process
+
+        # Replace the worker straight away so the pool stays warm while this
+        # one is busy (unless busy workers are reused).
+        self._replenish()
+        client.send(("assigned", worker_id))
+
+        # Wait for the worker to report that it is done.
+        try:
+            exit_code = connection.recv()[1]
+        except (EOFError, IOError, OSError):
+            exit_code = 1
+        connection.close()
+
+        with self._condition:
+            self._completed += 1
+        try:
+            client.send(("finished", exit_code))
+        except (IOError, OSError):
+            pass
+
+
+def RunPoolWorker(pool_address, initialize, process_work, uninitialize,
+                  reset=None, max_work_items=1, should_retire=None):
+    """
+    Worker side of the pool. Calls `initialize()`, reports to the supervisor
+    that the worker is ready, then waits for a Core address and runs
+    `process_work(core_address)`.
+
+    If a `reset` function is given, the worker calls it after each work item
+    and reports back as idle, handling up to `max_work_items` work items
+    before exiting. If a `should_retire` function is given, it is called
+    after each work item and the worker exits when it returns True (i.e.
+    when the worker's memory has grown too large). `uninitialize()` is
+    always called before returning.
+    """
+    initialize()
+    try:
+        exit_code = 0
+        num_work_items = 0
+        while True:
+            try:
+                connection = Client(parse_pool_address(pool_address),
+                                    authkey=_get_authkey())
+            except (IOError, OSError, ValueError) as e:
+                sys.stderr.write("Failed to connect to the subcore pool at"
+                                 " {}: {}\n".format(pool_address, e))
+                return 1
+
+            connection.send(("ready",
+                             os.environ.get(POOL_WORKER_ID_ENV, "")))
+            try:
+                message = connection.recv()
+            except EOFError:
+                # The supervisor shut down before handing out this worker.
+                return exit_code
+            if message[0] != "work":
+                return exit_code
+            connection.send(("accepted",))
+
+            exit_code = 0
+            try:
+                process_work(message[1])
+            except Exception:
+                import traceback
+                traceback.print_exc()
+                exit_code = 1
+
+            connection.send(("done", exit_code))
+            connection.close()
+
+            num_work_items += 1
+            if should_retire is not None and should_retire():
+                return exit_code
+            if reset is None or num_work_items >= max_work_items:
+                return exit_code
+
+            # Restore the session before reporting back as idle. If that
+            # fails the session can't be trusted, so exit instead.
+            try:
+                reset()
+            except Exception:
+                import traceback
+                traceback.print_exc()
+                return exit_code
+    finally:
+        uninitialize()
+
+
+def RunPooledSubcore(core_address, pool_address):
+    """
+    Client side of the pool, run in place of a regular subcore. Hands the
+    Core address to an idle worker and blocks until that worker is done.
+
+    Returns the exit code of the worker, or None if the pool could not
+    provide a worker (in which case the caller should start a regular
+    subcore). The pool is not used if no key is set (see get_pool_authkey).
+    """
+    try:
+        authkey = _get_authkey()
+    except ValueError as e:
+        sys.stderr.write("Not using the subcore pool: {}\n".format(e))
+        return None
+
+    try:
+        connection = Client(parse_pool_address(pool_address),
+                            authkey=authkey)
+    except (IOError, OSError):
+        return None
+
+    try:
+        connection.send(("acquire", core_address))
+        message = connection.recv()
+        if message[0] != "assigned":
+            return None
+
+        message = connection.recv()
+        return message[1]
+    except EOFError:
+        return 1
+    finally:
+        connection.close()
+
+
+def GetPoolStats(pool_address):
+    """
+    Query a running supervisor for its stats().
+    """
+    connection = Client(parse_pool_address(pool_address),
+                        authkey=_get_authkey())
+    try:
+        connection.send(("stats",))
+        return connection.recv()[1]
+    finally:
+        connection.close()
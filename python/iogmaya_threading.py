@@ -12,14 +12,146 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
 import sys
 import functools
+import threading
+import time
 
 import maya.cmds
 import maya.utils
 
 import iograft
 
+import iogmaya_metrics
+import iogmaya_profiling
+
+
+# Environment variable enabling batched main thread dispatch. The value is
+# the batching window in milliseconds ("0" batches only the calls which are
+# already waiting when the main thread becomes idle).
+MAIN_THREAD_BATCHING_ENV = "IOGMAYA_MAIN_THREAD_BATCHING"
+
+
+class _BatchedCall(object):
+    def __init__(self, func, args):
+        self.func = func
+        self.args = args
+        self.result = None
+        self.exception = None
+        self.done = threading.Event()
+
+
+class MainThreadBatcher(object):
+    """
+    Dispatches calls to Maya's main thread in batches. Calls that arrive
+    within `window` seconds of each other (or that are already queued when
+    the main thread picks the batch up) are all executed in a single main
+    thread slice instead of each waiting for its own turn on the idle queue.
+
+    Each caller blocks until its own call is complete and receives its own
+    result or exception.
+    """
+    def __init__(self, window=0.0):
+        self.window = window
+        self._lock = threading.Lock()
+        self._pending = []
+        self._scheduled = False
+
+        # Number of calls executed and the number of main thread round trips
+        # used to execute them.
+        self.calls = 0
+        self.round_trips = 0
+
+    @property
+    def round_trips_saved(self):
+        return self.calls - self.round_trips
+
+    def execute(self, func, *args):
+        # Calls made from the main thread run immediately; waiting for the
+        # idle queue from the main thread would never return.
+        if isinstance(threading.current_thread(), threading._MainThread):
+            return func(*args)
+
+        call = _BatchedCall(func, args)
+        with self._lock:
+            self._pending.append(call)
+            schedule = not self._scheduled
+            self._scheduled = True
+
+        # The first call of a batch schedules it, giving other calls the
+        # length of the window to join.
+        if schedule:
+            if self.window > 0:
+                time.sleep(self.window)
+            maya.utils.executeDeferred(self._runBatch)
+
+        call.done.wait()
+        if call.exception is not None:
+            raise call.exception
+        return call.result
+
+    def _runBatch(self):
+        with self._lock:
+            batch = self._pending
+            self._pending = []
+            self._scheduled = False
+            self.calls += len(batch)
+            self.round_trips += 1
+
+        # Every caller is released, even if a call raises something other
+        # than an Exception (i.e. a KeyboardInterrupt) and ends the batch.
+        try:
+            for call in batch:
+                try:
+                    call.result = call.func(*call.args)
+                except Exception as e:
+                    call.exception = e
+                call.done.set()
+        finally:
+            for call in batch:
+                if not call.done.is_set():
+                    call.exception = RuntimeError(
+                            "The main thread batch was interrupted.")
+                    call.done.set()
+
+
+def _get_batcher():
+    window = os.environ.get(MAIN_THREAD_BATCHING_ENV, "")
+    if not window:
+        return None
+    try:
+        window = float(window)
+    except ValueError:
+        window = -1.0
+    if not 0.0 <= window < float("inf"):
+        sys.stderr.write("Ignoring {}: '{}' is not a window in milliseconds;"
+                         " main thread batching is disabled.\n".format(
+                            MAIN_THREAD_BATCHING_ENV,
+                            os.environ[MAIN_THREAD_BATCHING_ENV]))
+        return None
+    return MainThreadBatcher(window / 1000.0)
+
+
+# The batcher shared by all nodes, or None if batching is disabled.
+_main_thread_batcher = _get_batcher()
+
+
+def get_main_thread_batch_stats():
+    """
+    Return the number of calls executed through the batched main thread
+    dispatcher, the number of main thread round trips used to execute them
+    and the number of round trips saved by batching. Returns None if
+    batching is not enabled.
+    """
+    if _main_thread_batcher is None:
+        return None
+    return {
+        "calls": _main_thread_batcher.calls,
+        "round_trips": _main_thread_batcher.round_trips,
+        "round_trips_saved": _main_thread_batcher.round_trips_saved
+    }
+
 
 def maya_main_thread(func):
     """
@@ -29,6 +161,12 @@ def maya_main_thread(func):
         @maya_main_thread
         def Process(self, data):
             ...
+
+    If the IOGMAYA_MAIN_THREAD_BATCHING environment variable is set, nodes
+    ready to run at the same time share a single main thread round trip. If
+    the IOGMAYA_PROFILE environment variable is set, the time each node
+    waits for the main thread and spends processing is recorded. If metrics
+    are enabled (see iogmaya_metrics), they are recorded there as well.
     """
     def catchNodeException(func, *args):
         try:
@@ -39,13 +177,27 @@ def maya_main_thread(func):
 
     @functools.wraps(func)
     def launch_in_main_thread(*args):
+        node_func = func
+        profiler = iogmaya_profiling.get_profiler()
+        if profiler is not None:
+            node_func = profiler.wrap_node_process(func)
+        metrics = iogmaya_metrics.get_metrics()
+        if metrics is not None:
+            node_func = metrics.wrap_node_process(node_func)
+
         if (maya.cmds.about(batch=True)):
             # If we are executing in batch, there is no access to Maya's
             # executeInMainThreadWithResult function.
-            func(*args)
+            node_func(*args)
         else:
-            result = maya.utils.executeInMainThreadWithResult(
-                            functools.partial(catchNodeException, func), *args)
+            if _main_thread_batcher is not None:
+                result = _main_thread_batcher.execute(
+                        functools.partial(catchNodeException, node_func),
+                        *args)
+            else:
+                result = maya.utils.executeInMainThreadWithResult(
+                        functools.partial(catchNodeException, node_func),
+                        *args)
             if result:
                 import traceback
                 tb = traceback.format_exception(*result)
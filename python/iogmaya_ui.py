@@ -46,9 +46,15 @@ def ensure_window_shown(window):
 
 def refresh_outliners():
     """
-    Force a refresh of all of Maya's outliner panels.
+    Force a refresh of all of Maya's outliner panels. While a graph
+    execution scope is active, the refresh is deferred to a single pass at
+    the end of the scope.
     """
     import maya.cmds
+    import iogmaya_graph_scope
+    if iogmaya_graph_scope.get_graph_scope().defer_outliner_refresh():
+        return
+
     editors = maya.cmds.lsUI(editors=True)
     for editor in editors:
         if maya.cmds.outlinerEditor(editor, exists=True):
@@ -0,0 +1,60 @@
+# Copyright 2023 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Execute OpenMaya modifiers (MDGModifier/MDagModifier) so that they are
+recorded as a single entry on Maya's undo queue.
+
+Modifiers executed directly from Python are not recorded on the undo queue.
+When the iograft Maya plugin is loaded, the modifier is instead handed to
+the `iograft_modifier_undo` command which executes it and keeps it for
+undo/redo.
+"""
+
+import maya.cmds
+
+
+# Name of the command registered by the iograftmaya plugin.
+MODIFIER_UNDO_COMMAND = "iograft_modifier_undo"
+
+# Modifiers waiting to be picked up by the command.
+_pending_modifiers = []
+
+
+def pop_pending_modifier():
+    """
+    Return the next modifier to be executed by the undo command.
+    """
+    return _pending_modifiers.pop(0)
+
+
+def execute_modifier(modifier):
+    """
+    Execute the modifier. If the modifier fails, any changes it made are
+    reverted before the exception is raised.
+    """
+    if hasattr(maya.cmds, MODIFIER_UNDO_COMMAND):
+        _pending_modifiers.append(modifier)
+        try:
+            getattr(maya.cmds, MODIFIER_UNDO_COMMAND)()
+        finally:
+            if modifier in _pending_modifiers:
+                _pending_modifiers.remove(modifier)
+        return
+
+    try:
+        modifier.doIt()
+    except RuntimeError:
+        modifier.undoIt()
+        raise
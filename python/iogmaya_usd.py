@@ -0,0 +1,360 @@
+# Copyright 2023 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Helpers shared by the USD nodes.
+
+Stages are opened into the shared UsdUtils StageCache, which
+mayaUsdProxyShape nodes can read from through their "stageCacheId"
+attribute. Proxies pointing at the same layer with the same load policy
+share a single stage instead of each opening their own. The stages opened
+by these helpers are erased from the StageCache when a scene is created or
+opened (and by release_stages()), along with the proxies using them.
+
+The ProxyStageCache remembers the stage of each proxy shape looked up by
+the nodes, so repeated lookups of the same proxy don't go through UFE.
+"""
+
+import maya.api.OpenMaya as OpenMaya
+
+import iogmaya_plugins
+
+
+USD_PLUGIN = "mayaUsdPlugin"
+PROXY_SHAPE_TYPE = "mayaUsdProxyShape"
+
+# Proxy shape attributes which change the stage a proxy holds.
+STAGE_ATTRIBUTES = ("filePath", "primPath", "stageCacheId", "shareStage",
+                    "loadPayloads")
+
+# The StageCache id of each stage opened by open_shared_stage(), keyed by
+# (layer path, load payloads).
+_shared_stage_ids = {}
+
+# The StageCache ids of the stages opened by open_masked_stage().
+_masked_stage_ids = []
+
+# MSceneMessage callbacks releasing the stages, installed when the first
+# stage is opened.
+_scene_callback_ids = []
+
+
+def get_stage_cache():
+    """
+    Return the StageCache shared with mayaUsd.
+    """
+    from pxr import UsdUtils
+    return UsdUtils.StageCache.Get()
+
+
+def open_shared_stage(filename, load_payloads=True):
+    """
+    Open a stage in the shared StageCache, reusing the stage opened by a
+    previous call for the same file and load policy if it is still cached.
+    Returns the stage's id in the cache as an integer.
+    """
+    from pxr import Usd
+    cache = get_stage_cache()
+    key = (filename, load_payloads)
+
+    stage_id = _shared_stage_ids.get(key)
+    if stage_id is not None and cache.Find(stage_id):
+        return stage_id.ToLongInt()
+
+    load = Usd.Stage.LoadAll if load_payloads else Usd.Stage.LoadNone
+    stage = Usd.Stage.Open(filename, load)
+    if not stage:
+        raise RuntimeError("Failed to open USD stage: '{}'.".format(
+                                                                filename))
+    stage_id = cache.Insert(stage)
+    _shared_stage_ids[key] = stage_id
+    _install_scene_callbacks()
+    return stage_id.ToLongInt()
+
+
+def release_stages():
+    """
+    Erase the stages opened by open_shared_stage() and open_masked_stage()
+    from the StageCache so they can be freed, i.e. once the scene using
+    them is closed.
+    """
+    if not _shared_stage_ids and not _masked_stage_ids:
+        return
+    cache = get_stage_cache()
+    for stage_id in list(_shared_stage_ids.values()) + _masked_stage_ids:
+        cache.Erase(stage_id)
+    _shared_stage_ids.clear()
+    del _masked_stage_ids[:]
+
+
+def _install_scene_callbacks():
+    if _scene_callback_ids:
+        return
+    for message in (OpenMaya.MSceneMessage.kBeforeNew,
+                    OpenMaya.MSceneMessage.kBeforeOpen):
+        _scene_callback_ids.append(OpenMaya.MSceneMessage.addCallback(
+                                                message, _scene_changed))
+
+
+def _scene_changed(client_data):
+    release_stages()
+
+
+def open_masked_stage(filename, population_mask=(), load_prims=(),
+                      unload_prims=(), load_payloads=True):
+    """
+    Open a stage limited to the prims in `population_mask` (all prims if it
+    is empty) with per-prim load rules, and insert it in the shared
+    StageCache. The stage is opened without loading any payloads and the
+    load rules are applied before anything is loaded, so only the requested
+    subtrees are ever composed.
+
+    If `load_prims` is given, only those prims (and their descendants) are
+    loaded; otherwise everything is loaded if `load_payloads` is True.
+    `unload_prims` are then unloaded. Returns the stage's id in the cache as
+    an integer. The stage is released when the scene changes, like the
+    stages of open_shared_stage().
+    """
+    from pxr import Sdf, Usd
+    mask = Usd.StagePopulationMask.All()
+    if population_mask:
+        mask = Usd.StagePopulationMask([Sdf.Path(path)
+                                        for path in population_mask])
+
+    stage = Usd.Stage.OpenMasked(filename, mask, Usd.Stage.LoadNone)
+    if not stage:
+        raise RuntimeError("Failed to open USD stage: '{}'.".format(
+                                                                filename))
+
+    if load_payloads and not load_prims:
+        rules = Usd.StageLoadRules.LoadAll()
+    else:
+        rules = Usd.StageLoadRules.LoadNone()
+    for path in load_prims:
+        rules.LoadWithDescendants(Sdf.Path(path))
+    for path in unload_prims:
+        rules.Unload(Sdf.Path(path))
+    rules.Minimize()
+    stage.SetLoadRules(rules)
+
+    stage_id = get_stage_cache().Insert(stage)
+    _masked_stage_ids.append(stage_id)
+    _install_scene_callbacks()
+    return stage_id.ToLongInt()
+
+
+def create_proxies(modifier, filenames, prim_paths, names, load_payloads=True,
+                   share_stages=True):
+    """
+    Queue the creation of a mayaUsdProxyShape (under its own transform) for
+    each file on the given MDagModifier, with the same setup as
+    mayaUsd_createStageFromFile. Returns the MObjects of the proxy shapes,
+    which are only valid once the modifier has been executed.
+    """
+    iogmaya_plugins.ensure_plugin(USD_PLUGIN)
+
+    time_plug = _find_plug("time1", "outTime")
+    shapes = []
+    for filename, prim_path, name in zip(filenames, prim_paths, names):
+        transform = modifier.createNode("transform")
+        shape = modifier.createNode(PROXY_SHAPE_TYPE, transform)
+        if name:
+            modifier.renameNode(shape, name)
+            modifier.renameNode(transform, _transform_name(name))
+
+        shape_fn = OpenMaya.MFnDependencyNode(shape)
+        modifier.newPlugValueBool(shape_fn.findPlug("loadPayloads", False),
+                                  load_payloads)
+        if filename:
+            modifier.newPlugValueString(shape_fn.findPlug("filePath", False),
+                                        filename)
+            if share_stages:
+                modifier.newPlugValueInt(
+                        shape_fn.findPlug("stageCacheId", False),
+                        open_shared_stage(filename, load_payloads))
+        if prim_path:
+            modifier.newPlugValueString(shape_fn.findPlug("primPath", False),
+                                        prim_path)
+        modifier.connect(time_plug, shape_fn.findPlug("time", False))
+        shapes.append(shape)
+    return shapes
+
+
+def _transform_name(shape_name):
+    # stageShape1 -> stage1, matching the nodes created by mayaUsd.
+    if "Shape" in shape_name:
+        return shape_name.replace("Shape", "", 1) or "stage"
+    return shape_name + "Transform"
+
+
+def _find_plug(node_name, attribute):
+    selection = OpenMaya.MSelectionList()
+    selection.add(node_name)
+    node_fn = OpenMaya.MFnDependencyNode(selection.getDependNode(0))
+    return node_fn.findPlug(attribute, False)
+
+
+class ProxyStageCache(object):
+    """
+    Cache of the stage held by each proxy shape, keyed by the shape's
+    MObjectHandle. An entry is dropped when one of the STAGE_ATTRIBUTES of
+    its shape is set, connected or disconnected, or the shape is deleted,
+    and the cache is cleared
+    when a scene is created or opened. Like the resolver, it must only be
+    used from the main thread.
+    """
+    def __init__(self):
+        # MObjectHandle hash code to (MObjectHandle, stage, callback ids).
+        self._stages = {}
+        self._scene_callback_ids = []
+
+        # Callbacks of dropped entries. They are removed outside of the
+        # callbacks themselves, on the next lookup.
+        self._stale_callback_ids = []
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get_stage(self, proxy_shape):
+        """
+        Return the stage held by a proxy shape (given by name or UUID).
+        """
+        from iogmaya_resolve import get_resolver
+        self._removeStaleCallbacks()
+        handle, long_name = get_resolver().resolve(proxy_shape)
+
+        entry = self._stages.get(handle.hashCode())
+        if entry is not None:
+            if entry[0].isValid() and entry[0] == handle:
+                self.hits += 1
+                return entry[1]
+
+            # The entry of a deleted node, or of another node with the same
+            # hash code. It is replaced below.
+            del self._stages[handle.hashCode()]
+            self._stale_callback_ids.extend(entry[2])
+
+        self.misses += 1
+        import mayaUsd.ufe
+        stage = mayaUsd.ufe.getStage(long_name)
+        if stage is None:
+            raise ValueError("Node: '{}' is not a USD proxy shape.".format(
+                                                                proxy_shape))
+        self._store(handle, stage)
+        return stage
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "entries": len(self._stages)
+        }
+
+    def clear(self):
+        for _, _, callback_ids in self._stages.values():
+            self._stale_callback_ids.extend(callback_ids)
+        self._stages.clear()
+
+    def uninstall(self):
+        """
+        Remove the Maya callbacks and clear the cache.
+        """
+        if self._scene_callback_ids:
+            OpenMaya.MMessage.removeCallbacks(self._scene_callback_ids)
+            self._scene_callback_ids = []
+        self.clear()
+        self._removeStaleCallbacks()
+
+    def _store(self, handle, stage):
+        self._installSceneCallbacks()
+        node = handle.object()
+        callback_ids = [
+            OpenMaya.MNodeMessage.addAttributeChangedCallback(
+                                            node, self._attributeChanged),
+            OpenMaya.MNodeMessage.addNodePreRemovalCallback(
+                                            node, self._nodeRemoved),
+        ]
+        self._stages[handle.hashCode()] = (handle, stage, callback_ids)
+
+    def _drop(self, node):
+        entry = self._stages.pop(OpenMaya.MObjectHandle(node).hashCode(),
+                                 None)
+        if entry is not None:
+            self._stale_callback_ids.extend(entry[2])
+            self.invalidations += 1
+
+    def _removeStaleCallbacks(self):
+        if self._stale_callback_ids:
+            OpenMaya.MMessage.removeCallbacks(self._stale_callback_ids)
+            self._stale_callback_ids = []
+
+    def _installSceneCallbacks(self):
+        if self._scene_callback_ids:
+            return
+
+        self._scene_callback_ids = [
+            OpenMaya.MSceneMessage.addCallback(
+                                            OpenMaya.MSceneMessage.kBeforeNew,
+                                            self._sceneChanged),
+            OpenMaya.MSceneMessage.addCallback(
+                                            OpenMaya.MSceneMessage.kBeforeOpen,
+                                            self._sceneChanged),
+        ]
+
+    def _attributeChanged(self, message, plug, other_plug, client_data):
+        changed = message & OpenMaya.MNodeMessage.kAttributeSet
+        if message & OpenMaya.MNodeMessage.kIncomingDirection:
+            # The attribute is now driven by (or no longer driven by)
+            # another node, i.e. a stageCacheId connected to a shared id.
+            changed = changed or message & (
+                                    OpenMaya.MNodeMessage.kConnectionMade |
+                                    OpenMaya.MNodeMessage.kConnectionBroken)
+        if not changed:
+            return
+        attribute = plug.partialName(useLongNames=True)
+        if attribute in STAGE_ATTRIBUTES:
+            self._drop(plug.node())
+
+    def _nodeRemoved(self, node, client_data):
+        self._drop(node)
+
+    def _sceneChanged(self, client_data):
+        self.clear()
+
+
+_proxy_stage_cache = None
+
+
+def get_proxy_stage_cache():
+    """
+    Return the ProxyStageCache shared by the nodes in this process.
+    """
+    global _proxy_stage_cache
+    if _proxy_stage_cache is None:
+        _proxy_stage_cache = ProxyStageCache()
+    return _proxy_stage_cache
+
+
+def uninstall_callbacks():
+    """
+    Remove the scene callbacks releasing the stages and the callbacks of
+    the shared ProxyStageCache (i.e. when the plugin is unloaded).
+    """
+    if _scene_callback_ids:
+        OpenMaya.MMessage.removeCallbacks(_scene_callback_ids)
+        del _scene_callback_ids[:]
+    if _proxy_stage_cache is not None:
+        _proxy_stage_cache.uninstall()
@@ -0,0 +1,25 @@
+# Copyright 2022 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+In-memory stand-in for the `maya` package. Add the tools/fakemaya directory
+to the PYTHONPATH to run the iograft Maya scripts with a regular Python
+interpreter (i.e. to exercise the subcore pool or benchmark nodes without a
+Maya license).
+
+maya.standalone, maya.cmds, maya.utils, maya.api.OpenMaya and
+maya.OpenMayaUI are provided. maya.cmds and maya.api.OpenMaya are backed by
+the in-memory scene in maya._scene. The sibling pxr and mayaUsd packages
+fake the parts of USD and mayaUsd used by the USD nodes.
+"""
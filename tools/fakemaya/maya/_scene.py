@@ -0,0 +1,330 @@
+# Copyright 2023 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+In-memory scene model backing the fake maya.cmds module.
+
+The model is intentionally simplified: node names are unique across the
+whole scene (so short names always resolve to a single node), attributes
+are stored as plain Python values and files are saved as JSON.
+
+Changes to the scene are reported to the functions in `Scene.listeners`
+(i.e. the fake OpenMaya messages) as `listener(event, *args)`:
+
+    "node_added" (node), "node_removed" (node), "name_changed" (node,
+    previous name), "parent_removed"/"parent_added" (node, parent or None),
+    "attribute_set" (node, attribute), "connection_made" (source node,
+    source attribute, destination node, destination attribute) and
+    "before_new"/"before_open" ().
+"""
+
+import collections
+import json
+import os
+import re
+import time
+import uuid
+
+
+# Per-call latency (in seconds) added to every maya.cmds call, used to model
+# the cost of a real Maya command.
+LATENCY_ENV = "IOGMAYA_FAKE_CMDS_LATENCY"
+
+# Node types which are shapes, and therefore get a transform parent when
+# they are created without one.
+SHAPE_TYPES = set(["mesh", "nurbsCurve", "camera", "locator",
+                   "mayaUsdProxyShape"])
+
+# Default attributes by node type. Compound attributes map to the names of
+# their children.
+COMPOUND_ATTRIBUTES = {
+    "translate": ("translateX", "translateY", "translateZ"),
+    "rotate": ("rotateX", "rotateY", "rotateZ"),
+    "scale": ("scaleX", "scaleY", "scaleZ"),
+    "shear": ("shearXY", "shearXZ", "shearYZ"),
+}
+TRANSFORM_ATTRIBUTES = {
+    "translateX": 0.0, "translateY": 0.0, "translateZ": 0.0,
+    "rotateX": 0.0, "rotateY": 0.0, "rotateZ": 0.0,
+    "scaleX": 1.0, "scaleY": 1.0, "scaleZ": 1.0,
+    "shearXY": 0.0, "shearXZ": 0.0, "shearYZ": 0.0,
+    "visibility": True, "inheritsTransform": True,
+}
+TYPE_ATTRIBUTES = {
+    "transform": TRANSFORM_ATTRIBUTES,
+    "mayaUsdProxyShape": {
+        "filePath": "", "primPath": "", "loadPayloads": True,
+        "shareStage": True, "stageCacheId": -1, "time": 0.0,
+        "visibility": True,
+    },
+    "time": {"outTime": 1.0},
+    "reference": {"fileName": "", "namespace": "", "loaded": False},
+}
+SHORT_ATTRIBUTE_NAMES = {
+    "t": "translate", "tx": "translateX", "ty": "translateY",
+    "tz": "translateZ", "r": "rotate", "rx": "rotateX", "ry": "rotateY",
+    "rz": "rotateZ", "s": "scale", "sx": "scaleX", "sy": "scaleY",
+    "sz": "scaleZ", "sh": "shear", "v": "visibility",
+}
+
+
+class Node(object):
+    __slots__ = ("name", "type", "parent", "children", "attributes", "uuid")
+
+    def __init__(self, name, node_type, parent=None):
+        self.name = name
+        self.type = node_type
+        self.parent = parent
+        self.children = []
+        self.attributes = dict(TYPE_ATTRIBUTES.get(node_type, {}))
+        self.uuid = str(uuid.uuid4()).upper()
+
+    @property
+    def is_dag(self):
+        return self.type == "transform" or self.type in SHAPE_TYPES
+
+    def path(self):
+        if not self.is_dag:
+            return self.name
+        parts = []
+        node = self
+        while node is not None:
+            parts.append(node.name)
+            node = node.parent
+        return "|" + "|".join(reversed(parts))
+
+
+class Scene(object):
+    def __init__(self):
+        self.latency = float(os.environ.get(LATENCY_ENV, "0"))
+        self.call_counts = collections.Counter()
+        self.loaded_plugins = set()
+        self.listeners = []
+        self.reset()
+
+    def notify(self, event, *args):
+        for listener in self.listeners:
+            listener(event, *args)
+
+    def reset(self, event="before_new"):
+        """
+        Replace the scene with an empty one, reporting `event` to the
+        listeners first.
+        """
+        self.notify(event)
+        self.nodes = collections.OrderedDict()
+        self.name_counters = collections.Counter()
+        self.selection = []
+        self.namespaces = set()
+        self.connections = []
+        self.scene_name = ""
+        self.modified = False
+
+        # Nodes which exist in every scene.
+        self.add_node("time1", "time")
+
+    # Call accounting.
+    def record_call(self, command):
+        self.call_counts[command] += 1
+        if self.latency > 0:
+            # Sleep is too coarse for sub-millisecond latencies.
+            end_time = time.time() + self.latency
+            while time.time() < end_time:
+                pass
+
+    # Node management.
+    def unique_name(self, name):
+        if name not in self.nodes:
+            return name
+
+        base = re.sub(r"\d+$", "", name)
+        while True:
+            self.name_counters[base] += 1
+            candidate = "{}{}".format(base, self.name_counters[base])
+            if candidate not in self.nodes:
+                return candidate
+
+    def add_node(self, name, node_type, parent=None):
+        return self.insert_node(Node(name, node_type), parent)
+
+    def insert_node(self, node, parent=None):
+        """
+        Add a node created outside of the scene (i.e. by a modifier) under
+        `parent`, renaming it if its name is taken.
+        """
+        node.name = self.unique_name(node.name)
+        node.parent = parent
+        self.nodes[node.name] = node
+        if parent is not None:
+            parent.children.append(node)
+        self.modified = True
+        self.notify("node_added", node)
+        return node
+
+    def exists(self, node):
+        return self.nodes.get(node.name) is node
+
+    def delete_node(self, node):
+        for child in list(node.children):
+            self.delete_node(child)
+        self.notify("node_removed", node)
+        if node.parent is not None:
+            node.parent.children.remove(node)
+        self.nodes.pop(node.name, None)
+        if node in self.selection:
+            self.selection.remove(node)
+        self.modified = True
+
+    def rename_node(self, node, name):
+        previous_name = node.name
+        if name == previous_name:
+            return
+        del self.nodes[previous_name]
+        node.name = self.unique_name(name)
+        self.nodes[node.name] = node
+        self.modified = True
+        self.notify("name_changed", node, previous_name)
+
+    def reparent(self, node, parent):
+        self.notify("parent_removed", node, node.parent)
+        if node.parent is not None:
+            node.parent.children.remove(node)
+        node.parent = parent
+        if parent is not None:
+            parent.children.append(node)
+        self.modified = True
+        self.notify("parent_added", node, parent)
+
+    def set_attribute(self, node, attribute, value):
+        node.attributes[attribute] = value
+        self.modified = True
+        self.notify("attribute_set", node, attribute)
+
+    def connect(self, source, destination):
+        """
+        Connect two plugs given as "node.attribute".
+        """
+        self.connections.append((source, destination))
+        source_node, source_attribute = self.split_plug(source)
+        destination_node, destination_attribute = self.split_plug(
+                                                            destination)
+        self.notify("connection_made", source_node, source_attribute,
+                    destination_node, destination_attribute)
+
+    def find(self, name):
+        """
+        Return the node matching a name, partial or full DAG path, or None.
+        """
+        if not name:
+            return None
+        if "|" not in name:
+            return self.nodes.get(name)
+
+        node = self.nodes.get(name.rsplit("|", 1)[-1])
+        if node is None:
+            return None
+        path = node.path()
+        if path == name or path.endswith("|" + name.lstrip("|")):
+            return node
+        return None
+
+    def find_by_uuid(self, node_uuid):
+        for node in self.nodes.values():
+            if node.uuid == node_uuid:
+                return node
+        return None
+
+    def split_plug(self, plug):
+        """
+        Split "node.attribute" into the node and attribute name. Returns
+        (None, None) if the node does not exist.
+        """
+        name, _, attribute = plug.partition(".")
+        node = self.find(name)
+        if node is None:
+            return None, None
+        return node, SHORT_ATTRIBUTE_NAMES.get(attribute, attribute)
+
+    def populate(self, num_nodes, depth=3):
+        """
+        Build a scene of `num_nodes` transforms arranged in hierarchies
+        `depth` levels deep.
+        """
+        self.reset()
+        parents = [None]
+        for i in range(num_nodes):
+            parent = parents[-1] if len(parents) <= depth else None
+            node = self.add_node("node{}".format(i), "transform", parent)
+            if parent is None:
+                parents = [None, node]
+            else:
+                parents.append(node)
+        self.modified = False
+
+    # Files.
+    def serialize(self, nodes=None):
+        if nodes is None:
+            nodes = [node for node in self.nodes.values()
+                     if node.name != "time1"]
+        else:
+            # Include the descendants of the exported nodes.
+            expanded = []
+            stack = list(nodes)
+            while stack:
+                node = stack.pop()
+                expanded.append(node)
+                stack.extend(node.children)
+            nodes = expanded
+
+        exported = set(node.name for node in nodes)
+        return {
+            "nodes": [{
+                "name": node.name,
+                "type": node.type,
+                "parent": node.parent.name if (
+                    node.parent is not None and
+                    node.parent.name in exported) else None,
+                "attributes": node.attributes,
+            } for node in nodes]
+        }
+
+    def write(self, filename, nodes=None):
+        with open(filename, "w") as scene_file:
+            json.dump(self.serialize(nodes), scene_file)
+
+    def read(self, filename, namespace=""):
+        """
+        Add the nodes stored in a file to the scene. Returns the new nodes.
+        """
+        with open(filename) as scene_file:
+            contents = json.load(scene_file)
+
+        prefix = namespace + ":" if namespace else ""
+        if namespace:
+            self.namespaces.add(namespace)
+
+        created = {}
+        new_nodes = []
+        for entry in contents["nodes"]:
+            parent = created.get(entry["parent"])
+            node = self.add_node(prefix + entry["name"], entry["type"],
+                                 parent)
+            node.attributes.update(entry["attributes"])
+            created[entry["name"]] = node
+            new_nodes.append(node)
+        return new_nodes
+
+
+# The scene shared by the fake maya modules.
+scene = Scene()
@@ -0,0 +1,1327 @@
+# Copyright 2023 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Fake maya.api.OpenMaya backed by the in-memory scene in maya._scene. Only
+the classes, methods and constants used by the iograft Maya nodes are
+implemented:
+
+- MObject/MObjectHandle/MDagPath wrap the scene's nodes (there is no
+  instancing, so every DAG node has a single path),
+- MPlug reads and writes the node's attribute values,
+- MDGModifier/MDagModifier queue their operations until doIt(),
+- The message classes register callbacks on the scene's change events,
+- The math classes support the transforms used to keep world space
+  positions when reparenting (translate, rotate and scale; no pivots).
+
+Angles are stored in radians, which the fake also reports as the UI unit.
+Unlike maya.cmds, the calls are not counted or delayed.
+"""
+
+import collections
+import itertools
+import math
+import sys
+
+from maya._scene import (COMPOUND_ATTRIBUTES, SHAPE_TYPES,
+                         SHORT_ATTRIBUTE_NAMES, Node, scene)
+
+
+if sys.version_info[0] >= 3:
+    _string_types = (str,)
+else:
+    _string_types = (basestring,)
+
+
+class MFn(object):
+    kInvalid = 0
+    kBase = 1
+    kDependencyNode = 4
+    kDagNode = 107
+    kTransform = 110
+    kJoint = 121
+    kShape = 248
+    kAttribute = 554
+    kNumericAttribute = 555
+    kCompoundAttribute = 556
+    kDoubleAngleAttribute = 558
+    kDoubleLinearAttribute = 560
+    kEnumAttribute = 561
+    kFloatAngleAttribute = 562
+    kFloatLinearAttribute = 563
+    kMatrixAttribute = 566
+    kFloatMatrixAttribute = 567
+    kMessageAttribute = 568
+    kTimeAttribute = 569
+    kTypedAttribute = 570
+    kData = 579
+    kMatrixData = 581
+
+
+class MSpace(object):
+    kInvalid = 0
+    kTransform = 1
+    kPreTransform = 2
+    kPostTransform = 3
+    kWorld = 4
+    kObject = kPreTransform
+
+
+#
+# Objects.
+#
+class _Attribute(object):
+    # Describes an attribute, inferred from its name and value.
+    __slots__ = ("name", "api_type", "numeric_type", "data_type")
+
+    def __init__(self, name, value):
+        self.name = name
+        self.numeric_type = MFnNumericData.kInvalid
+        self.data_type = MFnData.kInvalid
+        if name in COMPOUND_ATTRIBUTES:
+            self.api_type = MFn.kCompoundAttribute
+        elif name in ("translateX", "translateY", "translateZ"):
+            self.api_type = MFn.kDoubleLinearAttribute
+        elif name in ("rotateX", "rotateY", "rotateZ"):
+            self.api_type = MFn.kDoubleAngleAttribute
+        elif name in ("time", "outTime"):
+            self.api_type = MFn.kTimeAttribute
+        elif isinstance(value, bool):
+            self.api_type = MFn.kNumericAttribute
+            self.numeric_type = MFnNumericData.kBoolean
+        elif isinstance(value, int):
+            self.api_type = MFn.kNumericAttribute
+            self.numeric_type = MFnNumericData.kInt
+        elif isinstance(value, float):
+            self.api_type = MFn.kNumericAttribute
+            self.numeric_type = MFnNumericData.kDouble
+        elif isinstance(value, (list, tuple)) and len(value) == 16:
+            self.api_type = MFn.kMatrixAttribute
+        else:
+            self.api_type = MFn.kTypedAttribute
+            self.data_type = (MFnData.kString
+                              if isinstance(value, _string_types)
+                              else MFnData.kAny)
+
+
+def _node_fns(node):
+    fns = set([MFn.kBase, MFn.kDependencyNode])
+    if node.is_dag:
+        fns.add(MFn.kDagNode)
+        if node.type in SHAPE_TYPES:
+            fns.add(MFn.kShape)
+        else:
+            fns.add(MFn.kTransform)
+            if node.type == "joint":
+                fns.add(MFn.kJoint)
+    return fns
+
+
+class MObject(object):
+    """
+    A node, an attribute or a data object (or nothing).
+    """
+    kNullObj = None
+
+    def __init__(self, other=None, _node=None, _attribute=None, _data=None):
+        if other is not None:
+            _node, _attribute, _data = (other._node, other._attribute,
+                                        other._data)
+        self._node = _node
+        self._attribute = _attribute
+        self._data = _data
+
+    def isNull(self):
+        return (self._node is None and self._attribute is None and
+                self._data is None)
+
+    def apiType(self):
+        if self._attribute is not None:
+            return self._attribute.api_type
+        if self._data is not None:
+            return MFn.kMatrixData
+        if self._node is not None:
+            if MFn.kJoint in _node_fns(self._node):
+                return MFn.kJoint
+            if self._node.is_dag:
+                return (MFn.kShape if self._node.type in SHAPE_TYPES
+                        else MFn.kTransform)
+            return MFn.kDependencyNode
+        return MFn.kInvalid
+
+    def hasFn(self, fn):
+        if self._node is not None:
+            return fn in _node_fns(self._node)
+        return fn == self.apiType()
+
+    def __eq__(self, other):
+        return (isinstance(other, MObject) and
+                self._node is other._node and
+                self._attribute is other._attribute and
+                self._data is other._data)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+
+MObject.kNullObj = MObject()
+
+
+def _to_node(node, required=True):
+    # Accept an MObject or MDagPath for a node.
+    if isinstance(node, MDagPath):
+        node = node._node
+    elif isinstance(node, MObject):
+        node = node._node
+    if node is None and required:
+        raise RuntimeError("(kInvalidParameter): Object is incompatible"
+                           " with this method")
+    return node
+
+
+class MObjectHandle(object):
+    def __init__(self, node=None):
+        self._node = _to_node(node, required=False) if node else None
+
+    def isValid(self):
+        return self._node is not None and scene.exists(self._node)
+
+    def isAlive(self):
+        return self.isValid()
+
+    def object(self):
+        if not self.isValid():
+            return MObject()
+        return MObject(_node=self._node)
+
+    def hashCode(self):
+        return id(self._node)
+
+    def __eq__(self, other):
+        return isinstance(other, MObjectHandle) and \
+            self._node is other._node
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return self.hashCode()
+
+
+class MUuid(object):
+    def __init__(self, value=""):
+        self._value = value
+
+    def asString(self):
+        return self._value
+
+    def valid(self):
+        return bool(self._value)
+
+
+class MDagPath(object):
+    def __init__(self, other=None):
+        self._node = other._node if other is not None else None
+
+    @staticmethod
+    def getAPathTo(node):
+        node = _to_node(node)
+        if not node.is_dag:
+            raise RuntimeError("(kInvalidParameter): Object is incompatible"
+                               " with this method")
+        path = MDagPath()
+        path._node = node
+        return path
+
+    def isValid(self):
+        return self._node is not None and scene.exists(self._node)
+
+    def fullPathName(self):
+        return self._node.path() if self._node is not None else ""
+
+    def partialPathName(self):
+        # Node names are unique in the fake scene.
+        return self._node.name if self._node is not None else ""
+
+    def length(self):
+        length = 0
+        node = self._node
+        while node is not None:
+            length += 1
+            node = node.parent
+        return length
+
+    def pop(self, num=1):
+        for _ in range(num):
+            if self._node is None:
+                raise RuntimeError("(kInvalidParameter): Path is already"
+                                   " at the world")
+            self._node = self._node.parent
+        return self
+
+    def node(self):
+        return MObject(_node=self._node)
+
+    def transform(self):
+        node = self._node
+        if node is not None and node.type in SHAPE_TYPES:
+            node = node.parent
+        return MObject(_node=node)
+
+    def apiType(self):
+        return self.node().apiType()
+
+    def hasFn(self, fn):
+        return self.node().hasFn(fn)
+
+    def inclusiveMatrix(self):
+        matrix = MMatrix()
+        node = self._node
+        while node is not None:
+            matrix = matrix * _local_matrix(node)
+            node = node.parent
+        return matrix
+
+    def inclusiveMatrixInverse(self):
+        return self.inclusiveMatrix().inverse()
+
+    def exclusiveMatrix(self):
+        if self._node is None:
+            return MMatrix()
+        return MDagPath(self).pop().inclusiveMatrix()
+
+    def exclusiveMatrixInverse(self):
+        return self.exclusiveMatrix().inverse()
+
+    def __eq__(self, other):
+        return isinstance(other, MDagPath) and self._node is other._node
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+
+#
+# Plugs.
+#
+def _base_name(name):
+    return name.split("[", 1)[0]
+
+
+class MPlug(object):
+    def __init__(self, other=None):
+        self._node = other._node if other is not None else None
+        self._name = other._name if other is not None else ""
+
+    @classmethod
+    def _make(cls, node, name):
+        plug = cls()
+        plug._node = node
+        plug._name = name
+        return plug
+
+    @property
+    def isNull(self):
+        return self._node is None
+
+    @property
+    def isArray(self):
+        return False
+
+    @property
+    def isElement(self):
+        return "[" in self._name
+
+    @property
+    def isCompound(self):
+        return _base_name(self._name) in COMPOUND_ATTRIBUTES
+
+    @property
+    def isLocked(self):
+        return False
+
+    @property
+    def isDestination(self):
+        return any(self._matches(destination)
+                   for _, destination in scene.connections)
+
+    @property
+    def isSource(self):
+        return any(self._matches(source)
+                   for source, _ in scene.connections)
+
+    def _matches(self, plug_name):
+        node, attribute = scene.split_plug(plug_name)
+        return node is self._node and attribute == self._name
+
+    def node(self):
+        return MObject(_node=self._node)
+
+    def attribute(self):
+        return MObject(_attribute=_Attribute(_base_name(self._name),
+                                             self._get()))
+
+    def name(self):
+        return "{}.{}".format(self._node.name, self._name)
+
+    def partialName(self, includeNodeName=False, **kwargs):
+        if includeNodeName:
+            return self.name()
+        return self._name
+
+    def numChildren(self):
+        return len(COMPOUND_ATTRIBUTES.get(_base_name(self._name), ()))
+
+    def child(self, index):
+        children = COMPOUND_ATTRIBUTES.get(_base_name(self._name), ())
+        if isinstance(index, MObject):
+            attribute = index._attribute
+            if attribute is None or attribute.name not in children:
+                raise RuntimeError("(kInvalidParameter): Attribute is not a"
+                                   " child of this plug")
+            return MPlug._make(self._node, attribute.name)
+        return MPlug._make(self._node, children[index])
+
+    def numElements(self):
+        return 0
+
+    def elementByLogicalIndex(self, index):
+        return MPlug._make(self._node, "{}[{}]".format(self._name, index))
+
+    def _get(self):
+        if self.isCompound:
+            return None
+        return self._node.attributes.get(self._name, 0.0)
+
+    def asDouble(self):
+        return float(self._get())
+
+    asFloat = asDouble
+
+    def asInt(self):
+        return int(self._get())
+
+    asShort = asInt
+
+    def asBool(self):
+        return bool(self._get())
+
+    def asString(self):
+        return str(self._get())
+
+    def asMDistance(self):
+        return MDistance(self.asDouble())
+
+    def asMAngle(self):
+        return MAngle(self.asDouble())
+
+    def asMTime(self):
+        return MTime(self.asDouble())
+
+    def asMObject(self):
+        value = self._get()
+        if not isinstance(value, (list, tuple)):
+            raise RuntimeError("(kFailure): Unexpected Internal Failure")
+        return MObject(_data=MMatrix(value))
+
+    def __eq__(self, other):
+        return (isinstance(other, MPlug) and self._node is other._node and
+                self._name == other._name)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+
+class MDistance(object):
+    kInvalid = 0
+    kInches = 1
+    kFeet = 2
+    kYards = 3
+    kMiles = 4
+    kMillimeters = 5
+    kCentimeters = 6
+    kKilometers = 7
+    kMeters = 8
+
+    def __init__(self, value=0.0, unit=kCentimeters):
+        self.value = value
+        self.unit = unit
+
+    @staticmethod
+    def uiUnit():
+        return MDistance.kCentimeters
+
+    def asUnits(self, unit):
+        return self.value
+
+
+class MAngle(object):
+    kInvalid = 0
+    kRadians = 1
+    kDegrees = 2
+
+    def __init__(self, value=0.0, unit=kRadians):
+        self.value = value
+        self.unit = unit
+
+    @staticmethod
+    def uiUnit():
+        return MAngle.kRadians
+
+    def asUnits(self, unit):
+        return self.value
+
+
+class MTime(object):
+    kInvalid = 0
+    kFilm = 6
+
+    def __init__(self, value=0.0, unit=kFilm):
+        self.value = value
+        self.unit = unit
+
+    @staticmethod
+    def uiUnit():
+        return MTime.kFilm
+
+    def asUnits(self, unit):
+        return self.value
+
+
+class MFnBase(object):
+    def __init__(self, obj=None):
+        self._object = None
+        if obj is not None:
+            self.setObject(obj)
+
+    def setObject(self, obj):
+        self._object = obj
+        return self
+
+    def object(self):
+        return self._object
+
+
+class MFnDependencyNode(MFnBase):
+    @property
+    def _node(self):
+        return _to_node(self._object)
+
+    def name(self):
+        return self._node.name
+
+    @property
+    def typeName(self):
+        return self._node.type
+
+    def uuid(self):
+        return MUuid(self._node.uuid)
+
+    def _attribute_name(self, name):
+        name = SHORT_ATTRIBUTE_NAMES.get(name, name)
+        attributes = self._node.attributes
+        if name in attributes:
+            return name
+        children = COMPOUND_ATTRIBUTES.get(name)
+        if children and all(child in attributes for child in children):
+            return name
+        return None
+
+    def hasAttribute(self, name):
+        return self._attribute_name(name) is not None
+
+    def attribute(self, name):
+        name = self._attribute_name(name)
+        if name is None:
+            return MObject()
+        return MObject(_attribute=_Attribute(
+                                name, self._node.attributes.get(name)))
+
+    def findPlug(self, attribute, wantNetworkedPlug=False):
+        if isinstance(attribute, MObject):
+            attribute = attribute._attribute.name
+        name = self._attribute_name(attribute)
+        if name is None:
+            raise RuntimeError("(kInvalidParameter): No element at given"
+                               " index")
+        return MPlug._make(self._node, name)
+
+
+class MFnNumericData(MFnBase):
+    kInvalid = 0
+    kBoolean = 1
+    kByte = 2
+    kChar = 3
+    kShort = 4
+    kInt = 7
+    kFloat = 11
+    kDouble = 14
+    k3Double = 17
+    kAddr = 19
+
+
+class MFnData(MFnBase):
+    kInvalid = 0
+    kNumeric = 1
+    kPlugin = 2
+    kPluginGeometry = 3
+    kString = 4
+    kMatrix = 5
+    kAny = 24
+
+
+class MFnNumericAttribute(MFnBase):
+    def numericType(self):
+        return self._object._attribute.numeric_type
+
+
+class MFnTypedAttribute(MFnBase):
+    def attrType(self):
+        return self._object._attribute.data_type
+
+
+class MFnMatrixData(MFnBase):
+    def create(self, matrix=None):
+        self._object = MObject(_data=MMatrix(matrix))
+        return self._object
+
+    def matrix(self):
+        return MMatrix(self._object._data)
+
+
+class MFnTransform(MFnDependencyNode):
+    @property
+    def inheritsTransform(self):
+        return bool(self._node.attributes.get("inheritsTransform", True))
+
+    def transformation(self):
+        return _node_transformation(self._node)
+
+
+#
+# Modifiers.
+#
+class MDGModifier(object):
+    """
+    Queues operations until doIt() is called. Nodes created by the modifier
+    can be used (i.e. to find their plugs) before they are added to the
+    scene.
+    """
+    def __init__(self):
+        # (do, undo) function pairs, and the number of operations done.
+        self._operations = []
+        self._done = 0
+
+    def _queue(self, do, undo):
+        self._operations.append((do, undo))
+
+    def doIt(self):
+        while self._done < len(self._operations):
+            self._operations[self._done][0]()
+            self._done += 1
+
+    def undoIt(self):
+        while self._done > 0:
+            self._done -= 1
+            self._operations[self._done][1]()
+
+    def _create(self, node_type, parent=None):
+        node = Node(node_type + "1", node_type)
+        self._queue(lambda: scene.insert_node(node, parent),
+                    lambda: scene.delete_node(node))
+        return node
+
+    def createNode(self, node_type):
+        return MObject(_node=self._create(node_type))
+
+    def deleteNode(self, node):
+        node = _to_node(node)
+        parent = node.parent
+        self._queue(lambda: scene.delete_node(node),
+                    lambda: scene.insert_node(node, parent))
+
+    def renameNode(self, node, name):
+        node = _to_node(node)
+        previous_name = []
+
+        def rename():
+            previous_name.append(node.name)
+            scene.rename_node(node, name)
+
+        self._queue(rename,
+                    lambda: scene.rename_node(node, previous_name.pop()))
+
+    def _setValue(self, plug, value):
+        node, name = plug._node, plug._name
+        previous_value = []
+
+        def set_value():
+            previous_value.append(node.attributes.get(name))
+            scene.set_attribute(node, name, value)
+
+        self._queue(set_value,
+                    lambda: scene.set_attribute(node, name,
+                                                previous_value.pop()))
+
+    def newPlugValueBool(self, plug, value):
+        self._setValue(plug, bool(value))
+
+    def newPlugValueInt(self, plug, value):
+        self._setValue(plug, int(value))
+
+    newPlugValueShort = newPlugValueInt
+
+    def newPlugValueDouble(self, plug, value):
+        self._setValue(plug, float(value))
+
+    newPlugValueFloat = newPlugValueDouble
+
+    def newPlugValueString(self, plug, value):
+        self._setValue(plug, value)
+
+    def newPlugValueMDistance(self, plug, value):
+        self._setValue(plug, value.asUnits(MDistance.uiUnit()))
+
+    def newPlugValueMAngle(self, plug, value):
+        self._setValue(plug, value.asUnits(MAngle.uiUnit()))
+
+    def newPlugValueMTime(self, plug, value):
+        self._setValue(plug, value.asUnits(MTime.uiUnit()))
+
+    def newPlugValue(self, plug, value):
+        self._setValue(plug, list(value._data))
+
+    def connect(self, source, destination):
+        names = []
+
+        def connect():
+            names.append((source.name(), destination.name()))
+            scene.connect(*names[-1])
+
+        self._queue(connect,
+                    lambda: scene.connections.remove(names.pop()))
+
+
+class MDagModifier(MDGModifier):
+    def createNode(self, node_type, parent=None):
+        parent = _to_node(parent, required=False) if parent else None
+
+        # Like Maya, a shape created without a parent gets a transform and
+        # the transform is returned.
+        if parent is None and node_type in SHAPE_TYPES:
+            transform = self._create("transform")
+            self._create(node_type, transform)
+            return MObject(_node=transform)
+        return MObject(_node=self._create(node_type, parent))
+
+    def reparentNode(self, node, newParent=None):
+        node = _to_node(node)
+        parent = _to_node(newParent, required=False) if newParent else None
+        previous_parent = []
+
+        def reparent():
+            previous_parent.append(node.parent)
+            scene.reparent(node, parent)
+
+        self._queue(reparent,
+                    lambda: scene.reparent(node, previous_parent.pop()))
+
+
+#
+# Selection.
+#
+def _selection_key(item):
+    if isinstance(item, MPlug):
+        return (id(item._node), item._name)
+    return id(item)
+
+
+class MSelectionList(object):
+    """
+    Holds scene nodes and MPlugs.
+    """
+    def __init__(self, other=None):
+        self._items = []
+        self._keys = set()
+        if other is not None:
+            self._setItems(other._items)
+
+    def _setItems(self, items):
+        self._items = list(items)
+        self._keys = set(_selection_key(item) for item in self._items)
+
+    def add(self, item, mergeWithExisting=True):
+        if isinstance(item, _string_types):
+            item = self._parse(item)
+        elif isinstance(item, (MObject, MDagPath)):
+            item = _to_node(item)
+        elif isinstance(item, MPlug):
+            item = MPlug(item)
+
+        key = _selection_key(item)
+        if not (mergeWithExisting and key in self._keys):
+            self._items.append(item)
+            self._keys.add(key)
+        return self
+
+    @staticmethod
+    def _parse(name):
+        node_name, _, attribute = name.partition(".")
+        node = scene.find(node_name)
+        if node is None:
+            raise RuntimeError("(kInvalidParameter): Object does not exist")
+        if not attribute:
+            return node
+
+        plug = None
+        node_fn = MFnDependencyNode(MObject(_node=node))
+        for element in attribute.split("."):
+            element_name, _, index = element.partition("[")
+            if plug is None:
+                plug = node_fn.findPlug(element_name)
+            else:
+                plug = plug.child(node_fn.attribute(element_name))
+            if index:
+                plug = plug.elementByLogicalIndex(int(index.rstrip("]")))
+        return plug
+
+    def clear(self):
+        self._items = []
+        self._keys = set()
+
+    def length(self):
+        return len(self._items)
+
+    def isEmpty(self):
+        return not self._items
+
+    def _node(self, index):
+        item = self._items[index]
+        return item._node if isinstance(item, MPlug) else item
+
+    def getDependNode(self, index):
+        return MObject(_node=self._node(index))
+
+    def getDagPath(self, index):
+        return MDagPath.getAPathTo(MObject(_node=self._node(index)))
+
+    def getPlug(self, index):
+        item = self._items[index]
+        if not isinstance(item, MPlug):
+            raise RuntimeError("(kInvalidParameter): Item is not a plug")
+        return MPlug(item)
+
+    def getSelectionStrings(self):
+        return [item.name() if isinstance(item, MPlug) else item.name
+                for item in self._items]
+
+
+class MGlobal(object):
+    kReplaceList = 0
+    kAddToList = 2
+
+    @staticmethod
+    def getActiveSelectionList(orderedSelectionIfAvailable=False):
+        selection = MSelectionList()
+        selection._setItems(scene.selection)
+        return selection
+
+    @staticmethod
+    def setActiveSelectionList(selection, listAdjustment=kReplaceList):
+        nodes = [item._node if isinstance(item, MPlug) else item
+                 for item in selection._items]
+        if listAdjustment == MGlobal.kAddToList:
+            nodes = scene.selection + [node for node in nodes
+                                       if node not in scene.selection]
+        scene.selection = nodes
+
+    @staticmethod
+    def displayInfo(message):
+        sys.stdout.write("{}\n".format(message))
+
+    @staticmethod
+    def displayWarning(message):
+        sys.stderr.write("Warning: {}\n".format(message))
+
+    @staticmethod
+    def displayError(message):
+        sys.stderr.write("Error: {}\n".format(message))
+
+
+#
+# Messages.
+#
+_callback_ids = itertools.count(1)
+
+# Event to {callback id: (node, function, client data)}, and the event of
+# each callback id.
+_callbacks = collections.defaultdict(dict)
+_callback_events = {}
+
+
+def _add_callback(event, func, client_data, node=None):
+    callback_id = next(_callback_ids)
+    _callbacks[event][callback_id] = (node, func, client_data)
+    _callback_events[callback_id] = event
+    return callback_id
+
+
+def _run_callbacks(event, node, *args):
+    callbacks = _callbacks.get(event)
+    if not callbacks:
+        return
+    for callback_id, (filter_node, func, client_data) in \
+            list(callbacks.items()):
+        if callback_id not in callbacks:
+            continue
+        if filter_node is not None and filter_node is not node:
+            continue
+        func(*(args + (client_data,)))
+
+
+def _dag_path(node):
+    path = MDagPath()
+    path._node = node
+    return path
+
+
+def _dispatch(event, *args):
+    if event == "node_added":
+        _run_callbacks("node_added", None, MObject(_node=args[0]))
+    elif event == "node_removed":
+        node = MObject(_node=args[0])
+        _run_callbacks("pre_removal", args[0], node)
+        _run_callbacks("node_removed", None, node)
+    elif event == "name_changed":
+        node = MObject(_node=args[0])
+        _run_callbacks("name_changed", None, node, args[1])
+        _run_callbacks("node_name_changed", args[0], node, args[1])
+    elif event in ("parent_added", "parent_removed"):
+        _run_callbacks(event, None, _dag_path(args[0]), _dag_path(args[1]))
+    elif event == "attribute_set":
+        _run_callbacks("attribute_changed", args[0],
+                       MNodeMessage.kAttributeSet,
+                       MPlug._make(args[0], args[1]), MPlug())
+    elif event == "connection_made":
+        source = MPlug._make(args[0], args[1])
+        destination = MPlug._make(args[2], args[3])
+        _run_callbacks("attribute_changed", args[0],
+                       MNodeMessage.kConnectionMade |
+                       MNodeMessage.kOtherPlugSet, source, destination)
+        _run_callbacks("attribute_changed", args[2],
+                       MNodeMessage.kConnectionMade |
+                       MNodeMessage.kOtherPlugSet |
+                       MNodeMessage.kIncomingDirection, destination, source)
+    else:
+        _run_callbacks(event, None)
+
+
+scene.listeners.append(_dispatch)
+
+
+class MMessage(object):
+    @staticmethod
+    def removeCallback(callback_id):
+        event = _callback_events.pop(callback_id, None)
+        if event is None:
+            raise RuntimeError("(kInvalidParameter): Invalid callback id")
+        del _callbacks[event][callback_id]
+
+    @staticmethod
+    def removeCallbacks(callback_ids):
+        for callback_id in callback_ids:
+            MMessage.removeCallback(callback_id)
+
+
+class MDGMessage(MMessage):
+    @staticmethod
+    def addNodeAddedCallback(func, nodeType="dependNode", clientData=None):
+        return _add_callback("node_added", func, clientData)
+
+    @staticmethod
+    def addNodeRemovedCallback(func, nodeType="dependNode", clientData=None):
+        return _add_callback("node_removed", func, clientData)
+
+
+class MNodeMessage(MMessage):
+    kConnectionMade = 1
+    kConnectionBroken = 2
+    kAttributeEval = 4
+    kAttributeSet = 8
+    kAttributeLocked = 16
+    kAttributeUnlocked = 32
+    kAttributeAdded = 64
+    kAttributeRemoved = 128
+    kAttributeRenamed = 256
+    kAttributeKeyable = 512
+    kAttributeUnkeyable = 1024
+    kIncomingDirection = 2048
+    kAttributeArrayAdded = 4096
+    kAttributeArrayRemoved = 8192
+    kOtherPlugSet = 16384
+
+    @staticmethod
+    def addNameChangedCallback(node, func, clientData=None):
+        node = _to_node(node, required=False)
+        if node is None:
+            return _add_callback("name_changed", func, clientData)
+        return _add_callback("node_name_changed", func, clientData, node)
+
+    @staticmethod
+    def addAttributeChangedCallback(node, func, clientData=None):
+        return _add_callback("attribute_changed", func, clientData,
+                             _to_node(node))
+
+    @staticmethod
+    def addNodePreRemovalCallback(node, func, clientData=None):
+        return _add_callback("pre_removal", func, clientData,
+                             _to_node(node))
+
+
+class MDagMessage(MMessage):
+    @staticmethod
+    def addParentAddedCallback(func, clientData=None):
+        return _add_callback("parent_added", func, clientData)
+
+    @staticmethod
+    def addParentRemovedCallback(func, clientData=None):
+        return _add_callback("parent_removed", func, clientData)
+
+
+class MSceneMessage(MMessage):
+    kSceneUpdate = 0
+    kBeforeNew = 1
+    kAfterNew = 2
+    kBeforeImport = 3
+    kAfterImport = 4
+    kBeforeOpen = 5
+    kAfterOpen = 6
+    kMayaExiting = 13
+
+    _EVENTS = {kBeforeNew: "before_new", kBeforeOpen: "before_open",
+               kMayaExiting: "maya_exiting"}
+
+    @staticmethod
+    def addCallback(message, func, clientData=None):
+        event = MSceneMessage._EVENTS.get(message,
+                                          "scene_message_{}".format(message))
+        return _add_callback(event, func, clientData)
+
+
+#
+# Math.
+#
+class MVector(object):
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        if not isinstance(x, (int, float)):
+            x, y, z = list(x)[:3]
+        self.x, self.y, self.z = float(x), float(y), float(z)
+
+    def __getitem__(self, index):
+        return (self.x, self.y, self.z)[index]
+
+    def __len__(self):
+        return 3
+
+    def __iter__(self):
+        return iter((self.x, self.y, self.z))
+
+    def __add__(self, other):
+        return MVector(self.x + other[0], self.y + other[1],
+                       self.z + other[2])
+
+    def __sub__(self, other):
+        return MVector(self.x - other[0], self.y - other[1],
+                       self.z - other[2])
+
+    def __mul__(self, scalar):
+        return MVector(self.x * scalar, self.y * scalar, self.z * scalar)
+
+    def length(self):
+        return math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
+
+
+class MMatrix(object):
+    """
+    4x4 matrix of row vectors (the translation is in the last row), like
+    Maya's.
+    """
+    def __init__(self, values=None):
+        if values is None:
+            values = [1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0,
+                      0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0]
+        values = list(values)
+        if len(values) == 4:
+            values = [value for row in values for value in row]
+        self._values = [float(value) for value in values]
+
+    def __getitem__(self, index):
+        return self._values[index]
+
+    def __len__(self):
+        return 16
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def getElement(self, row, column):
+        return self._values[row * 4 + column]
+
+    def setElement(self, row, column, value):
+        self._values[row * 4 + column] = float(value)
+
+    def __mul__(self, other):
+        a, b = self._values, other._values
+        values = []
+        for row in range(0, 16, 4):
+            a0, a1, a2, a3 = a[row:row + 4]
+            values.extend([a0 * b[column] + a1 * b[column + 4] +
+                           a2 * b[column + 8] + a3 * b[column + 12]
+                           for column in range(4)])
+        return MMatrix(values)
+
+    def transpose(self):
+        return MMatrix([self._values[column * 4 + row]
+                        for row in range(4) for column in range(4)])
+
+    def inverse(self):
+        # Gauss-Jordan elimination with partial pivoting.
+        rows = [self._values[row * 4:row * 4 + 4] +
+                [1.0 if column == row else 0.0 for column in range(4)]
+                for row in range(4)]
+        for column in range(4):
+            pivot = max(range(column, 4), key=lambda row: abs(rows[row][column]))
+            if abs(rows[pivot][column]) < 1e-12:
+                raise RuntimeError("(kFailure): Matrix is singular")
+            rows[column], rows[pivot] = rows[pivot], rows[column]
+            scale = rows[column][column]
+            rows[column] = [value / scale for value in rows[column]]
+            for row in range(4):
+                if row != column and rows[row][column]:
+                    factor = rows[row][column]
+                    rows[row] = [value - factor * pivot_value
+                                 for value, pivot_value in
+                                 zip(rows[row], rows[column])]
+        return MMatrix([value for row in rows for value in row[4:]])
+
+    def isEquivalent(self, other, tolerance=1e-10):
+        return all(abs(a - b) <= tolerance
+                   for a, b in zip(self._values, other._values))
+
+
+class MQuaternion(object):
+    def __init__(self, x=0.0, y=0.0, z=0.0, w=1.0):
+        if not isinstance(x, (int, float)):
+            x, y, z, w = list(x)
+        self.x, self.y, self.z, self.w = (float(x), float(y), float(z),
+                                          float(w))
+
+    def __iter__(self):
+        return iter((self.x, self.y, self.z, self.w))
+
+    def __mul__(self, other):
+        # Like Maya, `a * b` rotates by a, then by b.
+        a, b = other, self
+        return MQuaternion(
+                a.w * b.x + a.x * b.w + a.y * b.z - a.z * b.y,
+                a.w * b.y - a.x * b.z + a.y * b.w + a.z * b.x,
+                a.w * b.z + a.x * b.y - a.y * b.x + a.z * b.w,
+                a.w * b.w - a.x * b.x - a.y * b.y - a.z * b.z)
+
+    def inverse(self):
+        norm = self.x ** 2 + self.y ** 2 + self.z ** 2 + self.w ** 2
+        return MQuaternion(-self.x / norm, -self.y / norm, -self.z / norm,
+                           self.w / norm)
+
+    def _rotation(self):
+        # The 3x3 rotation matrix of column vectors.
+        x, y, z, w = self.x, self.y, self.z, self.w
+        return [[1 - 2 * (y * y + z * z), 2 * (x * y - z * w),
+                 2 * (x * z + y * w)],
+                [2 * (x * y + z * w), 1 - 2 * (x * x + z * z),
+                 2 * (y * z - x * w)],
+                [2 * (x * z - y * w), 2 * (y * z + x * w),
+                 1 - 2 * (x * x + y * y)]]
+
+    @staticmethod
+    def _fromRotation(m):
+        trace = m[0][0] + m[1][1] + m[2][2]
+        if trace > 0:
+            s = 0.5 / math.sqrt(trace + 1.0)
+            return MQuaternion((m[2][1] - m[1][2]) * s,
+                               (m[0][2] - m[2][0]) * s,
+                               (m[1][0] - m[0][1]) * s, 0.25 / s)
+        if m[0][0] > m[1][1] and m[0][0] > m[2][2]:
+            s = 2.0 * math.sqrt(1.0 + m[0][0] - m[1][1] - m[2][2])
+            return MQuaternion(0.25 * s, (m[0][1] + m[1][0]) / s,
+                               (m[0][2] + m[2][0]) / s,
+                               (m[2][1] - m[1][2]) / s)
+        if m[1][1] > m[2][2]:
+            s = 2.0 * math.sqrt(1.0 + m[1][1] - m[0][0] - m[2][2])
+            return MQuaternion((m[0][1] + m[1][0]) / s, 0.25 * s,
+                               (m[1][2] + m[2][1]) / s,
+                               (m[0][2] - m[2][0]) / s)
+        s = 2.0 * math.sqrt(1.0 + m[2][2] - m[0][0] - m[1][1])
+        return MQuaternion((m[0][2] + m[2][0]) / s, (m[1][2] + m[2][1]) / s,
+                           0.25 * s, (m[1][0] - m[0][1]) / s)
+
+    def asEulerRotation(self):
+        m = self._rotation()
+        return MEulerRotation(math.atan2(m[2][1], m[2][2]),
+                              math.asin(max(-1.0, min(1.0, -m[2][0]))),
+                              math.atan2(m[1][0], m[0][0]))
+
+    def asMatrix(self):
+        m = self._rotation()
+        return MMatrix([m[0][0], m[1][0], m[2][0], 0.0,
+                        m[0][1], m[1][1], m[2][1], 0.0,
+                        m[0][2], m[1][2], m[2][2], 0.0,
+                        0.0, 0.0, 0.0, 1.0])
+
+
+class MEulerRotation(object):
+    kXYZ = 0
+
+    def __init__(self, x=0.0, y=0.0, z=0.0, order=kXYZ):
+        if not isinstance(x, (int, float)):
+            x, y, z = list(x)[:3]
+        self.x, self.y, self.z = float(x), float(y), float(z)
+        self.order = order
+
+    def __iter__(self):
+        return iter((self.x, self.y, self.z))
+
+    def asQuaternion(self):
+        # Rotate about X, then Y, then Z.
+        def axis_rotation(angle, axis):
+            values = [0.0, 0.0, 0.0, math.cos(angle / 2.0)]
+            values[axis] = math.sin(angle / 2.0)
+            return MQuaternion(*values)
+        return (axis_rotation(self.x, 0) * axis_rotation(self.y, 1) *
+                axis_rotation(self.z, 2))
+
+    def asMatrix(self):
+        return self.asQuaternion().asMatrix()
+
+
+class MTransformationMatrix(object):
+    """
+    Translation, rotation, scale and shear of a transform, without pivots.
+    Shear is kept but not composed into the matrix.
+    """
+    def __init__(self, matrix=None):
+        self._translation = MVector()
+        self._rotation = MQuaternion()
+        self._scale = [1.0, 1.0, 1.0]
+        self._shear = [0.0, 0.0, 0.0]
+        if matrix is not None:
+            self._decompose(MMatrix(matrix))
+
+    def _decompose(self, matrix):
+        rows = [[matrix.getElement(row, column) for column in range(3)]
+                for row in range(3)]
+        self._translation = MVector([matrix.getElement(3, column)
+                                     for column in range(3)])
+        self._scale = [math.sqrt(sum(value * value for value in row))
+                       for row in rows]
+        rows = [[value / scale for value in row]
+                for row, scale in zip(rows, self._scale)]
+
+        # A negative determinant means a negative scale.
+        determinant = (rows[0][0] * (rows[1][1] * rows[2][2] -
+                                     rows[1][2] * rows[2][1]) -
+                       rows[0][1] * (rows[1][0] * rows[2][2] -
+                                     rows[1][2] * rows[2][0]) +
+                       rows[0][2] * (rows[1][0] * rows[2][1] -
+                                     rows[1][1] * rows[2][0]))
+        if determinant < 0:
+            self._scale[0] = -self._scale[0]
+            rows[0] = [-value for value in rows[0]]
+
+        # The rows are the columns of the column vector rotation matrix.
+        self._rotation = MQuaternion._fromRotation(
+                            [[rows[column][row] for column in range(3)]
+                             for row in range(3)])
+
+    def asMatrix(self):
+        rotation = self._rotation.asMatrix()
+        values = []
+        for row in range(3):
+            values.extend([rotation.getElement(row, column) *
+                           self._scale[row] for column in range(3)])
+            values.append(0.0)
+        values.extend(list(self._translation) + [1.0])
+        return MMatrix(values)
+
+    def translation(self, space=MSpace.kTransform):
+        return MVector(self._translation)
+
+    def setTranslation(self, vector, space=MSpace.kTransform):
+        self._translation = MVector(vector)
+        return self
+
+    def rotation(self, asQuaternion=False):
+        if asQuaternion:
+            return MQuaternion(self._rotation)
+        return self._rotation.asEulerRotation()
+
+    def setRotation(self, rotation):
+        if isinstance(rotation, MEulerRotation):
+            rotation = rotation.asQuaternion()
+        self._rotation = MQuaternion(rotation)
+        return self
+
+    def rotationOrientation(self):
+        return MQuaternion()
+
+    def scale(self, space=MSpace.kTransform):
+        return list(self._scale)
+
+    def setScale(self, scale, space=MSpace.kTransform):
+        self._scale = [float(value) for value in scale]
+        return self
+
+    def shear(self, space=MSpace.kTransform):
+        return list(self._shear)
+
+    def setShear(self, shear, space=MSpace.kTransform):
+        self._shear = [float(value) for value in shear]
+        return self
+
+
+def _node_transformation(node):
+    attributes = node.attributes
+    transformation = MTransformationMatrix()
+    transformation.setTranslation(MVector(
+            [attributes.get(name, 0.0) for name in
+             COMPOUND_ATTRIBUTES["translate"]]))
+    transformation.setRotation(MEulerRotation(
+            [attributes.get(name, 0.0) for name in
+             COMPOUND_ATTRIBUTES["rotate"]]))
+    transformation.setScale([attributes.get(name, 1.0) for name in
+                             COMPOUND_ATTRIBUTES["scale"]])
+    transformation.setShear([attributes.get(name, 0.0) for name in
+                             COMPOUND_ATTRIBUTES["shear"]])
+    return transformation
+
+
+def _local_matrix(node):
+    if node.type in SHAPE_TYPES or not node.is_dag:
+        return MMatrix()
+    return _node_transformation(node).asMatrix()
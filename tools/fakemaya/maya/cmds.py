@@ -0,0 +1,478 @@
+# Copyright 2023 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Fake maya.cmds backed by the in-memory scene in maya._scene. Only the
+commands (and flags) used by the iograft Maya nodes are implemented. Every
+call is counted in `maya._scene.scene.call_counts` and delayed by the
+configured per-call latency.
+"""
+
+import functools
+import os
+import sys
+
+from maya._scene import COMPOUND_ATTRIBUTES, SHAPE_TYPES, scene
+
+
+if sys.version_info[0] >= 3:
+    _string_types = (str,)
+else:
+    _string_types = (basestring,)
+
+
+FAKE_MAYA_VERSION = "2024"
+
+# Commands registered by plugins when they are loaded.
+_PLUGIN_COMMANDS = {}
+
+
+def _command(func):
+    @functools.wraps(func)
+    def fake_command(*args, **kwargs):
+        scene.record_call(func.__name__)
+        return func(*args, **kwargs)
+    return fake_command
+
+
+def _plugin_command(plugin):
+    def register(func):
+        _PLUGIN_COMMANDS.setdefault(plugin, []).append(_command(func))
+        return func
+    return register
+
+
+def _flatten(args):
+    names = []
+    for arg in args:
+        if isinstance(arg, _string_types):
+            names.append(arg)
+        elif arg is not None:
+            names.extend(_flatten(arg))
+    return names
+
+
+def _find_nodes(names):
+    nodes = []
+    for name in _flatten(names):
+        node = scene.find(name)
+        if node is None:
+            raise ValueError("No object matches name: {}".format(name))
+        nodes.append(node)
+    return nodes
+
+
+def _get_value(node, attribute):
+    if attribute in COMPOUND_ATTRIBUTES:
+        return [tuple(node.attributes[child]
+                      for child in COMPOUND_ATTRIBUTES[attribute])]
+    return node.attributes[attribute]
+
+
+# General.
+@_command
+def about(batch=False, version=False, **kwargs):
+    if version:
+        return FAKE_MAYA_VERSION
+    return True
+
+
+@_command
+def refresh(*args, **kwargs):
+    pass
+
+
+@_command
+def undoInfo(*args, **kwargs):
+    return True
+
+
+@_command
+def flushUndo():
+    pass
+
+
+@_command
+def viewFit(*args, **kwargs):
+    pass
+
+
+# Nodes.
+@_command
+def objExists(name):
+    if "." in name:
+        node, attribute = scene.split_plug(name)
+        return node is not None and (attribute in node.attributes or
+                                     attribute in COMPOUND_ATTRIBUTES)
+    return scene.find(name) is not None
+
+
+@_command
+def ls(*args, **kwargs):
+    long_names = kwargs.get("long", kwargs.get("l", False))
+    if kwargs.get("sl", kwargs.get("selection", False)):
+        nodes = list(scene.selection)
+    elif kwargs.get("assemblies", False):
+        nodes = [node for node in scene.nodes.values()
+                 if node.is_dag and node.parent is None]
+    elif args:
+        nodes = []
+        for name in _flatten(args):
+            node = scene.find(name) or scene.find_by_uuid(name)
+            if node is not None:
+                nodes.append(node)
+    else:
+        nodes = list(scene.nodes.values())
+
+    node_type = kwargs.get("type")
+    if node_type:
+        nodes = [node for node in nodes if node.type == node_type]
+    if kwargs.get("uuid", False):
+        return [node.uuid for node in nodes]
+    return [node.path() if long_names else node.name for node in nodes]
+
+
+@_command
+def nodeType(name):
+    return _find_nodes([name])[0].type
+
+
+@_command
+def listRelatives(*args, **kwargs):
+    full_path = kwargs.get("fullPath", kwargs.get("f", False))
+    node_type = kwargs.get("type")
+    relatives = []
+    for node in _find_nodes(args):
+        if kwargs.get("parent", kwargs.get("p", False)):
+            candidates = [node.parent] if node.parent is not None else []
+        elif kwargs.get("allDescendents", kwargs.get("ad", False)):
+            candidates = []
+            stack = list(node.children)
+            while stack:
+                child = stack.pop()
+                candidates.append(child)
+                stack.extend(child.children)
+        else:
+            candidates = list(node.children)
+        relatives.extend(candidate for candidate in candidates
+                         if not node_type or candidate.type == node_type)
+
+    if not relatives:
+        return None
+    return [node.path() if full_path else node.name for node in relatives]
+
+
+@_command
+def createNode(node_type, name="", parent="", skipSelect=False, **kwargs):
+    if node_type == "mayaUsdProxyShape" and \
+            "mayaUsdPlugin" not in scene.loaded_plugins:
+        raise RuntimeError("Unknown node type: {}".format(node_type))
+
+    parent_node = None
+    if parent:
+        parent_node = _find_nodes([parent])[0]
+    elif node_type in SHAPE_TYPES:
+        parent_node = scene.add_node("transform1", "transform")
+
+    node = scene.add_node(name or node_type + "1", node_type, parent_node)
+    if not skipSelect:
+        scene.selection = [node]
+    return node.name
+
+
+@_command
+def delete(*args, **kwargs):
+    for node in _find_nodes(args):
+        scene.delete_node(node)
+
+
+@_command
+def parent(*args, **kwargs):
+    names = _flatten(args)
+    if kwargs.get("world", kwargs.get("w", False)):
+        parent_node = None
+    else:
+        parent_node = _find_nodes([names.pop()])[0]
+
+    nodes = _find_nodes(names)
+    for node in nodes:
+        scene.reparent(node, parent_node)
+    scene.selection = list(nodes)
+    return [node.name for node in nodes]
+
+
+@_command
+def select(*args, **kwargs):
+    if kwargs.get("clear", kwargs.get("cl", False)):
+        scene.selection = []
+        return
+
+    nodes = _find_nodes(args)
+    if kwargs.get("add", False):
+        scene.selection.extend(node for node in nodes
+                               if node not in scene.selection)
+    else:
+        scene.selection = nodes
+
+
+# Attributes.
+@_command
+def getAttr(plug, **kwargs):
+    node, attribute = scene.split_plug(plug)
+    if node is None:
+        raise ValueError("No object matches name: {}".format(plug))
+    try:
+        return _get_value(node, attribute)
+    except KeyError:
+        raise ValueError("No object matches name: {}".format(plug))
+
+
+@_command
+def setAttr(plug, *values, **kwargs):
+    node, attribute = scene.split_plug(plug)
+    if node is None:
+        raise RuntimeError("No object matches name: {}".format(plug))
+
+    if attribute in COMPOUND_ATTRIBUTES:
+        for child, value in zip(COMPOUND_ATTRIBUTES[attribute], values):
+            scene.set_attribute(node, child, value)
+    elif attribute in node.attributes:
+        scene.set_attribute(node, attribute, values[0])
+    else:
+        raise RuntimeError("No object matches name: {}".format(plug))
+
+
+@_command
+def addAttr(*args, **kwargs):
+    node = _find_nodes(args)[0]
+    name = kwargs.get("longName", kwargs.get("ln"))
+    node.attributes[name] = kwargs.get("defaultValue",
+                                       kwargs.get("dv", 0.0))
+
+
+@_command
+def connectAttr(source, destination, **kwargs):
+    scene.connect(source, destination)
+
+
+# Namespaces.
+@_command
+def namespace(*args, **kwargs):
+    if kwargs.get("exists"):
+        return kwargs["exists"].lstrip(":") in scene.namespaces
+    if kwargs.get("removeNamespace"):
+        name = kwargs["removeNamespace"].lstrip(":")
+        scene.namespaces.discard(name)
+        if kwargs.get("deleteNamespaceContent"):
+            for node in list(scene.nodes.values()):
+                if node.name.startswith(name + ":") and \
+                        node.name in scene.nodes:
+                    scene.delete_node(node)
+    if kwargs.get("addNamespace"):
+        scene.namespaces.add(kwargs["addNamespace"])
+
+
+@_command
+def namespaceInfo(*args, **kwargs):
+    return [":" + name for name in sorted(scene.namespaces)]
+
+
+# Plugins.
+@_command
+def loadPlugin(name, **kwargs):
+    plugin = os.path.splitext(os.path.basename(name))[0]
+    if plugin not in scene.loaded_plugins:
+        scene.loaded_plugins.add(plugin)
+        for command in _PLUGIN_COMMANDS.get(plugin, []):
+            setattr(sys.modules[__name__], command.__name__, command)
+    return [plugin]
+
+
+@_command
+def unloadPlugin(name, **kwargs):
+    scene.loaded_plugins.discard(name)
+    for command in _PLUGIN_COMMANDS.get(name, []):
+        delattr(sys.modules[__name__], command.__name__)
+
+
+@_command
+def pluginInfo(*args, **kwargs):
+    if kwargs.get("listPlugins"):
+        return sorted(scene.loaded_plugins)
+    if kwargs.get("version", kwargs.get("v", False)):
+        return "1.0"
+    return args[0] in scene.loaded_plugins
+
+
+# Files.
+@_command
+def file(*args, **kwargs):
+    filename = args[0] if args else ""
+    if kwargs.get("query", kwargs.get("q", False)):
+        if kwargs.get("sceneName", kwargs.get("sn", False)):
+            return scene.scene_name
+        if kwargs.get("modified", False):
+            return scene.modified
+        if kwargs.get("reference", kwargs.get("r", False)):
+            return [node.attributes["fileName"]
+                    for node in scene.nodes.values()
+                    if node.type == "reference"]
+        if kwargs.get("list", kwargs.get("l", False)):
+            # The scene followed by the files of the loaded references.
+            files = [scene.scene_name] if scene.scene_name else []
+            files.extend(node.attributes["fileName"]
+                         for node in scene.nodes.values()
+                         if node.type == "reference" and
+                         node.attributes.get("loaded"))
+            return files
+        return scene.scene_name
+
+    if kwargs.get("new", False):
+        scene.reset("before_new")
+        return ""
+    if kwargs.get("rename"):
+        scene.scene_name = kwargs["rename"]
+        return scene.scene_name
+    if kwargs.get("open", kwargs.get("o", False)):
+        scene.reset("before_open")
+        scene.read(filename)
+        scene.scene_name = filename
+        scene.modified = False
+        return filename
+    if kwargs.get("reference", kwargs.get("r", False)):
+        # Create the reference node, and load it unless it is deferred.
+        namespace = kwargs.get("namespace", kwargs.get("ns", "")) or \
+            os.path.splitext(os.path.basename(filename))[0]
+        node = scene.add_node(namespace + "RN", "reference")
+        node.attributes.update({"fileName": filename,
+                                "namespace": namespace})
+        if not kwargs.get("deferReference", kwargs.get("dr", False)):
+            _load_reference(node)
+        return filename
+    if kwargs.get("loadReference", kwargs.get("lr")):
+        node = _find_nodes([kwargs.get("loadReference",
+                                       kwargs.get("lr"))])[0]
+        _load_reference(node)
+        return node.attributes["fileName"]
+    if kwargs.get("i", kwargs.get("import", False)):
+        new_nodes = scene.read(filename, kwargs.get("namespace", ""))
+        if kwargs.get("rnn", kwargs.get("returnNewNodes", False)):
+            return [node.path() for node in new_nodes]
+        return filename
+    if kwargs.get("save", kwargs.get("s", False)):
+        scene.write(scene.scene_name)
+        scene.modified = False
+        return scene.scene_name
+    if kwargs.get("exportAll", kwargs.get("ea", False)):
+        scene.write(filename)
+        return filename
+    if kwargs.get("exportSelected", kwargs.get("es", False)):
+        scene.write(filename, scene.selection)
+        return filename
+    raise RuntimeError("Unsupported file command flags: {}".format(kwargs))
+
+
+def _load_reference(node):
+    if not node.attributes["loaded"]:
+        scene.read(node.attributes["fileName"],
+                   node.attributes["namespace"])
+        node.attributes["loaded"] = True
+
+
+def _find_reference(reference):
+    node = scene.find(reference)
+    if node is not None and node.type == "reference":
+        return node
+    for node in scene.nodes.values():
+        if node.type == "reference" and \
+                node.attributes["fileName"] == reference:
+            return node
+    raise RuntimeError("'{}' is not a reference.".format(reference))
+
+
+@_command
+def referenceQuery(reference, **kwargs):
+    node = _find_reference(reference)
+    if kwargs.get("referenceNode", kwargs.get("rfn", False)):
+        return node.name
+    if kwargs.get("isLoaded", kwargs.get("il", False)):
+        return node.attributes["loaded"]
+    if kwargs.get("filename", kwargs.get("f", False)):
+        return node.attributes["fileName"]
+    raise RuntimeError("Unsupported referenceQuery flags: {}".format(kwargs))
+
+
+# FBX plugin commands (available once "fbxmaya" is loaded).
+def _mel_flags(args):
+    flags = {}
+    args = list(args)
+    while args:
+        flag = args.pop(0)
+        if args and not str(args[0]).startswith("-"):
+            flags[flag] = args.pop(0)
+        else:
+            flags[flag] = True
+    return flags
+
+
+@_plugin_command("fbxmaya")
+def FBXResetExport(*args):
+    pass
+
+
+# The FBX import mode set by FBXImportMode (reset by FBXResetImport).
+_fbx_import_mode = ["add"]
+
+
+@_plugin_command("fbxmaya")
+def FBXResetImport(*args):
+    _fbx_import_mode[0] = "add"
+
+
+@_plugin_command("fbxmaya")
+def FBXImportMode(*args):
+    flags = _mel_flags(args)
+    if "-q" in flags:
+        return _fbx_import_mode[0]
+    _fbx_import_mode[0] = flags["-v"]
+
+
+@_plugin_command("fbxmaya")
+def FBXLoadExportPresetFile(*args):
+    pass
+
+
+@_plugin_command("fbxmaya")
+def FBXLoadImportPresetFile(*args):
+    pass
+
+
+@_plugin_command("fbxmaya")
+def FBXExport(*args):
+    flags = _mel_flags(args)
+    scene.write(flags["-f"], scene.selection if "-s" in flags else None)
+
+
+@_plugin_command("fbxmaya")
+def FBXImport(*args):
+    flags = _mel_flags(args)
+    scene.read(flags["-f"])
+
+
+# Like the real commands, the plugin commands are only defined once their
+# plugin is loaded.
+for _commands in _PLUGIN_COMMANDS.values():
+    for _command_func in _commands:
+        del globals()[_command_func.__name__]
+del _commands, _command_func
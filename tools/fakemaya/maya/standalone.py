@@ -0,0 +1,44 @@
+# Copyright 2022 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Fake maya.standalone. initialize() sleeps for IOGMAYA_FAKE_INIT_SECONDS
+(default 5 seconds) to simulate the cost of starting standalone Maya.
+"""
+
+import os
+import time
+
+
+FAKE_INIT_SECONDS_ENV = "IOGMAYA_FAKE_INIT_SECONDS"
+
+_initialized = False
+
+
+def initialize(name="python"):
+    global _initialized
+    if _initialized:
+        return
+
+    time.sleep(float(os.environ.get(FAKE_INIT_SECONDS_ENV, "5")))
+    _initialized = True
+
+
+def uninitialize():
+    global _initialized
+    _initialized = False
+
+
+def is_initialized():
+    return _initialized
@@ -0,0 +1,30 @@
+# Copyright 2023 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Fake maya.utils. There is no separate main thread event loop, so functions
+are executed immediately in the calling thread.
+"""
+
+
+def executeInMainThreadWithResult(func, *args, **kwargs):
+    return func(*args, **kwargs)
+
+
+def executeDeferred(func, *args, **kwargs):
+    func(*args, **kwargs)
+
+
+def processIdleEvents():
+    pass
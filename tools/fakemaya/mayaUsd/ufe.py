@@ -0,0 +1,52 @@
+# Copyright 2023 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Fake mayaUsd.ufe. getStage() returns the stage of a mayaUsdProxyShape in the
+fake scene: the stage in the shared stage cache if the proxy's
+"stageCacheId" is set, or else the stage of its "filePath" (opened once
+per proxy, like mayaUsd does).
+"""
+
+from maya._scene import scene
+from pxr import Usd, UsdUtils
+
+
+# The stages opened by the proxies from their "filePath", by the proxy's
+# UUID, file and load policy.
+_proxy_stages = {}
+
+
+def getStage(proxy_shape):
+    node = scene.find(proxy_shape)
+    if node is None or node.type != "mayaUsdProxyShape":
+        return None
+
+    cache = UsdUtils.StageCache.Get()
+    stage_id = node.attributes.get("stageCacheId", -1)
+    if stage_id >= 0:
+        return cache.Find(Usd.StageCache.Id.FromLongInt(stage_id))
+
+    filename = node.attributes.get("filePath", "")
+    if not filename:
+        return None
+    load = (Usd.Stage.LoadAll if node.attributes.get("loadPayloads", True)
+            else Usd.Stage.LoadNone)
+    key = (node.uuid, filename, load)
+    stage = _proxy_stages.get(key)
+    if stage is None:
+        stage = Usd.Stage.Open(filename, load)
+        if stage is not None:
+            _proxy_stages[key] = stage
+    return stage
@@ -0,0 +1,35 @@
+# Copyright 2023 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Fake pxr.Sdf.
+"""
+
+
+class Path(object):
+    def __init__(self, path=""):
+        self.pathString = str(path)
+
+    def __eq__(self, other):
+        return isinstance(other, Path) and \
+            self.pathString == other.pathString
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.pathString)
+
+    def __repr__(self):
+        return "Sdf.Path({!r})".format(self.pathString)
@@ -0,0 +1,173 @@
+# Copyright 2023 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Fake pxr.Usd.
+"""
+
+import itertools
+import os
+
+
+class StagePopulationMask(object):
+    def __init__(self, paths=()):
+        self._paths = list(paths)
+        self._all = False
+
+    @staticmethod
+    def All():
+        mask = StagePopulationMask()
+        mask._all = True
+        return mask
+
+    def IncludesSubtree(self, path):
+        return self._all or path in self._paths
+
+    def GetPaths(self):
+        return list(self._paths)
+
+
+class StageLoadRules(object):
+    AllRule = "AllRule"
+    OnlyRule = "OnlyRule"
+    NoneRule = "NoneRule"
+
+    def __init__(self):
+        self._rules = []
+
+    @staticmethod
+    def LoadAll():
+        rules = StageLoadRules()
+        rules._rules.append(("/", StageLoadRules.AllRule))
+        return rules
+
+    @staticmethod
+    def LoadNone():
+        rules = StageLoadRules()
+        rules._rules.append(("/", StageLoadRules.NoneRule))
+        return rules
+
+    def LoadWithDescendants(self, path):
+        self._rules.append((path.pathString, StageLoadRules.AllRule))
+
+    def Unload(self, path):
+        self._rules.append((path.pathString, StageLoadRules.NoneRule))
+
+    def Minimize(self):
+        pass
+
+    def GetRules(self):
+        return list(self._rules)
+
+
+class _RootLayer(object):
+    def __init__(self, identifier):
+        self.identifier = identifier
+
+
+class Stage(object):
+    LoadAll = "LoadAll"
+    LoadNone = "LoadNone"
+
+    def __init__(self, filename, load, mask):
+        self._root_layer = _RootLayer(filename)
+        self._load = load
+        self._mask = mask
+        self._load_rules = (StageLoadRules.LoadAll() if load == Stage.LoadAll
+                            else StageLoadRules.LoadNone())
+
+    @staticmethod
+    def Open(filename, load=LoadAll):
+        return Stage.OpenMasked(filename, StagePopulationMask.All(), load)
+
+    @staticmethod
+    def OpenMasked(filename, mask, load=LoadAll):
+        # Like a failed open, missing files return None.
+        if not os.path.exists(filename):
+            return None
+        return Stage(filename, load, mask)
+
+    def GetRootLayer(self):
+        return self._root_layer
+
+    def GetPopulationMask(self):
+        return self._mask
+
+    def GetLoadRules(self):
+        return self._load_rules
+
+    def SetLoadRules(self, rules):
+        self._load_rules = rules
+
+
+class StageCache(object):
+    class Id(object):
+        def __init__(self, value=-1):
+            self._value = value
+
+        @staticmethod
+        def FromLongInt(value):
+            return StageCache.Id(value)
+
+        def ToLongInt(self):
+            return self._value
+
+        def IsValid(self):
+            return self._value >= 0
+
+        def __eq__(self, other):
+            return isinstance(other, StageCache.Id) and \
+                self._value == other._value
+
+        def __ne__(self, other):
+            return not self == other
+
+        def __hash__(self):
+            return hash(self._value)
+
+    _ids = itertools.count(1)
+
+    def __init__(self):
+        self._stages = {}
+
+    def Insert(self, stage):
+        for value, cached_stage in self._stages.items():
+            if cached_stage is stage:
+                return StageCache.Id(value)
+        value = next(StageCache._ids)
+        self._stages[value] = stage
+        return StageCache.Id(value)
+
+    def Find(self, stage_id):
+        return self._stages.get(stage_id.ToLongInt())
+
+    def Contains(self, stage_id):
+        return stage_id.ToLongInt() in self._stages
+
+    def Erase(self, stage_id):
+        if isinstance(stage_id, Stage):
+            stage_id = self.GetId(stage_id)
+        return self._stages.pop(stage_id.ToLongInt(), None) is not None
+
+    def GetId(self, stage):
+        for value, cached_stage in self._stages.items():
+            if cached_stage is stage:
+                return StageCache.Id(value)
+        return StageCache.Id()
+
+    def Size(self):
+        return len(self._stages)
+
+    def Clear(self):
+        self._stages.clear()
@@ -0,0 +1,656 @@
+#!/usr/bin/env python
+# Copyright 2023 Fabrica Software, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmark the iograft Maya nodes against the fake maya package in
+tools/fakemaya.
+
+Every node in the nodes/ and nodes/usd/ directories is loaded and its
+Process() function is called directly with generated inputs, at each of the
+requested scene sizes. The harness reports the executions per second and
+the number of maya.cmds calls each execution made. The script exits with a
+non-zero status if any node is skipped (i.e. it has no scenario or needs a
+module that is not available) or fails.
+
+The nodes are driven without an iograft Core: light-weight stand-ins for the
+iograft, iobasictypes and iousdtypes modules are installed which record the
+node definitions and pass inputs and outputs through dictionaries. The fake
+session runs in batch mode, so nodes only showing UI return before using Qt;
+if PySide2 is not installed, stand-ins are installed for it as well.
+
+    python tools/iogmaya_benchmark.py --sizes 10 1000 100000 --latency 0.00005
+
+With --check, the TIMING_CHECKS are run as well: each runs a node once on a
+large input and fails if it takes longer than its limit. The subcore pool is
+checked too: work items are handed to a pool of fake workers which must be
+reused.
+"""
+
+import argparse
+import binascii
+import collections
+import glob
+import json
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+import types
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NODE_DIRS = [os.path.join(ROOT_DIR, "nodes"),
+             os.path.join(ROOT_DIR, "nodes", "usd")]
+DEFAULT_SIZES = [10, 100, 1000, 10000, 100000]
+
+
+#
+# Stand-ins for the iograft modules.
+#
+_NO_DEFAULT = object()
+
+
+class _PortDefinition(object):
+    def __init__(self, name, data_type=None, default_value=_NO_DEFAULT):
+        self.name = name
+        self.data_type = data_type
+        self.default_value = default_value
+
+
+class _NodeDefinition(object):
+    def __init__(self, name):
+        self.name = name
+        self.namespace = ""
+        self.inputs = []
+        self.outputs = []
+
+    def SetNamespace(self, namespace):
+        self.namespace = namespace
+
+    def SetMenuPath(self, menu_path):
+        pass
+
+    def AddInput(self, definition):
+        self.inputs.append(definition)
+
+    def AddOutput(self, definition):
+        self.outputs.append(definition)
+
+
+class NodeData(object):
+    """
+    Inputs and outputs of a single node execution.
+    """
+    def __init__(self, inputs):
+        self.inputs = inputs
+        self.outputs = {}
+
+
+def _get_input(definition, data):
+    if definition.name in data.inputs:
+        return data.inputs[definition.name]
+    if definition.default_value is _NO_DEFAULT:
+        raise KeyError("No value for input: {}".format(definition.name))
+    return definition.default_value
+
+
+def _set_output(definition, data, value):
+    data.outputs[definition.name] = value
+
+
+class _TypesModule(types.ModuleType):
+    # Any type requested from the module is accepted.
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: name
+
+
+def install_iograft_stand_ins():
+    iograft = types.ModuleType("iograft")
+    iograft.Node = object
+    iograft.NodeDefinition = _NodeDefinition
+    iograft.InputDefinition = _PortDefinition
+    iograft.OutputDefinition = _PortDefinition
+    iograft.MutableInputDefinition = _PortDefinition
+    iograft.MutableOutputDefinition = _PortDefinition
+    iograft.GetInput = _get_input
+    iograft.SetOutput = _set_output
+    iograft.NodeProcessException = type("NodeProcessException",
+                                        (Exception,), {})
+    sys.modules["iograft"] = iograft
+    sys.modules["iobasictypes"] = _TypesModule("iobasictypes")
+    sys.modules["iousdtypes"] = _TypesModule("iousdtypes")
+
+
+class _QtStandIn(object):
+    # Any Qt class, instance or value.
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return _QtStandIn()
+
+    def __call__(self, *args, **kwargs):
+        return _QtStandIn()
+
+    def __or__(self, other):
+        return self
+
+
+class _QtModule(types.ModuleType):
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return _QtStandIn
+
+
+def install_qt_stand_ins():
+    try:
+        import PySide2
+        return
+    except ImportError:
+        pass
+
+    pyside = types.ModuleType("PySide2")
+    for name in ("QtCore", "QtGui", "QtWidgets"):
+        module = _QtModule("PySide2." + name)
+        setattr(pyside, name, module)
+        sys.modules[module.__name__] = module
+    sys.modules["PySide2"] = pyside
+    sys.modules["shiboken2"] = _QtModule("shiboken2")
+
+
+def _load_source(module_name, filename):
+    try:
+        import importlib.util
+    except ImportError:
+        import imp
+        return imp.load_source(module_name, filename)
+
+    spec = importlib.util.spec_from_file_location(module_name, filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class _Plugin(object):
+    def __init__(self):
+        self.nodes = []
+
+    def RegisterNode(self, definition, create):
+        self.nodes.append((definition, create))
+
+
+def load_nodes():
+    """
+    Load every node plugin. Returns a list of (node name, definition,
+    create function, error) tuples.
+    """
+    nodes = []
+    for node_dir in NODE_DIRS:
+        for filename in sorted(glob.glob(os.path.join(node_dir, "*.py"))):
+            module_name = "iogmaya_benchmark_" + \
+                os.path.splitext(os.path.basename(filename))[0]
+            try:
+                module = _load_source(module_name, filename)
+                plugin = _Plugin()
+                module.LoadPlugin(plugin)
+            except Exception as e:
+                nodes.append((os.path.basename(filename), None, None,
+                              "{}: {}".format(type(e).__name__, e)))
+                continue
+
+            for definition, create in plugin.nodes:
+                nodes.append((definition.name, definition, create, None))
+    return nodes
+
+
+#
+# Scenarios: the inputs for each node given the current scene.
+#
+class Context(object):
+    def __init__(self, scene, work_dir):
+        self.scene = scene
+        self.work_dir = work_dir
+        self.random = random.Random(0)
+        self._transforms = None
+        self._references = 0
+
+    def transforms(self):
+        # Cached; nodes created or deleted by the benchmarked node are not
+        # picked up until the scene is rebuilt.
+        if self._transforms is None:
+            self._transforms = [node for node in self.scene.nodes.values()
+                                if node.type == "transform"]
+        return self._transforms
+
+    def reset(self):
+        self._transforms = None
+
+    def random_path(self, child=False):
+        candidates = self.transforms()
+        if child:
+            candidates = [node for node in candidates
+                          if node.parent is not None] or candidates
+        return self.random.choice(candidates).path()
+
+    def sample_paths(self, count):
+        transforms = self.transforms()
+        count = min(count, len(transforms))
+        return [node.path() for node in self.random.sample(transforms, count)]
+
+    def path(self, name):
+        return os.path.join(self.work_dir, name)
+
+    def write_file(self, name, num_nodes):
+        from maya._scene import Scene
+        scene = Scene()
+        scene.populate(num_nodes)
+        filename = self.path(name)
+        scene.write(filename)
+        return filename
+
+    def reference(self):
+        # A new deferred reference for each execution.
+        import maya.cmds
+        self._references += 1
+        namespace = "ref{}".format(self._references)
+        maya.cmds.file(self.write_file("reference.ma", 10), reference=True,
+                       deferReference=True, namespace=namespace)
+        return namespace + "RN"
+
+    def usd_file(self, name):
+        filename = self.path(name)
+        if not os.path.exists(filename):
+            with open(filename, "w") as usd_file:
+                usd_file.write("#usda 1.0\n")
+        return filename
+
+    def proxy_shape(self):
+        # A proxy shape shared by the executions in the current scene.
+        import maya.cmds
+        if not maya.cmds.objExists("benchmarkStageShape"):
+            shape = maya.cmds.createNode("mayaUsdProxyShape",
+                                         name="benchmarkStageShape")
+            maya.cmds.setAttr(shape + ".filePath",
+                              self.usd_file("stage.usda"), type="string")
+        return "benchmarkStageShape"
+
+    def restructure(self, groups):
+        # Pairs reparenting every transform under one of `groups` new
+        # groups.
+        import maya.cmds
+        paths = [node.path() for node in self.transforms()]
+        parents = [maya.cmds.createNode("transform",
+                                        name="restructure{}".format(i))
+                   for i in range(groups)]
+        return {"objects": paths,
+                "parents": [parents[i % groups] for i in range(len(paths))],
+                "parent": ""}
+
+    def preset(self):
+        filename = self.path("preset.fbxexportpreset")
+        if not os.path.exists(filename):
+            open(filename, "w").close()
+        return filename
+
+
+SCENARIOS = {
+    "create_node": lambda ctx: {"node_type": "transform"},
+    "export_fbx_with_preset": lambda ctx: {
+        "filename": ctx.path("export.fbx"),
+        "preset_path": ctx.preset(),
+        "nodes": ctx.sample_paths(10)},
+    "export_fbx_sharded": lambda ctx: {
+        "nodes": ctx.sample_paths(40),
+        "output_directory": ctx.work_dir,
+        "preset_path": ctx.preset(),
+        "processes": 4},
+    "fit_to_view": lambda ctx: {},
+    "get_node_attribute": lambda ctx: {
+        "node": ctx.random_path(), "attribute": "translateX"},
+    "get_node_attributes": lambda ctx: {
+        "nodes": ctx.sample_paths(1000),
+        "attributes": ["translate", "visibility"]},
+    "get_parent_transform": lambda ctx: {
+        "node": ctx.random_path(child=True)},
+    "get_root_transform": lambda ctx: {"node": ctx.random_path()},
+    "get_root_transforms": lambda ctx: {"nodes": ctx.sample_paths(1000)},
+    "import_fbx_with_preset": lambda ctx: {
+        "filename": ctx.write_file("import.fbx", 10),
+        "preset_path": ctx.preset()},
+    "import_file_maya": lambda ctx: {
+        "filename": ctx.write_file("import.ma", 10), "namespace": "imported"},
+    "load_plugin": lambda ctx: {"plugin": "fbxmaya"},
+    "load_reference": lambda ctx: {"reference": ctx.reference()},
+    "new_scene_maya": lambda ctx: {},
+    "open_scene_maya": lambda ctx: {
+        "filename": ctx.write_file("open.ma", len(ctx.scene.nodes))},
+    "parent_objects": lambda ctx: {
+        "objects": ctx.sample_paths(10), "parent": ""},
+    "save_scene_maya": lambda ctx: {"file": ctx.path("save.ma")},
+    "set_node_attribute": lambda ctx: {
+        "node": ctx.random_path(), "attribute": "translateX", "value": 1.0},
+    "set_node_attributes": lambda ctx: {
+        "nodes": ctx.sample_paths(1000), "attributes": ["visibility"],
+        "values": [False] * min(1000, len(ctx.transforms()))},
+    "wait_for_user": lambda ctx: {},
+    "await_user_approvals": lambda ctx: {"approvals": []},
+    "create_usd_proxy": lambda ctx: {"usd_file": ctx.usd_file("stage.usda")},
+    "create_usd_proxies": lambda ctx: {
+        "usd_files": [ctx.usd_file("stage{}.usda".format(i % 10))
+                      for i in range(100)]},
+    "get_usd_proxy_stage": lambda ctx: {
+        "proxy_shape_path": ctx.proxy_shape()},
+}
+
+# Nodes which replace the scene; the scene is rebuilt before each execution
+# so they are only run a few times.
+SCENE_REPLACING_NODES = set(["new_scene_maya", "open_scene_maya"])
+
+# Nodes which start mayapy processes (each paying the fake
+# maya.standalone start up time) and are only run a few times.
+SUBPROCESS_NODES = set(["export_fbx_sharded"])
+
+
+# Timing checks run with --check: the node, the scene size, the scenario
+# and the maximum number of seconds the node may take. Most of the time is
+# spent in the pure Python matrix math of the fake OpenMaya, so the limits
+# catch operations which scale badly rather than measure Maya's timings.
+TIMING_CHECKS = {
+    "parent_objects_20k": ("parent_objects", 20000,
+                           lambda ctx: ctx.restructure(100), 30.0),
+}
+
+
+def run_node(name, create, scene, size, executions, work_dir,
+             scenario=None):
+    """
+    Execute the node `executions` times in a scene of `size` transforms.
+    Returns a dictionary of results.
+    """
+    if scenario is None:
+        scenario = SCENARIOS.get(name)
+    if scenario is None:
+        return {"status": "skipped", "reason": "no benchmark scenario"}
+
+    if name in SCENE_REPLACING_NODES or name in SUBPROCESS_NODES:
+        executions = min(executions, 3)
+
+    # The scene is built once per node and size. Nodes which replace the
+    # scene get a fresh scene before each execution.
+    context = Context(scene, work_dir)
+    elapsed = 0.0
+    calls = collections.Counter()
+    for i in range(executions):
+        if i == 0 or name in SCENE_REPLACING_NODES:
+            scene.populate(size)
+            context.reset()
+        data = NodeData(scenario(context))
+        node = create()
+
+        scene.call_counts.clear()
+        start_time = time.time()
+        try:
+            node.Process(data)
+        except ImportError as e:
+            return {"status": "skipped",
+                    "reason": "{}: {}".format(type(e).__name__, e)}
+        except Exception as e:
+            return {"status": "failed",
+                    "reason": "{}: {}".format(type(e).__name__, e)}
+        elapsed += time.time() - start_time
+        calls.update(scene.call_counts)
+
+    return {
+        "status": "ok",
+        "executions": executions,
+        "seconds": elapsed,
+        "executions_per_second": executions / elapsed if elapsed else 0.0,
+        "cmds_calls_per_execution": float(sum(calls.values())) / executions,
+        "cmds_calls": dict(calls)
+    }
+
+
+def run_timing_checks(nodes, scene, work_dir):
+    """
+    Run the TIMING_CHECKS and return the names of the ones which failed.
+    """
+    creators = dict((name, create) for name, _, create, error in nodes
+                    if error is None)
+    failed = []
+    _print("")
+    _print("{:<26} {:>8} {:>10} {:>10}  {}".format(
+            "check", "size", "seconds", "limit", "status"))
+    for check_name in sorted(TIMING_CHECKS):
+        name, size, scenario, limit = TIMING_CHECKS[check_name]
+        if name not in creators:
+            result = {"status": "skipped", "reason": "node not loaded"}
+        else:
+            result = run_node(name, creators[name], scene, size, 1,
+                              work_dir, scenario)
+        if result["status"] != "ok":
+            failed.append(check_name)
+            _print("{:<26} {:>8} {:>10} {:>10.1f}  {}: {}".format(
+                    check_name, size, "-", limit, result["status"],
+                    result["reason"]))
+        elif result["seconds"] > limit:
+            failed.append(check_name)
+            _print("{:<26} {:>8} {:>10.2f} {:>10.1f}  too slow".format(
+                    check_name, size, result["seconds"], limit))
+        else:
+            _print("{:<26} {:>8} {:>10.2f} {:>10.1f}  ok".format(
+                    check_name, size, result["seconds"], limit))
+    return failed
+
+
+#
+# Subcore pool check: workers handling several work items are reused.
+#
+POOL_CHECK_SIZE = 2
+POOL_CHECK_WORK_ITEMS = 3
+POOL_CHECK_REQUESTS = 6
+POOL_CHECK_TIMEOUT = 60.0
+
+
+def run_pool_worker(pool_address):
+    """
+    Worker launched by run_pool_check(), initializing the fake
+    maya.standalone and doing nothing with its work items.
+    """
+    import maya.standalone
+    import iogmaya_subcore_pool
+    return iogmaya_subcore_pool.RunPoolWorker(
+                    pool_address, maya.standalone.initialize,
+                    lambda core_address: None, maya.standalone.uninitialize,
+                    reset=lambda: None, max_work_items=POOL_CHECK_WORK_ITEMS)
+
+
+def run_pool_check(work_dir):
+    """
+    Hand POOL_CHECK_REQUESTS work items, one after the other, to a pool of
+    POOL_CHECK_SIZE workers handling up to POOL_CHECK_WORK_ITEMS work items
+    each. The pool is left to settle before each work item, so the workers
+    take turns and each of them is only new for its first work item.
+    Returns True if every work item succeeded and all of the others were
+    handled by reused workers (without reuse, a returning worker is retired
+    since the pool has already started its replacement).
+    """
+    import iogmaya_subcore_pool
+    if hasattr(socket, "AF_UNIX"):
+        address = os.path.join(work_dir, "pool.sock")
+    else:
+        address = r"\\.\pipe\iogmaya_benchmark_{}".format(os.getpid())
+
+    # The workers inherit the key of the pool.
+    os.environ[iogmaya_subcore_pool.POOL_AUTHKEY_ENV] = \
+        binascii.hexlify(os.urandom(16)).decode("ascii")
+    worker_command = [sys.executable, os.path.abspath(__file__),
+                      "--pool-worker", address]
+    pool = iogmaya_subcore_pool.SubcorePool(address, worker_command,
+                                            size=POOL_CHECK_SIZE,
+                                            reuse_workers=True)
+    thread = threading.Thread(target=pool.serve_forever,
+                              kwargs={"poll_interval": 0.1})
+    thread.daemon = True
+
+    def wait_for_idle_workers():
+        # Wait for the workers to warm up, or to come back after a work item.
+        deadline = time.time() + POOL_CHECK_TIMEOUT
+        while (pool.stats()["idle"] < POOL_CHECK_SIZE and
+                time.time() < deadline):
+            time.sleep(0.05)
+
+    start_time = time.time()
+    thread.start()
+    try:
+        exit_codes = []
+        for _ in range(POOL_CHECK_REQUESTS):
+            wait_for_idle_workers()
+            exit_codes.append(iogmaya_subcore_pool.RunPooledSubcore(
+                                                    "benchmark", address))
+        wait_for_idle_workers()
+        stats = pool.stats()
+    finally:
+        pool.stop()
+        thread.join()
+
+    ok = (stats["reused"] >= POOL_CHECK_REQUESTS - POOL_CHECK_SIZE and
+          all(code == 0 for code in exit_codes))
+    _print("{:<26} {:>8} {:>10.2f} {:>10}  {} (reused {} of {})".format(
+            "subcore_pool_reuse", POOL_CHECK_SIZE, time.time() - start_time,
+            "-", "ok" if ok else "failed", stats["reused"],
+            POOL_CHECK_REQUESTS))
+    return ok
+
+
+def _print(line):
+    sys.stdout.write(line + "\n")
+    sys.stdout.flush()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+                description="Benchmark the iograft Maya nodes against an"
+                            " in-memory fake of maya.cmds.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="Scene sizes (number of transforms) to run.")
+    parser.add_argument("--executions", type=int, default=20,
+                        help="Number of times to execute each node per"
+                             " scene size.")
+    parser.add_argument("--latency", type=float, default=None,
+                        help="Latency in seconds added to every maya.cmds"
+                             " call.")
+    parser.add_argument("--nodes", nargs="*", default=[],
+                        help="Only benchmark the nodes with these names.")
+    parser.add_argument("--json", dest="json_path", default="",
+                        help="Also write the results to this JSON file.")
+    parser.add_argument("--check", action="store_true",
+                        help="Also run the timing checks (failing if one"
+                             " takes longer than its limit) and the subcore"
+                             " pool check.")
+    parser.add_argument("--pool-worker", dest="pool_worker", default="",
+                        help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    # Use the fake maya package and the repository's python modules.
+    python_paths = [os.path.join(ROOT_DIR, "tools", "fakemaya"),
+                    os.path.join(ROOT_DIR, "python")]
+    sys.path[0:0] = python_paths
+    if args.pool_worker:
+        return run_pool_worker(args.pool_worker)
+
+    # Processes started by the nodes (i.e. export shards) use the same
+    # modules.
+    os.environ["PYTHONPATH"] = os.pathsep.join(
+            python_paths + [path for path in [os.environ.get("PYTHONPATH")]
+                            if path])
+    install_iograft_stand_ins()
+    install_qt_stand_ins()
+
+    from maya._scene import scene
+    if args.latency is not None:
+        scene.latency = args.latency
+
+    # Treat the plugins used by the nodes as available.
+    import maya.cmds
+    maya.cmds.loadPlugin("fbxmaya")
+    maya.cmds.loadPlugin("mayaUsdPlugin")
+
+    work_dir = tempfile.mkdtemp(prefix="iogmaya_benchmark_")
+    results = []
+    _print("{:<26} {:>8} {:>10} {:>12} {:>14}  {}".format(
+            "node", "size", "execs", "execs/s", "cmds/exec", "status"))
+    for name, definition, create, error in load_nodes():
+        if args.nodes and name not in args.nodes:
+            continue
+
+        for size in args.sizes:
+            if error is not None:
+                result = {"status": "skipped", "reason": error}
+            else:
+                result = run_node(name, create, scene, size, args.executions,
+                                  work_dir)
+            result.update({"node": name, "size": size})
+            results.append(result)
+
+            if result["status"] == "ok":
+                _print("{:<26} {:>8} {:>10} {:>12.1f} {:>14.1f}  ok".format(
+                        name, size, result["executions"],
+                        result["executions_per_second"],
+                        result["cmds_calls_per_execution"]))
+            else:
+                _print("{:<26} {:>8} {:>10} {:>12} {:>14}  {}: {}".format(
+                        name, size, "-", "-", "-", result["status"],
+                        result["reason"]))
+                # The result won't change with the scene size.
+                if error is not None or "scenario" in result["reason"]:
+                    break
+
+    failed_checks = []
+    if args.check:
+        failed_checks = run_timing_checks(load_nodes(), scene, work_dir)
+        if not run_pool_check(work_dir):
+            failed_checks.append("subcore_pool_reuse")
+
+    if args.json_path:
+        with open(args.json_path, "w") as json_file:
+            json.dump(results, json_file, indent=2)
+
+    not_ok = sorted(set(result["node"] for result in results
+                        if result["status"] != "ok"))
+    if not_ok:
+        sys.stderr.write("{} node(s) skipped or failed: {}\n".format(
+                                            len(not_ok), ", ".join(not_ok)))
+        return 1
+    if failed_checks:
+        sys.stderr.write("{} check(s) failed: {}\n".format(
+                            len(failed_checks), ", ".join(failed_checks)))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())